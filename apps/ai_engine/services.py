@@ -4,7 +4,7 @@ from django.conf import settings
 from django.utils import timezone
 from apps.fitness.models import WorkoutPlan
 from apps.ai_engine.models import AIUsageLog
-import requests 
+from apps.core.transport import get_transport
 
 logger = logging.getLogger('apps.ai_engine.services')
 
@@ -136,7 +136,7 @@ class WorkoutPlanService:
                 "response_format": {"type": "json_object"}
             }
             
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+            response = get_transport('openai', timeout=settings.OPENAI_REQUEST_TIMEOUT).post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
             response.raise_for_status()
             
             data = response.json()
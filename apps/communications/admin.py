@@ -3,6 +3,7 @@ Communications Admin - WhatsAppMessage with import/export.
 """
 
 from django.contrib import admin
+from django.utils import timezone
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
@@ -108,3 +109,62 @@ class WhatsAppMessageLogAdmin(admin.ModelAdmin):
     search_fields = ('phone', 'message', 'gym__name')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'created_at'
+
+from apps.communications.models import Broadcast
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'audience', 'status', 'total_recipients', 'sent_count', 'failed_count', 'created_at')
+    list_filter = ('status', 'audience', 'gym')
+    search_fields = ('gym__name', 'message')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at', 'sent_count', 'failed_count')
+    date_hierarchy = 'created_at'
+
+from apps.communications.models import OutboundMessage
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('recipient_phone', 'gym', 'kind', 'priority', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'priority', 'kind', 'gym')
+    search_fields = ('recipient_phone', 'idempotency_key', 'gym__name')
+    readonly_fields = ('created_at', 'updated_at', 'claim_token', 'locked_until', 'sent_at')
+    raw_id_fields = ('member', 'broadcast_recipient')
+    date_hierarchy = 'created_at'
+
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status=OutboundMessage.Status.DEAD).update(
+            status=OutboundMessage.Status.QUEUED, attempts=0, next_attempt_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f'{updated} dead-lettered messages requeued.')
+    requeue.short_description = "Requeue dead-lettered messages"
+
+from apps.communications.models import WhatsAppStatusEvent
+
+@admin.register(WhatsAppStatusEvent)
+class WhatsAppStatusEventAdmin(admin.ModelAdmin):
+    list_display = ('wa_message_id', 'status', 'occurred_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('wa_message_id',)
+    readonly_fields = ('created_at', 'updated_at')
+
+from apps.communications.models import WhatsAppUsageDaily
+
+@admin.register(WhatsAppUsageDaily)
+class WhatsAppUsageDailyAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'date', 'message_type', 'sent', 'failed', 'cost_inr')
+    list_filter = ('message_type', 'gym')
+    search_fields = ('gym__name',)
+    readonly_fields = ('created_at', 'updated_at')
+    date_hierarchy = 'date'
+
+from apps.communications.models import WhatsAppLogArchive
+
+@admin.register(WhatsAppLogArchive)
+class WhatsAppLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'month', 'row_count', 'file', 'created_at')
+    list_filter = ('gym',)
+    search_fields = ('gym__name', 'file')
+    readonly_fields = ('created_at', 'updated_at', 'first_created_at', 'last_created_at', 'row_count')
+    date_hierarchy = 'month'
@@ -0,0 +1,142 @@
+"""
+Communications Archive - retention for WhatsAppMessageLog. Calendar months
+that ended more than WHATSAPP_LOG_RETENTION_DAYS ago are streamed to gzip
+JSONL files in the default storage
+(MEDIA_ROOT/whatsapp_archives/<gym>/<YYYY-MM>.jsonl.gz), one per gym and
+month, recorded as WhatsAppLogArchive and deleted from the table. A month is
+only archived once it is entirely past the window, so logs are kept for up
+to a month longer than the retention period.
+
+Volume and spend survive in the WhatsAppUsageDaily rollup, which is never
+archived (so do not rebuild archived days with rebuild_whatsapp_usage).
+"""
+
+import gzip
+import json
+import logging
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.core.pagination import keyset_paginate
+
+from .models import WhatsAppLogArchive, WhatsAppMessageLog
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'gym_id', 'member_id', 'phone', 'message', 'status', 'response',
+    'automation_type', 'idempotency_key', 'wa_message_id', 'created_at', 'updated_at',
+)
+DELETE_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class WhatsAppLogArchiveService:
+    """Moves expired message logs to compressed cold storage."""
+
+    @staticmethod
+    def cutoff(retention_days=None):
+        """
+        Start of the oldest month still kept in the database: the month
+        holding the last day within the retention window.
+        """
+        if retention_days is None:
+            retention_days = getattr(settings, 'WHATSAPP_LOG_RETENTION_DAYS', 180)
+        day = timezone.localdate() - timedelta(days=retention_days)
+        return timezone.make_aware(datetime.combine(day.replace(day=1), time.min))
+
+    @staticmethod
+    def pending(cutoff, gyms=None):
+        """(gym_id, month, rows) for every gym-month holding logs older than `cutoff`."""
+        logs = WhatsAppMessageLog.objects.filter(created_at__lt=cutoff)
+        if gyms is not None:
+            logs = logs.filter(gym__in=gyms)
+        return [
+            (row['gym_id'], timezone.localdate(row['month']), row['rows'])
+            for row in logs.annotate(month=TruncMonth('created_at')).order_by().values(
+                'gym_id', 'month',
+            ).annotate(rows=Count('id')).order_by('gym_id', 'month')
+        ]
+
+    @staticmethod
+    def archive(retention_days=None, gyms=None, chunk_size=None):
+        """Archive every gym-month past the retention window. Returns the new archives."""
+        cutoff = WhatsAppLogArchiveService.cutoff(retention_days)
+        archives = []
+        for gym_id, month, _ in WhatsAppLogArchiveService.pending(cutoff, gyms):
+            archive = WhatsAppLogArchiveService.archive_month(gym_id, month, chunk_size)
+            if archive:
+                archives.append(archive)
+        return archives
+
+    @staticmethod
+    def archive_month(gym_id, month, chunk_size=None):
+        """
+        Stream one gym's logs for the whole of `month` into a gzip JSONL
+        file, walking the (gym, created_at, id) index `chunk_size` rows at a
+        time, then record the archive and delete the rows in one transaction.
+        Returns the WhatsAppLogArchive, or None if there was nothing to move.
+        """
+        chunk_size = chunk_size or getattr(settings, 'WHATSAPP_LOG_ARCHIVE_CHUNK_SIZE', 2000)
+        start = timezone.make_aware(datetime.combine(month, time.min))
+        end = timezone.make_aware(datetime.combine(_next_month(month), time.min))
+        logs = WhatsAppMessageLog.objects.filter(
+            gym_id=gym_id, created_at__gte=start, created_at__lt=end,
+        ).values(*ARCHIVE_FIELDS)
+
+        ids, first, last = [], None, None
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode='wb') as gz:
+                cursor = None
+                while True:
+                    page = keyset_paginate(logs, ('created_at', 'id'), chunk_size, after=cursor)
+                    for row in page:
+                        gz.write(json.dumps(row, default=_json_default).encode() + b'\n')
+                        ids.append(row['id'])
+                    if page.items:
+                        first = first or page.items[0]['created_at']
+                        last = page.items[-1]['created_at']
+                    if not page.has_next:
+                        break
+                    cursor = page.next_cursor
+            if not ids:
+                return None
+
+            tmp.seek(0)
+            archive = WhatsAppLogArchive(
+                gym_id=gym_id, month=month, row_count=len(ids),
+                first_created_at=first, last_created_at=last,
+            )
+            archive.file.save(f"{gym_id}/{month:%Y-%m}.jsonl.gz", File(tmp), save=False)
+
+        try:
+            with transaction.atomic():
+                archive.save()
+                for i in range(0, len(ids), DELETE_BATCH_SIZE):
+                    WhatsAppMessageLog.objects.filter(id__in=ids[i:i + DELETE_BATCH_SIZE]).delete()
+        except Exception:
+            archive.file.delete(save=False)
+            raise
+        logger.info(f"Archived {len(ids)} WhatsApp logs of gym {gym_id} for {month:%Y-%m} to {archive.file.name}")
+        return archive
+
+    @staticmethod
+    def iter_rows(archive):
+        """Yield the archived log rows of `archive` as dicts."""
+        with archive.file.open('rb') as f, gzip.GzipFile(fileobj=f) as gz:
+            for line in gz:
+                yield json.loads(line)
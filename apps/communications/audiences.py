@@ -0,0 +1,184 @@
+"""
+Communications Audiences - set-based member targeting shared by automations
+and broadcasts. Rules compile to Q objects over indexed Member columns
+(membership_expiry, last_check_in, birthday_md) so a gym's audiences resolve
+in a single query.
+"""
+
+import calendar
+import uuid
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+
+from apps.members.models import Member
+
+from .models import Broadcast, WhatsAppAutomation
+
+# Check-in recency buckets: (min, max) whole days since the last check-in.
+# A max of None is open-ended and also matches members who never checked in.
+CHECKIN_BUCKETS = {
+    'recent': (0, 7),
+    'lapsing': (8, 14),
+    'inactive': (15, 30),
+    'dormant': (31, None),
+}
+CHECKIN_BUCKET_CHOICES = [
+    ('recent', 'Within the last 7 days'),
+    ('lapsing', '8-14 days ago'),
+    ('inactive', '15-30 days ago'),
+    ('dormant', 'Over 30 days ago or never'),
+]
+# Audience filter keys holding a primary key, with the name used in errors
+ID_FILTERS = {'plan_id': 'plan', 'member_id': 'member'}
+
+
+class AudienceError(ValueError):
+    """A broadcast audience filter holds a value the query cannot use."""
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class AudienceService:
+    """Compiles targeting rules into indexed queries and resolves them per gym."""
+
+    @staticmethod
+    def birthday_q(today):
+        """Birthdays on `today`; 29 Feb birthdays are celebrated on 28 Feb in common years."""
+        keys = [Member.birthday_key(today)]
+        if today.month == 2 and today.day == 28 and not calendar.isleap(today.year):
+            keys.append(229)
+        return Q(birthday_md__in=keys)
+
+    @staticmethod
+    def checkin_q(today, min_days, max_days=None):
+        """Last check-in between `min_days` and `max_days` local days ago (inclusive)."""
+        q = Q(last_check_in__lt=_day_start(today - timedelta(days=min_days - 1)))
+        if max_days is None:
+            return q | Q(last_check_in__isnull=True)
+        return q & Q(last_check_in__gte=_day_start(today - timedelta(days=max_days)))
+
+    @staticmethod
+    def checkin_bucket_q(bucket, today):
+        if bucket not in CHECKIN_BUCKETS:
+            raise ValueError(f"Unknown check-in bucket: {bucket}")
+        return AudienceService.checkin_q(today, *CHECKIN_BUCKETS[bucket])
+
+    @staticmethod
+    def automation_q(auto_type, days_before, today):
+        """The members an automation targets on `today`."""
+        days = days_before or 0
+        active = Q(status=Member.Status.ACTIVE)
+        AutomationType = WhatsAppAutomation.AutomationType
+
+        if auto_type == AutomationType.EXPIRY_REMINDER:
+            # Membership expires in exactly X days
+            return active & Q(membership_expiry=today + timedelta(days=days))
+        elif auto_type == AutomationType.PAYMENT_PENDING:
+            # Membership expired exactly X days ago
+            return Q(membership_expiry=today - timedelta(days=days))
+        elif auto_type == AutomationType.INACTIVE_REMINDER:
+            # Last check-in exactly X days ago
+            return active & AudienceService.checkin_q(today, days, days)
+        elif auto_type == AutomationType.BIRTHDAY:
+            return active & AudienceService.birthday_q(today)
+        return None
+
+    @staticmethod
+    def clean_filter(audience_filter):
+        """
+        A copy of `audience_filter` with its ID_FILTERS values normalized to
+        UUID strings. Raises AudienceError for a malformed id, which would
+        otherwise only fail once the audience query runs.
+        """
+        cleaned = dict(audience_filter or {})
+        for key, label in ID_FILTERS.items():
+            if cleaned.get(key):
+                try:
+                    cleaned[key] = str(uuid.UUID(str(cleaned[key])))
+                except ValueError:
+                    raise AudienceError(f"Please select a valid {label}.")
+        return cleaned
+
+    @staticmethod
+    def segment_q(audience, audience_filter, today=None):
+        """
+        The members a broadcast audience targets, or None when the audience
+        is not member-based (leads) or is missing its filter value.
+        """
+        today = today or timezone.localdate()
+        Audience = Broadcast.Audience
+
+        if audience == Audience.ACTIVE_MEMBERS:
+            return Q(status=Member.Status.ACTIVE)
+        elif audience == Audience.EXPIRED_MEMBERS:
+            return Q(status=Member.Status.EXPIRED)
+        elif audience == Audience.EXPIRING_SOON:
+            return Q(status=Member.Status.ACTIVE, membership_expiry__range=(today, today + timedelta(days=7)))
+        elif audience == Audience.BIRTHDAY_TODAY:
+            return Q(status=Member.Status.ACTIVE) & AudienceService.birthday_q(today)
+        elif audience == Audience.CHECKIN_BUCKET and audience_filter.get('bucket') in CHECKIN_BUCKETS:
+            return Q(status=Member.Status.ACTIVE) & AudienceService.checkin_bucket_q(audience_filter['bucket'], today)
+        elif audience == Audience.GOAL_GROUP and audience_filter.get('goal'):
+            return Q(goal=audience_filter['goal'])
+        elif audience == Audience.SPECIFIC_PLAN and audience_filter.get('plan_id'):
+            return Q(membership_plan_id=audience_filter['plan_id'])
+        elif audience == Audience.SPECIFIC_MEMBER and audience_filter.get('member_id'):
+            return Q(id=audience_filter['member_id'])
+        return None
+
+    @staticmethod
+    def _matching(gym, rules):
+        """
+        One queryset over the gym's members matching any rule, annotated with
+        a boolean `_rule_<n>` per rule. Returns (queryset, keys) or (None, keys).
+        """
+        rules = {key: q for key, q in rules.items() if q is not None}
+        keys = list(rules)
+        if not keys:
+            return None, keys
+
+        members = Member.objects.filter(gym=gym, is_deleted=False).filter(reduce(or_, rules.values()))
+        if len(keys) > 1:
+            members = members.annotate(**{
+                f'_rule_{n}': ExpressionWrapper(rules[key], output_field=BooleanField())
+                for n, key in enumerate(keys)
+            })
+        return members.order_by(), keys
+
+    @staticmethod
+    def resolve_members(gym, rules, select_related=()):
+        """
+        Resolve {key: Q} rules for `gym` in one query. Returns {key: [Member]};
+        a member matching several rules is the same instance in each list.
+        """
+        resolved = {key: [] for key in rules}
+        members, keys = AudienceService._matching(gym, rules)
+        if members is None:
+            return resolved
+
+        for member in members.select_related(*select_related):
+            for n, key in enumerate(keys):
+                if len(keys) == 1 or getattr(member, f'_rule_{n}'):
+                    resolved[key].append(member)
+        return resolved
+
+    @staticmethod
+    def resolve_ids(gym, rules, chunk_size=2000):
+        """Like resolve_members but streams ids only: returns {key: [id]}."""
+        resolved = {key: [] for key in rules}
+        members, keys = AudienceService._matching(gym, rules)
+        if members is None:
+            return resolved
+
+        flags = [f'_rule_{n}' for n in range(len(keys))] if len(keys) > 1 else []
+        for row in members.values_list('id', *flags).iterator(chunk_size=chunk_size):
+            for n, key in enumerate(keys):
+                if not flags or row[n + 1]:
+                    resolved[key].append(row[0])
+        return resolved
@@ -0,0 +1,206 @@
+"""
+Communications Delivery - Meta delivery-status callbacks. The webhook only
+stages events (one INSERT per request) so it can acknowledge immediately;
+DeliveryStatusService applies them in batches with one CASE UPDATE per
+batch and message table: WhatsAppMessage (template sends) and
+WhatsAppMessageLog (broadcasts, automations and other text sends), both of
+which keep Meta's message id.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, F, TextField, Value, When
+from django.utils import timezone
+
+from apps.core.background import run_in_background
+
+from .models import WhatsAppMessage, WhatsAppMessageLog, WhatsAppStatusEvent
+
+logger = logging.getLogger(__name__)
+
+DeliveryStatus = WhatsAppMessage.DeliveryStatus
+
+# Message tables receipts apply to, with the field a failure reason goes in
+TRACKED_MODELS = (
+    (WhatsAppMessage, 'error_message'),
+    (WhatsAppMessageLog, 'response'),
+)
+
+# Statuses only move forward; a late 'delivered' never overwrites 'read'.
+# 'failed' outranks everything but 'read'.
+STATUS_RANK = {
+    DeliveryStatus.PENDING: 0,
+    DeliveryStatus.SENT: 1,
+    DeliveryStatus.DELIVERED: 2,
+    DeliveryStatus.READ: 3,
+    DeliveryStatus.FAILED: 3,
+}
+
+
+def _upgradable_from(status):
+    """Current statuses that `status` may replace."""
+    return [s for s, rank in STATUS_RANK.items() if rank < STATUS_RANK[status]]
+
+
+def _error_text(errors):
+    return "; ".join(
+        f"{e.get('code', '')} {e.get('title') or e.get('message', '')}".strip()
+        for e in errors or []
+    )
+
+
+def _objects(parent, key):
+    """The dicts in `parent[key]`; anything malformed along the way yields nothing."""
+    items = parent.get(key) if isinstance(parent, dict) else None
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+
+
+def parse_statuses(payload):
+    """
+    WhatsAppStatusEvent rows (unsaved) for every status in a Meta webhook
+    payload (a dict). Message notifications, unknown statuses and malformed
+    entries are ignored.
+    """
+    events = []
+    for entry in _objects(payload, 'entry'):
+        for change in _objects(entry, 'changes'):
+            for status in _objects(change.get('value'), 'statuses'):
+                wa_id, state = status.get('id'), status.get('status')
+                if not wa_id or state not in STATUS_RANK:
+                    continue
+                timestamp = status.get('timestamp')
+                events.append(WhatsAppStatusEvent(
+                    wa_message_id=wa_id,
+                    status=state,
+                    error=_error_text(status.get('errors')),
+                    occurred_at=(
+                        datetime.fromtimestamp(int(timestamp), tz=dt_timezone.utc)
+                        if str(timestamp or '').isdigit() else None
+                    ),
+                ))
+    return events
+
+
+def build_status_payload(statuses, phone_number_id='000000000000000'):
+    """
+    A Meta-shaped webhook payload for local testing and simulation.
+    `statuses` is an iterable of (wa_message_id, status) or
+    (wa_message_id, status, error_title) tuples.
+    """
+    now = int(time.time())
+    items = []
+    for wa_id, state, *error in statuses:
+        item = {
+            "id": wa_id,
+            "status": state,
+            "timestamp": str(now),
+            "recipient_id": "910000000000",
+        }
+        if error:
+            item["errors"] = [{"code": 131026, "title": error[0]}]
+        items.append(item)
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "0",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "metadata": {"phone_number_id": phone_number_id},
+                    "statuses": items,
+                },
+            }],
+        }],
+    }
+
+
+class DeliveryStatusService:
+    """Stages webhook status events and applies them to message logs in bulk."""
+
+    @staticmethod
+    def record(payload):
+        """Stage the payload's status events with one insert. Returns the count."""
+        events = parse_statuses(payload)
+        if events:
+            WhatsAppStatusEvent.objects.bulk_create(events)
+            DeliveryStatusService.kick()
+        return len(events)
+
+    @staticmethod
+    def kick():
+        """Apply staged events in the background after the current transaction commits."""
+        from apps.communications.tasks import apply_whatsapp_statuses
+        transaction.on_commit(lambda: run_in_background(apply_whatsapp_statuses))
+
+    @staticmethod
+    def collapse(events):
+        """
+        Fold events into {wa_message_id: (status, error)}, keeping each
+        message's furthest status (the latest one on ties).
+        """
+        latest = {}
+        for event in sorted(events, key=lambda e: (e.occurred_at or e.created_at, e.created_at)):
+            current = latest.get(event.wa_message_id)
+            if current is None or STATUS_RANK[event.status] >= STATUS_RANK[current[0]]:
+                latest[event.wa_message_id] = (event.status, event.error)
+        return latest
+
+    @staticmethod
+    def apply(updates):
+        """
+        Apply {wa_message_id: (status, error)} with one UPDATE per message
+        table: status and the error field are CASE expressions keyed on
+        wa_message_id, and each branch only fires when it moves the message
+        forward. Returns the number of rows written.
+        """
+        if not updates:
+            return 0
+        status_whens, error_whens = [], []
+        for wa_id, (status, error) in updates.items():
+            upgradable = _upgradable_from(status)
+            status_whens.append(When(wa_message_id=wa_id, status__in=upgradable, then=Value(status)))
+            if status == DeliveryStatus.FAILED:
+                error_whens.append(When(wa_message_id=wa_id, status__in=upgradable, then=Value(error)))
+
+        updated = 0
+        now = timezone.now()
+        for model, error_field in TRACKED_MODELS:
+            fields = {
+                'status': Case(*status_whens, default=F('status'), output_field=CharField()),
+                'updated_at': now,
+            }
+            if error_whens:
+                fields[error_field] = Case(*error_whens, default=F(error_field), output_field=TextField())
+            updated += model.objects.filter(
+                wa_message_id__in=list(updates),
+            ).exclude(
+                status__in=[DeliveryStatus.READ, DeliveryStatus.FAILED],
+            ).update(**fields)
+        return updated
+
+    @staticmethod
+    def apply_pending(batch_size=None):
+        """
+        Apply staged events oldest first, `batch_size` at a time, deleting
+        each batch in the same transaction. Returns a Counter of 'events'
+        read and message rows 'updated'.
+        """
+        batch_size = batch_size or getattr(settings, 'WHATSAPP_STATUS_BATCH_SIZE', 500)
+        totals = Counter()
+        while True:
+            with transaction.atomic():
+                events = list(WhatsAppStatusEvent.objects.order_by('created_at')[:batch_size])
+                if not events:
+                    break
+                totals['updated'] += DeliveryStatusService.apply(DeliveryStatusService.collapse(events))
+                WhatsAppStatusEvent.objects.filter(id__in=[event.id for event in events]).delete()
+            totals['events'] += len(events)
+        if totals:
+            logger.info(f"Applied {totals['events']} WhatsApp status events ({totals['updated']} messages updated)")
+        return totals
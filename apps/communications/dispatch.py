@@ -0,0 +1,77 @@
+"""
+Communications Dispatch - bounded concurrent fan-out for bulk sends.
+"""
+
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .throttling import TokenBucket
+
+
+class LaneDispatcher:
+    """
+    Runs send callables on a shared thread pool. Work is grouped into lanes
+    (typically one per gym); each lane is drained by at most `per_lane`
+    workers so one large gym cannot starve the others, and every send first
+    takes a token from a global TokenBucket.
+
+    `handler(item)` runs on a pool thread and returns an outcome label
+    (e.g. 'sent', 'failed', 'skipped'); `totals` counts them once the
+    dispatcher has been closed. With a single worker lanes run serially on
+    the calling thread (and its database connection) as they are added.
+    """
+
+    def __init__(self, workers, per_lane=1, rate=0):
+        self.per_lane = max(per_lane, 1)
+        self.bucket = TokenBucket(rate)
+        self.totals = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add_lane(self, items, handler):
+        """Queue `items` as one lane, processed by `handler`."""
+        queue = deque(items)
+        if self._executor is None:
+            self.totals.update(self._run(queue, handler))
+            return
+        for _ in range(min(self.per_lane, len(queue))):
+            self._futures.append(self._executor.submit(self._drain, queue, handler))
+
+    def _run(self, queue, handler):
+        outcomes = Counter()
+        while True:
+            try:
+                item = queue.popleft()
+            except IndexError:
+                break
+            self.bucket.acquire()
+            outcomes[handler(item)] += 1
+        return outcomes
+
+    def _drain(self, queue, handler):
+        try:
+            return self._run(queue, handler)
+        finally:
+            # Pool threads open their own connections for the send logs
+            connection.close()
+
+    def running(self):
+        """Whether any pool worker is still draining a lane."""
+        return any(not future.done() for future in self._futures)
+
+    def close(self):
+        """Wait for every lane and collect the outcome totals."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        for future in self._futures:
+            self.totals.update(future.result())
+        self._futures = []
+        return self.totals
@@ -0,0 +1,111 @@
+"""
+Communications Log Writer - buffered, batched persistence for send logs.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .usage import WhatsAppUsageService
+
+logger = logging.getLogger(__name__)
+
+# Writers currently holding unflushed rows
+_open_writers = set()
+
+
+@atexit.register
+def _flush_open_writers():
+    """Last-chance flush for writers that were never closed (e.g. a worker exiting)."""
+    for writer in list(_open_writers):
+        try:
+            writer.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered message logs at exit: {e}")
+
+
+class BufferedLogWriter:
+    """
+    Accumulates message log rows shared between sender threads and writes
+    them with one bulk_create (new rows) / bulk_update (rows saved earlier,
+    e.g. claimed idempotency keys) per model whenever `max_batch` rows are
+    buffered or the oldest row is `max_delay_ms` old.
+
+    Each flush also folds the written rows into the daily usage rollup.
+
+    Use as a context manager, or call close(): both flush whatever is left.
+    Rows still buffered at interpreter shutdown are flushed by an atexit hook.
+    """
+
+    def __init__(self, max_batch=None, max_delay_ms=None):
+        self.max_batch = max(int(max_batch or getattr(settings, 'WHATSAPP_LOG_BATCH_SIZE', 100)), 1)
+        if max_delay_ms is None:
+            max_delay_ms = getattr(settings, 'WHATSAPP_LOG_FLUSH_MS', 1000)
+        self.max_delay = max_delay_ms / 1000
+        self._creates = defaultdict(list)
+        self._updates = defaultdict(list)
+        self._pending = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self._pending
+
+    def add(self, obj, update_fields=None):
+        """
+        Buffer `obj` for writing. Unsaved instances are inserted; instances
+        already in the database are updated on `update_fields`.
+        """
+        with self._lock:
+            if obj._state.adding:
+                self._creates[type(obj)].append(obj)
+            else:
+                obj.updated_at = timezone.now()
+                fields = tuple(sorted(set(update_fields or ()) | {'updated_at'}))
+                self._updates[(type(obj), fields)].append(obj)
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                _open_writers.add(self)
+            due = (
+                self._pending >= self.max_batch
+                or time.monotonic() - self._oldest >= self.max_delay
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows written."""
+        with self._lock:
+            creates, self._creates = self._creates, defaultdict(list)
+            updates, self._updates = self._updates, defaultdict(list)
+            written, self._pending, self._oldest = self._pending, 0, None
+            _open_writers.discard(self)
+        if not written:
+            return 0
+
+        for model, objs in creates.items():
+            model.objects.bulk_create(objs, batch_size=self.max_batch)
+        for (model, fields), objs in updates.items():
+            model.objects.bulk_update(objs, list(fields), batch_size=self.max_batch)
+        # A row updated twice since the last flush (e.g. an error, then its
+        # dead-letter) sits in two update groups but is one send
+        written_rows = {id(obj): obj for objs in (*creates.values(), *updates.values()) for obj in objs}
+        WhatsAppUsageService.record(written_rows.values())
+        logger.debug(f"Flushed {written} buffered message logs")
+        return written
+
+    def close(self):
+        """Flush whatever is still buffered."""
+        return self.flush()
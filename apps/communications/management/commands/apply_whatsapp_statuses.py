@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communications.delivery import DeliveryStatusService
+
+
+class Command(BaseCommand):
+    help = 'Applies staged WhatsApp delivery-status webhook events to the message logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.WHATSAPP_STATUS_BATCH_SIZE,
+            help='Events applied per UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        totals = DeliveryStatusService.apply_pending(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {totals['events']} status events ({totals['updated']} messages updated)"
+        ))
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.communications.archive import WhatsAppLogArchiveService
+from apps.gyms.models import Gym
+
+
+class Command(BaseCommand):
+    help = 'Moves WhatsApp message logs past the retention window to gzip JSONL archives under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.WHATSAPP_LOG_RETENTION_DAYS,
+            help=f'Keep logs from the last N days. Default: {settings.WHATSAPP_LOG_RETENTION_DAYS}',
+        )
+        parser.add_argument(
+            '--gym',
+            help='Only archive a single gym (gym code).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+
+        gyms = None
+        if options['gym']:
+            gyms = Gym.objects.filter(gym_code=options['gym'].upper())
+            if not gyms.exists():
+                raise CommandError(f"No gym with code {options['gym']}.")
+
+        if options['dry_run']:
+            cutoff = WhatsAppLogArchiveService.cutoff(options['days'])
+            pending = WhatsAppLogArchiveService.pending(cutoff, gyms)
+            for gym_id, month, rows in pending:
+                self.stdout.write(f"  {gym_id} {month:%Y-%m}: {rows} logs")
+            self.stdout.write(self.style.SUCCESS(
+                f"Would archive {sum(rows for *_, rows in pending)} logs older than {cutoff:%Y-%m-%d}"
+            ))
+            return
+
+        archives = WhatsAppLogArchiveService.archive(retention_days=options['days'], gyms=gyms)
+        for archive in archives:
+            self.stdout.write(f"  {archive.file.name}: {archive.row_count} logs")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {sum(a.row_count for a in archives)} logs into {len(archives)} files"
+        ))
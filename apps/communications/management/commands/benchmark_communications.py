@@ -0,0 +1,173 @@
+"""
+Benchmarks the WhatsApp pipeline in simulation mode: seeds gyms and members,
+runs every bulk sender end to end (enqueue + queue drain) and reports
+messages/second, queries/message and peak memory per stage as JSON.
+
+Everything runs in one transaction that is rolled back, so the database is
+left untouched. Sends therefore drain on this thread (one worker): pool
+threads could not see the uncommitted seed data. Senders and drains are
+scoped to the seeded gyms, so existing gyms and messages already in the
+queue neither run nor skew the numbers.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from datetime import date, timedelta
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.models import Broadcast, Quote, WhatsAppAutomation
+from apps.communications.services import BroadcastService, OutboundQueueService
+from apps.gyms.models import Gym
+from apps.members.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the WhatsApp senders in simulation mode and prints JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gyms', type=int, default=5, help='Gyms to seed.')
+        parser.add_argument('--members', type=int, default=200, help='Members to seed per gym.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.WHATSAPP_QUEUE_BATCH_SIZE,
+            help='Outbound queue claim size while draining.',
+        )
+        parser.add_argument('--output', help='Also write the JSON results to this file.')
+
+    def handle(self, *args, **options):
+        if not settings.WHATSAPP_SIMULATION_MODE:
+            raise CommandError('Refusing to benchmark with WHATSAPP_SIMULATION_MODE off: it would send real messages.')
+        if options['gyms'] < 1 or options['members'] < 1:
+            raise CommandError('--gyms and --members must be at least 1.')
+
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            seed_seconds = self._seed(options['gyms'], options['members'])
+            codes = list(self.gyms.values_list('gym_code', flat=True))
+
+            def run(command):
+                return lambda: call_command(command, gym=codes, stdout=StringIO())
+
+            stages = {
+                'automations': self._measure(run('run_whatsapp_automations')),
+                'renewal_reminders': self._measure(run('send_renewal_reminders')),
+                'daily_quotes': self._measure(run('send_daily_quotes')),
+                'broadcasts': self._measure(self._broadcast),
+            }
+            transaction.set_rollback(True)
+
+        results = {
+            'benchmark': 'communications',
+            'timestamp': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'config': {
+                'gyms': options['gyms'],
+                'members_per_gym': options['members'],
+                'queue_batch_size': self.batch_size,
+                'seed_seconds': round(seed_seconds, 3),
+            },
+            'stages': stages,
+        }
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+
+    def _seed(self, gym_count, member_count):
+        """
+        Pro gyms with automations, a quote and members spread across every
+        audience; sets self.gyms to them.
+        """
+        started = time.perf_counter()
+        today = timezone.localdate()
+        plan, _ = SubscriptionPlan.objects.get_or_create(
+            slug='benchmark-pro',
+            defaults=dict(name='Benchmark Pro', price_monthly=0, price_yearly=0, has_whatsapp_integration=True),
+        )
+        Quote.objects.create(content='Benchmark quote')
+
+        gym_ids = []
+        for g in range(gym_count):
+            gym = Gym.objects.create(
+                name=f'Benchmark Gym {g}', email=f'benchmark{g}@example.com',
+                owner_name='Benchmark', subscription_plan=plan,
+            )
+            gym_ids.append(gym.id)
+            WhatsAppAutomation.objects.bulk_create([
+                WhatsAppAutomation(gym=gym, type=WhatsAppAutomation.AutomationType.EXPIRY_REMINDER,
+                                   enabled=True, days_before=3,
+                                   template='Hi {{name}}, {{plan_name}} ends on {{expiry_date}}'),
+                WhatsAppAutomation(gym=gym, type=WhatsAppAutomation.AutomationType.BIRTHDAY,
+                                   enabled=True, template='Happy birthday {{name}} from {{gym_name}}!'),
+                WhatsAppAutomation(gym=gym, type=WhatsAppAutomation.AutomationType.INACTIVE_REMINDER,
+                                   enabled=True, days_before=5,
+                                   template='We miss you at {{gym_name}}, {{name}}'),
+            ])
+
+            members = []
+            for i in range(member_count):
+                # Every tenth member falls in each automation's audience
+                expiry = today + timedelta(days=3 if i % 10 == 0 else 30 + i % 60)
+                dob = date(1990, today.month, today.day) if i % 10 == 1 and (today.month, today.day) != (2, 29) else None
+                phone = f'9{g:03d}{i:06d}'
+                members.append(Member(
+                    gym=gym, name=f'Member {g}-{i}', phone=phone, phone_suffix_key=Member.phone_key(phone),
+                    join_date=today - timedelta(days=90), membership_start=today - timedelta(days=30),
+                    membership_expiry=expiry, date_of_birth=dob,
+                    birthday_md=Member.birthday_key(dob) if dob else None,
+                    last_check_in=timezone.now() - timedelta(days=5 if i % 10 == 2 else 1),
+                ))
+            # bulk_create skips the welcome signal, so only the benchmarked senders queue messages
+            Member.objects.bulk_create(members, batch_size=1000)
+        self.gyms = Gym.objects.filter(id__in=gym_ids)
+        return time.perf_counter() - started
+
+    def _broadcast(self):
+        for gym in self.gyms:
+            broadcast = BroadcastService.create(gym, Broadcast.Audience.ACTIVE_MEMBERS, 'Hi {{name}}, new classes this week!')
+            if broadcast:
+                BroadcastService.run(broadcast.id)
+
+    def _measure(self, produce):
+        """Run `produce` and drain the queue it fills; returns the stage metrics."""
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                produce()
+                enqueued = time.perf_counter() - started
+                totals = OutboundQueueService.drain(batch_size=self.batch_size, workers=1, rate=0, gyms=self.gyms)
+                elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        messages = sum(totals.values())
+        return {
+            'messages': messages,
+            'sent': totals['sent'],
+            'failed': totals['retrying'] + totals['dead'],
+            'seconds': round(elapsed, 4),
+            'enqueue_seconds': round(enqueued, 4),
+            'messages_per_second': round(messages / elapsed, 1) if elapsed else None,
+            'queries': len(queries),
+            'queries_per_message': round(len(queries) / messages, 3) if messages else None,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communications.services import OutboundQueueService
+
+
+class Command(BaseCommand):
+    help = 'Sends due messages from the WhatsApp outbound queue, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.WHATSAPP_AUTOMATION_WORKERS,
+            help='Concurrent sends across all gyms (1 = serial).',
+        )
+        parser.add_argument(
+            '--per-gym',
+            type=int,
+            default=settings.WHATSAPP_AUTOMATION_WORKERS_PER_GYM,
+            help='Concurrent sends for any single gym.',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=settings.WHATSAPP_RATE_LIMIT_PER_SECOND,
+            help='Send rate limit per sender phone number in messages/second (0 = unlimited).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.WHATSAPP_QUEUE_BATCH_SIZE,
+            help='Messages claimed per batch.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain what is due now and exit instead of polling.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when the queue is empty.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = OutboundQueueService.drain(
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                per_lane=options['per_gym'],
+                rate=options['rate'],
+            )
+            if totals:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent: {totals['sent']}, Retrying: {totals['retrying']}, Dead-lettered: {totals['dead']}, "
+                    f"Reclaimed elsewhere: {totals['lost']}"
+                ))
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
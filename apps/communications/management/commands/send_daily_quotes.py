@@ -1,59 +1,104 @@
-from django.core.management.base import BaseCommand
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
 from django.utils import timezone
+
+from apps.gyms.models import Gym
 from apps.members.models import Member
 from apps.communications.models import Quote, WhatsAppMessage
-from apps.communications.services import WhatsAppService
-import random
+from apps.communications.services import OutboundQueueService, WhatsAppService
 
 class Command(BaseCommand):
-    help = 'Sends daily motivational quote to all active members'
+    help = 'Sends the daily motivational quote to active members of WhatsApp-enabled gyms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=1,
+            help='Split gyms into N shards so several processes can share the run.',
+        )
+        parser.add_argument(
+            '--shard',
+            type=int,
+            default=0,
+            help='Which shard (0..N-1) this process sends for.',
+        )
+        parser.add_argument(
+            '--gym',
+            action='append',
+            help='Only run for this gym (gym code); repeat for several.',
+        )
 
     def handle(self, *args, **options):
-        # 1. Get a random active quote that hasn't been sent recently
-        # For simplicity in this MVP, we just pick a random active one
-        quotes = Quote.objects.filter(is_active=True)
-        if not quotes.exists():
+        shards, shard = options['shards'], options['shard']
+        if shards < 1 or not 0 <= shard < shards:
+            raise CommandError('--shard must be between 0 and --shards - 1.')
+
+        today = timezone.localdate()
+        quote = self._pick_quote(today)
+        if not quote:
             self.stdout.write(self.style.WARNING("No active quotes found."))
             return
 
-        quote = random.choice(quotes)
-        
-        # 2. Get all active members
-        active_members = Member.objects.filter(status='active', is_deleted=False)
-        
-        if not active_members.exists():
-             self.stdout.write(self.style.WARNING("No active members found."))
-             return
+        # Only gyms whose plan includes WhatsApp, partitioned across shards
+        gyms = Gym.objects.filter(
+            is_active=True,
+            is_deleted=False,
+            subscription_plan__has_whatsapp_integration=True,
+        ).order_by('id')
+        if options['gym']:
+            gyms = gyms.filter(gym_code__in=[code.upper() for code in options['gym']])
+        gyms = [gym for gym in gyms if gym.id.int % shards == shard]
+
+        self.stdout.write(f"Queueing quote: '{quote.content}' for {len(gyms)} gyms (shard {shard + 1}/{shards}).")
 
+        # Targeting and dedupe run here, one insert per gym; the outbound
+        # queue worker sends them behind transactional messages.
         service = WhatsAppService()
-        count = 0
-        
-        self.stdout.write(f"Sending quote: '{quote.content}' to {active_members.count()} members.")
-
-        # 3. Send to each member
-        for member in active_members:
-            if not member.phone:
-                continue
-
-            # Avoid spamming: Check if we already sent a quote today to this member
-            already_sent = WhatsAppMessage.objects.filter(
-                member=member,
-                message_type=WhatsAppMessage.MessageType.PROMOTION,
-                created_at__date=timezone.now().date()
-            ).exists()
+        queued = 0
+        for gym in gyms:
+            members = self._plan_gym(gym, today)
+            if members:
+                queued += len(OutboundQueueService.enqueue(
+                    service.daily_quote_message(member, quote, today) for member in members
+                ))
 
-            if already_sent:
-                 continue
+        # Update last sent date for the quote
+        Quote.objects.filter(id=quote.id).update(last_sent=today)
 
-            response = service.send_daily_quote(member, quote)
-            if response and response.get('status') == 'success':
-                count += 1
-                self.stdout.write(self.style.SUCCESS(f'Sent quote to {member.name}'))
-            else:
-                self.stdout.write(self.style.ERROR(f'Failed to send to {member.name}'))
+        self.stdout.write(self.style.SUCCESS(f"Successfully queued {queued} daily quotes"))
 
-        # Update last sent date for the quote
-        quote.last_sent = timezone.now().date()
-        quote.save()
+    def _pick_quote(self, today):
+        """
+        Today's quote: the one already picked today (so every shard sends the
+        same quote), otherwise the least recently sent active quote.
+        """
+        quotes = Quote.objects.filter(is_active=True)
+        return (
+            quotes.filter(last_sent=today).first()
+            or quotes.order_by(F('last_sent').asc(nulls_first=True), 'created_at').first()
+        )
+
+    def _plan_gym(self, gym, today):
+        """Members of `gym` still due today's quote: two queries per gym."""
+        day_start = timezone.make_aware(datetime.combine(today, time.min))
+        # Avoid spamming: members who already got a promotion today
+        already_sent = set(
+            WhatsAppMessage.objects.filter(
+                gym=gym,
+                member__isnull=False,
+                message_type=WhatsAppMessage.MessageType.PROMOTION,
+                created_at__gte=day_start,
+                created_at__lt=day_start + timedelta(days=1),
+            ).values_list('member_id', flat=True)
+        )
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully sent {count} daily quotes'))
+        members = Member.objects.filter(
+            gym=gym,
+            status=Member.Status.ACTIVE,
+            is_deleted=False,
+            whatsapp_opt_out=False,
+        ).exclude(phone='').select_related('gym')
+        return [member for member in members if member.phone and member.id not in already_sent]
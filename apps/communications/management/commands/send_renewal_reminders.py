@@ -6,6 +6,13 @@ from apps.communications.services import WhatsAppService
 class Command(BaseCommand):
     help = 'Sends WhatsApp reminders to members expiring in 3 days'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gym',
+            action='append',
+            help='Only run for this gym (gym code); repeat for several.',
+        )
+
     def handle(self, *args, **options):
         # Calculate target date: Today + 3 days
         today = timezone.now().date()
@@ -16,6 +23,8 @@ class Command(BaseCommand):
             status='active',
             is_deleted=False
         )
+        if options['gym']:
+            expiring_members = expiring_members.filter(gym__gym_code__in=[code.upper() for code in options['gym']])
 
         if not expiring_members.exists():
             self.stdout.write(self.style.WARNING(f'No memberships expiring on {target_date}'))
@@ -31,10 +40,10 @@ class Command(BaseCommand):
                 continue
                 
             response = service.send_renewal_reminder(member)
-            if response and response.get('status') == 'success':
+            if response and response.get('status') == 'queued':
                 count += 1
-                self.stdout.write(self.style.SUCCESS(f'Sent reminder to {member.name} ({member.phone})'))
+                self.stdout.write(self.style.SUCCESS(f'Queued reminder for {member.name} ({member.phone})'))
             else:
-                self.stdout.write(self.style.ERROR(f'Failed to send to {member.name}'))
+                self.stdout.write(self.style.WARNING(f'Already queued for {member.name}'))
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully sent {count} renewal reminders'))
+        self.stdout.write(self.style.SUCCESS(f'Successfully queued {count} renewal reminders'))
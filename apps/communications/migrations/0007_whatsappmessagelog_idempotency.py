@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0006_whatsappautomation_whatsappmessagelog'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0003_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whatsappmessagelog',
+            name='automation_type',
+            field=models.CharField(blank=True, choices=[('expiry_reminder', 'Membership Expiry Reminder'), ('payment_pending', 'Payment Pending'), ('inactive_reminder', 'Inactive Member Reminder'), ('birthday', 'Birthday Wish')], help_text='Set for messages sent by an automation; empty for manual sends', max_length=50, null=True, verbose_name='Automation Type'),
+        ),
+        migrations.AddField(
+            model_name='whatsappmessagelog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Claimed before sending so re-runs never send the same message twice', max_length=100, null=True, unique=True, verbose_name='Idempotency Key'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessagelog',
+            index=models.Index(fields=['gym', 'created_at'], name='idx_walog_gym_created'),
+        ),
+    ]
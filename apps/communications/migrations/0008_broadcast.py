@@ -0,0 +1,81 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0007_whatsappmessagelog_idempotency'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0003_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('audience', models.CharField(choices=[('active_members', 'Active Members'), ('expired_members', 'Expired Members'), ('goal_group', 'Fitness Goal Group'), ('specific_plan', 'Specific Plan'), ('leads_only', 'Leads'), ('specific_member', 'Specific Member')], max_length=30, verbose_name='Audience')),
+                ('audience_filter', models.JSONField(blank=True, default=dict, help_text="e.g. {'goal': 'fat_loss'} or {'plan_id': '...'}", verbose_name='Audience Filter')),
+                ('message', models.TextField(help_text='Supports {{name}}', verbose_name='Message')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Sending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('total_recipients', models.IntegerField(default=0, verbose_name='Recipients')),
+                ('sent_count', models.IntegerField(default=0, verbose_name='Sent')),
+                ('failed_count', models.IntegerField(default=0, verbose_name='Failed')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Failure Reason')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='whatsapp_broadcasts', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_broadcasts', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Broadcast',
+                'verbose_name_plural': 'WhatsApp Broadcasts',
+                'db_table': 'communications_broadcast',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastRecipient',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('phone', models.CharField(max_length=20, verbose_name='Phone Number')),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='communications.broadcast', verbose_name='Broadcast')),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcast_receipts', to='members.member', verbose_name='Member')),
+            ],
+            options={
+                'verbose_name': 'Broadcast Recipient',
+                'verbose_name_plural': 'Broadcast Recipients',
+                'db_table': 'communications_broadcastrecipient',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['gym', 'status'], name='idx_broadcast_gym_status'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastrecipient',
+            index=models.Index(fields=['broadcast', 'status'], name='idx_bcast_rcpt_status'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='broadcastrecipient',
+            unique_together={('broadcast', 'phone')},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0008_broadcast'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='broadcast',
+            name='audience',
+            field=models.CharField(choices=[('active_members', 'Active Members'), ('expired_members', 'Expired Members'), ('expiring_soon', 'Expiring in 7 Days'), ('birthday_today', 'Birthday Today'), ('checkin_bucket', 'Check-in Recency'), ('goal_group', 'Fitness Goal Group'), ('specific_plan', 'Specific Plan'), ('leads_only', 'Leads'), ('specific_member', 'Specific Member')], max_length=30, verbose_name='Audience'),
+        ),
+        migrations.AlterField(
+            model_name='broadcast',
+            name='audience_filter',
+            field=models.JSONField(blank=True, default=dict, help_text="e.g. {'goal': 'fat_loss'}, {'plan_id': '...'} or {'bucket': 'lapsing'}", verbose_name='Audience Filter'),
+        ),
+        migrations.AlterField(
+            model_name='broadcast',
+            name='message',
+            field=models.TextField(help_text='Supports variables like {{name}}, {{plan_name}}, {{days_left}}', verbose_name='Message'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:17
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0009_broadcast_segments'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0005_member_whatsapp_opt_out'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='broadcastrecipient',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status'),
+        ),
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('kind', models.CharField(choices=[('template', 'Template Message'), ('text', 'Text Message')], max_length=10, verbose_name='Kind')),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'OTP'), (10, 'Transactional'), (20, 'Promotional')], default=10, help_text='Lower values are sent first', verbose_name='Priority')),
+                ('phone_number_id', models.CharField(blank=True, default='', max_length=50, verbose_name='Sender Phone Number ID')),
+                ('recipient_phone', models.CharField(max_length=20, verbose_name='Recipient Phone')),
+                ('payload', models.JSONField(default=dict, help_text='Template: template_name, language_code, components, message_type. Text: message, automation_type.', verbose_name='Payload')),
+                ('idempotency_key', models.CharField(blank=True, max_length=150, null=True, unique=True, verbose_name='Idempotency Key')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('retrying', 'Retrying'), ('sent', 'Sent'), ('dead', 'Dead-lettered')], default='queued', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Max Attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt At')),
+                ('claim_token', models.UUIDField(blank=True, null=True, verbose_name='Claim Token')),
+                ('locked_until', models.DateTimeField(blank=True, help_text="A crashed worker's claim expires at this time", null=True, verbose_name='Locked Until')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Last Error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent At')),
+                ('broadcast_recipient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbound_messages', to='communications.broadcastrecipient', verbose_name='Broadcast Recipient')),
+                ('gym', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbound_messages', to='gyms.gym', verbose_name='Gym')),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbound_messages', to='members.member', verbose_name='Member')),
+            ],
+            options={
+                'verbose_name': 'Outbound Message',
+                'verbose_name_plural': 'Outbound Messages',
+                'db_table': 'communications_outboundmessage',
+                'ordering': ['priority', 'next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'priority', 'next_attempt_at'], name='idx_outbound_due'), models.Index(fields=['claim_token'], name='idx_outbound_claim'), models.Index(fields=['gym', 'status'], name='idx_outbound_gym_status')],
+            },
+        ),
+    ]
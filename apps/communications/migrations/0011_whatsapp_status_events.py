@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:22
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0010_outbound_queue'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('leads', '0003_lead_converted_at_lead_last_contacted_date_and_more'),
+        ('members', '0005_member_whatsapp_opt_out'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppStatusEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('wa_message_id', models.CharField(max_length=100, verbose_name='WhatsApp Message ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed')], max_length=20, verbose_name='Delivery Status')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('occurred_at', models.DateTimeField(blank=True, help_text="Meta's timestamp for the status change", null=True, verbose_name='Occurred At')),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Status Event',
+                'verbose_name_plural': 'WhatsApp Status Events',
+                'db_table': 'communications_whatsappstatusevent',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessage',
+            index=models.Index(fields=['wa_message_id'], name='idx_wa_message_id'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappstatusevent',
+            index=models.Index(fields=['created_at'], name='idx_wa_status_event_created'),
+        ),
+    ]
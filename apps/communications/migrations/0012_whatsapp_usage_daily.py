@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:29
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0011_whatsapp_status_events'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppUsageDaily',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('message_type', models.CharField(help_text="WhatsAppMessage type, or the automation type of a WhatsAppMessageLog ('custom' for manual sends)", max_length=50, verbose_name='Message Type')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Sent')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Failed')),
+                ('cost_inr', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='Cost (₹)')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_usage', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Daily Usage',
+                'verbose_name_plural': 'WhatsApp Daily Usage',
+                'db_table': 'communications_whatsappusagedaily',
+                'ordering': ['-date'],
+                'unique_together': {('gym', 'date', 'message_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0012_whatsapp_usage_daily'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0005_member_whatsapp_opt_out'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppLogArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('month', models.DateField(help_text='First day of the month the archived logs were created in', verbose_name='Month')),
+                ('file', models.FileField(upload_to='whatsapp_archives/', verbose_name='Archive File')),
+                ('row_count', models.IntegerField(default=0, verbose_name='Rows')),
+                ('first_created_at', models.DateTimeField(blank=True, null=True, verbose_name='First Log At')),
+                ('last_created_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Log At')),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Log Archive',
+                'verbose_name_plural': 'WhatsApp Log Archives',
+                'db_table': 'communications_whatsapplogarchive',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='whatsappmessagelog',
+            name='idx_walog_gym_created',
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessagelog',
+            index=models.Index(fields=['gym', 'created_at', 'id'], name='idx_walog_gym_created_id'),
+        ),
+        migrations.AddField(
+            model_name='whatsapplogarchive',
+            name='gym',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_log_archives', to='gyms.gym', verbose_name='Gym'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsapplogarchive',
+            index=models.Index(fields=['gym', 'month'], name='idx_walog_archive_gym_month'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0013_whatsapp_log_keyset_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Claimed before sending so queue retries never send the same message twice', max_length=100, null=True, unique=True, verbose_name='Idempotency Key'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-17 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0014_whatsappmessage_idempotency'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0008_member_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whatsappmessagelog',
+            name='wa_message_id',
+            field=models.CharField(blank=True, help_text="Meta's message id, which delivery-status callbacks refer to", max_length=100, null=True, verbose_name='WhatsApp Message ID'),
+        ),
+        migrations.AlterField(
+            model_name='whatsappmessagelog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessagelog',
+            index=models.Index(fields=['wa_message_id'], name='idx_walog_message_id'),
+        ),
+    ]
@@ -4,6 +4,7 @@ India runs on WhatsApp. If you're not on WhatsApp, you don't exist.
 """
 
 from django.db import models
+from django.utils import timezone
 
 from apps.core.models import BaseModel, ActiveManager
 
@@ -83,6 +84,14 @@ class WhatsAppMessage(BaseModel):
         verbose_name="Template Name",
         help_text="WhatsApp approved template name",
     )
+    idempotency_key = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Idempotency Key",
+        help_text="Claimed before sending so queue retries never send the same message twice",
+    )
 
     # ── WhatsApp API Response ─────────────────────────────────
     wa_message_id = models.CharField(
@@ -132,12 +141,55 @@ class WhatsAppMessage(BaseModel):
             models.Index(fields=['gym', 'status'], name='idx_wa_gym_status'),
             models.Index(fields=['gym', 'created_at'], name='idx_wa_gym_date'),
             models.Index(fields=['recipient_phone'], name='idx_wa_phone'),
+            models.Index(fields=['wa_message_id'], name='idx_wa_message_id'),
         ]
 
     def __str__(self):
         return f"{self.get_message_type_display()} → {self.recipient_phone} ({self.get_status_display()})"
 
 
+class WhatsAppStatusEvent(BaseModel):
+    """
+    A delivery-status callback from Meta, staged by the webhook and applied
+    to WhatsAppMessage in batches (then deleted).
+    """
+    wa_message_id = models.CharField(
+        max_length=100,
+        verbose_name="WhatsApp Message ID",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=WhatsAppMessage.DeliveryStatus.choices,
+        verbose_name="Delivery Status",
+    )
+    error = models.TextField(
+        blank=True,
+        default='',
+        verbose_name="Error",
+    )
+    occurred_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Occurred At",
+        help_text="Meta's timestamp for the status change",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_whatsappstatusevent'
+        verbose_name = 'WhatsApp Status Event'
+        verbose_name_plural = 'WhatsApp Status Events'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='idx_wa_status_event_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.wa_message_id} → {self.status}"
+
+
 class Quote(BaseModel):
     """
     Daily motivational quotes for members.
@@ -261,6 +313,10 @@ class WhatsAppAutomation(BaseModel):
     def __str__(self):
         return f"{self.gym.name} - {self.get_type_display()}"
 
+    def idempotency_key(self, member_id, day):
+        """WhatsAppMessageLog key allowing one send per member per day for this automation."""
+        return f"auto:{self.type}:{member_id}:{day.isoformat()}"
+
 
 class WhatsAppMessageLog(BaseModel):
     """
@@ -292,6 +348,8 @@ class WhatsAppMessageLog(BaseModel):
     class DeliveryStatus(models.TextChoices):
         PENDING = 'pending', 'Pending'
         SENT = 'sent', 'Sent'
+        DELIVERED = 'delivered', 'Delivered'
+        READ = 'read', 'Read'
         FAILED = 'failed', 'Failed'
 
     status = models.CharField(
@@ -305,6 +363,29 @@ class WhatsAppMessageLog(BaseModel):
         blank=True,
         verbose_name="API Response",
     )
+    wa_message_id = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        verbose_name="WhatsApp Message ID",
+        help_text="Meta's message id, which delivery-status callbacks refer to",
+    )
+    automation_type = models.CharField(
+        max_length=50,
+        choices=WhatsAppAutomation.AutomationType.choices,
+        null=True,
+        blank=True,
+        verbose_name="Automation Type",
+        help_text="Set for messages sent by an automation; empty for manual sends",
+    )
+    idempotency_key = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Idempotency Key",
+        help_text="Claimed before sending so re-runs never send the same message twice",
+    )
 
     objects = models.Manager()
     active_objects = ActiveManager()
@@ -317,7 +398,386 @@ class WhatsAppMessageLog(BaseModel):
         indexes = [
             models.Index(fields=['gym', 'status']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of a gym's logs: (created_at, id) is the cursor
+            models.Index(fields=['gym', 'created_at', 'id'], name='idx_walog_gym_created_id'),
+            models.Index(fields=['wa_message_id'], name='idx_walog_message_id'),
         ]
 
     def __str__(self):
         return f"Log to {self.phone} ({self.status})"
+
+
+class WhatsAppLogArchive(BaseModel):
+    """
+    A gzip JSONL file of WhatsAppMessageLog rows moved out of the database:
+    one file per gym and calendar month past the retention window.
+    """
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='whatsapp_log_archives',
+        verbose_name="Gym",
+    )
+    month = models.DateField(
+        verbose_name="Month",
+        help_text="First day of the month the archived logs were created in",
+    )
+    file = models.FileField(
+        upload_to='whatsapp_archives/',
+        verbose_name="Archive File",
+    )
+    row_count = models.IntegerField(default=0, verbose_name="Rows")
+    first_created_at = models.DateTimeField(null=True, blank=True, verbose_name="First Log At")
+    last_created_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Log At")
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_whatsapplogarchive'
+        verbose_name = 'WhatsApp Log Archive'
+        verbose_name_plural = 'WhatsApp Log Archives'
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['gym', 'month'], name='idx_walog_archive_gym_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.gym_id} {self.month:%Y-%m} ({self.row_count} logs)"
+
+
+class WhatsAppUsageDaily(BaseModel):
+    """
+    Per-gym, per-day, per-message-type rollup of WhatsApp volume and spend.
+    Incremented by WhatsAppUsageService whenever a WhatsAppMessage or
+    WhatsAppMessageLog reaches sent/failed, so dashboards never scan the logs.
+    """
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='whatsapp_usage',
+        verbose_name="Gym",
+    )
+    date = models.DateField(verbose_name="Date")
+    message_type = models.CharField(
+        max_length=50,
+        verbose_name="Message Type",
+        help_text="WhatsAppMessage type, or the automation type of a WhatsAppMessageLog ('custom' for manual sends)",
+    )
+    sent = models.PositiveIntegerField(default=0, verbose_name="Sent")
+    failed = models.PositiveIntegerField(default=0, verbose_name="Failed")
+    cost_inr = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=0,
+        verbose_name="Cost (₹)",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_whatsappusagedaily'
+        verbose_name = 'WhatsApp Daily Usage'
+        verbose_name_plural = 'WhatsApp Daily Usage'
+        ordering = ['-date']
+        # Also serves the (gym, date) range scans of the dashboard charts
+        unique_together = ['gym', 'date', 'message_type']
+
+    def __str__(self):
+        return f"{self.gym_id} {self.date} {self.message_type}: {self.sent} sent, ₹{self.cost_inr}"
+
+
+class Broadcast(BaseModel):
+    """
+    A manual WhatsApp broadcast, sent in the background. Recipients are
+    materialized into BroadcastRecipient rows when the broadcast is created.
+    """
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='whatsapp_broadcasts',
+        verbose_name="Gym",
+    )
+    created_by = models.ForeignKey(
+        'users.GymUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='whatsapp_broadcasts',
+        verbose_name="Created By",
+    )
+
+    class Audience(models.TextChoices):
+        ACTIVE_MEMBERS = 'active_members', 'Active Members'
+        EXPIRED_MEMBERS = 'expired_members', 'Expired Members'
+        EXPIRING_SOON = 'expiring_soon', 'Expiring in 7 Days'
+        BIRTHDAY_TODAY = 'birthday_today', 'Birthday Today'
+        CHECKIN_BUCKET = 'checkin_bucket', 'Check-in Recency'
+        GOAL_GROUP = 'goal_group', 'Fitness Goal Group'
+        SPECIFIC_PLAN = 'specific_plan', 'Specific Plan'
+        LEADS_ONLY = 'leads_only', 'Leads'
+        SPECIFIC_MEMBER = 'specific_member', 'Specific Member'
+
+    audience = models.CharField(
+        max_length=30,
+        choices=Audience.choices,
+        verbose_name="Audience",
+    )
+    audience_filter = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Audience Filter",
+        help_text="e.g. {'goal': 'fat_loss'}, {'plan_id': '...'} or {'bucket': 'lapsing'}",
+    )
+    message = models.TextField(
+        verbose_name="Message",
+        help_text="Supports variables like {{name}}, {{plan_name}}, {{days_left}}",
+    )
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Sending'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Status",
+    )
+    total_recipients = models.IntegerField(default=0, verbose_name="Recipients")
+    sent_count = models.IntegerField(default=0, verbose_name="Sent")
+    failed_count = models.IntegerField(default=0, verbose_name="Failed")
+    last_error = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name="Failure Reason",
+    )
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Started At")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_broadcast'
+        verbose_name = 'WhatsApp Broadcast'
+        verbose_name_plural = 'WhatsApp Broadcasts'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['gym', 'status'], name='idx_broadcast_gym_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.gym.name} - {self.get_audience_display()} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
+
+    @property
+    def progress_pct(self):
+        if not self.total_recipients:
+            return 100 if self.is_finished else 0
+        done = self.sent_count + self.failed_count
+        return min(100, int(done * 100 / self.total_recipients))
+
+
+class BroadcastRecipient(BaseModel):
+    """
+    One recipient of a Broadcast. Unique per (broadcast, phone), which
+    de-duplicates the audience at insert time.
+    """
+    broadcast = models.ForeignKey(
+        Broadcast,
+        on_delete=models.CASCADE,
+        related_name='recipients',
+        verbose_name="Broadcast",
+    )
+    member = models.ForeignKey(
+        'members.Member',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='broadcast_receipts',
+        verbose_name="Member",
+    )
+    phone = models.CharField(
+        max_length=20,
+        verbose_name="Phone Number",
+    )
+    name = models.CharField(
+        max_length=255,
+        verbose_name="Name",
+    )
+
+    class DeliveryStatus(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        QUEUED = 'queued', 'Queued'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    status = models.CharField(
+        max_length=20,
+        choices=DeliveryStatus.choices,
+        default=DeliveryStatus.PENDING,
+        verbose_name="Status",
+    )
+    error = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name="Error",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_broadcastrecipient'
+        verbose_name = 'Broadcast Recipient'
+        verbose_name_plural = 'Broadcast Recipients'
+        ordering = ['created_at']
+        unique_together = ['broadcast', 'phone']
+        indexes = [
+            models.Index(fields=['broadcast', 'status'], name='idx_bcast_rcpt_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.phone}) - {self.status}"
+
+
+class OutboundMessage(BaseModel):
+    """
+    A WhatsApp send waiting in the outbound queue. Producers insert rows;
+    the queue worker claims due rows by priority, sends them under a
+    per-sender rate limit, retries failures with exponential backoff and
+    dead-letters them after `max_attempts`.
+    """
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='outbound_messages',
+        verbose_name="Gym",
+    )
+    member = models.ForeignKey(
+        'members.Member',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='outbound_messages',
+        verbose_name="Member",
+    )
+    broadcast_recipient = models.ForeignKey(
+        BroadcastRecipient,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='outbound_messages',
+        verbose_name="Broadcast Recipient",
+    )
+
+    class Kind(models.TextChoices):
+        TEMPLATE = 'template', 'Template Message'
+        TEXT = 'text', 'Text Message'
+
+    kind = models.CharField(
+        max_length=10,
+        choices=Kind.choices,
+        verbose_name="Kind",
+    )
+
+    class Priority(models.IntegerChoices):
+        OTP = 0, 'OTP'
+        TRANSACTIONAL = 10, 'Transactional'
+        PROMOTION = 20, 'Promotional'
+
+    priority = models.PositiveSmallIntegerField(
+        choices=Priority.choices,
+        default=Priority.TRANSACTIONAL,
+        verbose_name="Priority",
+        help_text="Lower values are sent first",
+    )
+    phone_number_id = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        verbose_name="Sender Phone Number ID",
+    )
+    recipient_phone = models.CharField(
+        max_length=20,
+        verbose_name="Recipient Phone",
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name="Payload",
+        help_text="Template: template_name, language_code, components, message_type. Text: message, automation_type.",
+    )
+    idempotency_key = models.CharField(
+        max_length=150,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Idempotency Key",
+    )
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        SENDING = 'sending', 'Sending'
+        RETRYING = 'retrying', 'Retrying'
+        SENT = 'sent', 'Sent'
+        DEAD = 'dead', 'Dead-lettered'
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name="Status",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Attempts")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Max Attempts")
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Next Attempt At",
+    )
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name="Claim Token",
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Locked Until",
+        help_text="A crashed worker's claim expires at this time",
+    )
+    last_error = models.TextField(
+        blank=True,
+        default='',
+        verbose_name="Last Error",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Sent At",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'communications_outboundmessage'
+        verbose_name = 'Outbound Message'
+        verbose_name_plural = 'Outbound Messages'
+        ordering = ['priority', 'next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at'], name='idx_outbound_due'),
+            models.Index(fields=['claim_token'], name='idx_outbound_claim'),
+            models.Index(fields=['gym', 'status'], name='idx_outbound_gym_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.recipient_phone} - {self.status}"
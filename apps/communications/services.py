@@ -1,31 +1,143 @@
 import logging
+import queue
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+
 import requests
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from .models import WhatsAppMessage
+from apps.core.background import run_in_background
+from apps.core.transport import get_transport
+from .audiences import AudienceService
+from .dispatch import LaneDispatcher
+from .log_writer import BufferedLogWriter
+from .models import Broadcast, BroadcastRecipient, OutboundMessage, WhatsAppMessage, WhatsAppMessageLog
+from .templating import compile_template
+from .throttling import TokenBucket
+from .usage import WhatsAppUsageService
 
 logger = logging.getLogger(__name__)
 
+BROADCAST_BATCH_SIZE = 200
+
 class WhatsAppService:
     """
     Service to handle WhatsApp Business API interactions.
     Supports 'Simulation Mode' for testing without credentials.
+
+    Pass a BufferedLogWriter as `log_writer` to batch the message log writes
+    of a bulk run; without one every log row is saved immediately.
+
+    The high-level methods (welcome, renewal, daily quote) only enqueue an
+    OutboundMessage; send_template_message and send_whatsapp_message call the
+    API directly and are used by the outbound queue worker.
+
+    Both send methods take an `idempotency_key`: the log row is claimed
+    (saved PENDING under the key) before the send, and a key that is already
+    claimed skips the send. The outbound queue claims its log rows in bulk
+    and passes one in as `claimed_log` instead: the outcome is recorded on
+    that row, and a failed attempt leaves it PENDING (one log row per queued
+    message, however many attempts) until a retry sends it or the queue
+    dead-letters the message with fail_claim().
     """
 
-    def __init__(self):
+    def __init__(self, log_writer=None, phone_number_id=None):
         self.api_url = getattr(settings, 'META_WHATSAPP_API_URL', '')
         self.access_token = getattr(settings, 'META_WHATSAPP_ACCESS_TOKEN', '')
-        self.phone_number_id = getattr(settings, 'META_WHATSAPP_PHONE_NUMBER_ID', '')
+        self.phone_number_id = phone_number_id or getattr(settings, 'META_WHATSAPP_PHONE_NUMBER_ID', '')
         self.simulation_mode = getattr(settings, 'WHATSAPP_SIMULATION_MODE', True)
+        self.transport = get_transport(
+            'whatsapp',
+            pool_maxsize=getattr(settings, 'WHATSAPP_HTTP_POOL_SIZE', 20),
+            max_retries=getattr(settings, 'WHATSAPP_HTTP_MAX_RETRIES', 3),
+            backoff_factor=getattr(settings, 'WHATSAPP_HTTP_BACKOFF', 0.5),
+        )
+        self.log_writer = log_writer
+
+    def _write_log(self, obj, update_fields=None):
+        """
+        Persist a log row now, or hand it to the buffered writer. Either way
+        the row reaches the daily usage rollup once it is written.
+        """
+        if self.log_writer is not None:
+            self.log_writer.add(obj, update_fields=update_fields)
+        else:
+            obj.save(update_fields=update_fields)
+            WhatsAppUsageService.record([obj])
+        return obj
+
+    def _write_outcome(self, log, **values):
+        """Set `values` on a log row and write it (an update if it was claimed earlier)."""
+        for field, value in values.items():
+            setattr(log, field, value)
+        return self._write_log(log, update_fields=None if log._state.adding else list(values))
+
+    def _claim(self, log):
+        """Save `log` PENDING to claim its idempotency key; False if the key is already taken."""
+        try:
+            with transaction.atomic():
+                log.save()
+            return True
+        except IntegrityError:
+            return False
+
+    def fail_claim(self, log):
+        """Mark a queue-claimed log row failed and release its key (the message was dead-lettered)."""
+        return self._write_outcome(log, status=type(log).DeliveryStatus.FAILED, idempotency_key=None)
+
+    def template_log(self, recipient_phone, template_name, gym=None, member=None, message_type='custom',
+                     idempotency_key=None):
+        """The unsaved WhatsAppMessage row that logs a template send."""
+        return WhatsAppMessage(
+            gym=gym,
+            member=member,
+            direction=WhatsAppMessage.Direction.OUTBOUND,
+            message_type=message_type,
+            recipient_phone=self._format_phone(recipient_phone),
+            content=f"Template: {template_name}",
+            template_name=template_name,
+            idempotency_key=idempotency_key,
+        )
+
+    def text_log(self, phone, message, gym=None, member=None, automation_type=None, idempotency_key=None):
+        """The unsaved WhatsAppMessageLog row that logs a free-text send."""
+        return WhatsAppMessageLog(
+            gym=gym,
+            member=member,
+            phone=self._format_phone(phone),
+            message=message,
+            automation_type=automation_type,
+            idempotency_key=idempotency_key,
+        )
 
-    def send_template_message(self, recipient_phone, template_name, language_code='en', components=None, gym=None, member=None, message_type='custom'):
+    def send_template_message(self, recipient_phone, template_name, language_code='en', components=None, gym=None,
+                              member=None, message_type='custom', idempotency_key=None, claimed_log=None):
         """
         Generic method to send a template message.
         """
         # Format phone number: ensure it has 91 prefix if 10 digits
         formatted_phone = self._format_phone(recipient_phone)
+        payload = self._template_payload(formatted_phone, template_name, language_code, components)
 
-        payload = {
+        msg = claimed_log or self.template_log(
+            recipient_phone, template_name, gym, member, message_type, idempotency_key,
+        )
+        if claimed_log is None and idempotency_key and not self._claim(msg):
+            logger.info(f"Skipping duplicate WhatsApp send ({idempotency_key})")
+            return {"status": "skipped", "reason": "duplicate"}
+
+        if self.simulation_mode:
+            return self._simulate_send(payload, msg)
+        else:
+            return self._execute_send(payload, msg, keep_claim=claimed_log is not None)
+
+    def _template_payload(self, formatted_phone, template_name, language_code, components):
+        return {
             "messaging_product": "whatsapp",
             "to": formatted_phone,
             "type": "template",
@@ -36,11 +148,6 @@ class WhatsAppService:
             }
         }
 
-        if self.simulation_mode:
-            return self._simulate_send(payload, gym, member, message_type)
-        else:
-            return self._execute_send(payload, gym, member, message_type)
-
     def _format_phone(self, phone):
         """
         Ensure phone number is in E.164 format (roughly).
@@ -55,28 +162,22 @@ class WhatsAppService:
             return f"91{clean_phone}"
         return clean_phone
 
-    def _simulate_send(self, payload, gym, member, message_type):
+    def _simulate_send(self, payload, msg):
         """
         Logs the message as sent without actually hitting the API.
         """
         logger.info(f"SIMULATION: Sending WhatsApp to {payload['to']} | Template: {payload['template']['name']}")
-        
-        # Create log entry
-        msg = WhatsAppMessage.objects.create(
-            gym=gym,
-            member=member,
-            direction=WhatsAppMessage.Direction.OUTBOUND,
-            message_type=message_type,
-            recipient_phone=payload['to'],
+
+        self._write_outcome(
+            msg,
             content=f"Template: {payload['template']['name']} | Data: {payload}",
-            template_name=payload['template']['name'],
             status=WhatsAppMessage.DeliveryStatus.SENT,
-            wa_message_id=f"sim_{timezone.now().timestamp()}",
-            cost_inr=0.00 # No cost in simulation
+            wa_message_id=f"sim_{msg.id}",
+            cost_inr=0.00,  # No cost in simulation
         )
         return {"status": "success", "message_id": msg.wa_message_id, "simulation": True}
 
-    def _execute_send(self, payload, gym, member, message_type):
+    def _execute_send(self, payload, msg, keep_claim=False):
         """
         Actually calls the Meta API.
         """
@@ -87,7 +188,7 @@ class WhatsAppService:
         url = f"{self.api_url}/{self.phone_number_id}/messages"
 
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.transport.post(url, json=payload, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -95,18 +196,13 @@ class WhatsAppService:
             wa_id = data.get('messages', [{}])[0].get('id')
 
             # Log success
-            WhatsAppMessage.objects.create(
-                gym=gym,
-                member=member,
-                direction=WhatsAppMessage.Direction.OUTBOUND,
-                message_type=message_type,
-                recipient_phone=payload['to'],
-                content=f"Template: {payload['template']['name']}",
-                template_name=payload['template']['name'],
+            self._write_outcome(
+                msg,
                 status=WhatsAppMessage.DeliveryStatus.SENT,
                 wa_message_id=wa_id,
+                error_message=None,
                 # Simple cost estimation logic (approx 0.80 INR per conversation)
-                cost_inr=0.80 
+                cost_inr=0.80,
             )
             return {"status": "success", "data": data}
 
@@ -116,29 +212,56 @@ class WhatsAppService:
                 logger.error(f"Response: {e.response.text}")
             
             # Log failure
-            WhatsAppMessage.objects.create(
-                gym=gym,
-                member=member,
-                direction=WhatsAppMessage.Direction.OUTBOUND,
-                message_type=message_type,
-                recipient_phone=payload['to'],
-                content=f"Template: {payload['template']['name']}",
-                template_name=payload['template']['name'],
-                status=WhatsAppMessage.DeliveryStatus.FAILED,
-                error_message=f"{str(e)} | Response: {e.response.text if e.response else 'No Response'}"
-            )
-            return {"status": "failed", "error": str(e)}
+            error = f"{str(e)} | Response: {e.response.text if e.response is not None else 'No Response'}"
+            if keep_claim:
+                # Stays PENDING under the queue's claim until a retry sends it or it is dead-lettered
+                self._write_outcome(msg, error_message=error)
+            else:
+                self._write_outcome(
+                    msg, status=WhatsAppMessage.DeliveryStatus.FAILED, error_message=error, idempotency_key=None,
+                )
+            return {"status": "failed", "error": str(e), "status_code": self._status_code(e)}
+
+    @staticmethod
+    def _status_code(error):
+        """HTTP status of a failed request, or None for network errors."""
+        return error.response.status_code if error.response is not None else None
 
     # ── High Level Methods ────────────────────────────────────────
 
     def send_welcome_message(self, member):
         """
-        Sends welcome message to a new member.
+        Queues the welcome message for a new member.
         """
         if not member.phone or not member.gym:
             return None
-            
-        components = [
+        return OutboundQueueService.enqueue_one(self.welcome_message(member))
+
+    def send_welcome_messages(self, members):
+        """
+        Queues welcome messages for members created in bulk (bulk_create does
+        not fire the post_save welcome signal) with one insert. Returns the
+        number queued.
+        """
+        messages = [self.welcome_message(m) for m in members if m.phone and m.gym_id]
+        return len(OutboundQueueService.enqueue(messages, check_existing=False))
+
+    def welcome_message(self, member):
+        """The (unsaved) welcome OutboundMessage for `member`; one per member ever."""
+        return OutboundQueueService.template_message(
+            recipient_phone=member.phone,
+            template_name="gym_welcome_message",
+            language_code="en_IN",
+            components=self._welcome_components(member),
+            gym=member.gym,
+            member=member,
+            message_type=WhatsAppMessage.MessageType.WELCOME,
+            idempotency_key=f"welcome:{member.id}",
+            phone_number_id=self.phone_number_id,
+        )
+
+    def _welcome_components(self, member):
+        return [
             {
                 "type": "header",
                 "parameters": [
@@ -154,20 +277,10 @@ class WhatsAppService:
                 ]
             }
         ]
-        
-        return self.send_template_message(
-            recipient_phone=member.phone,
-            template_name="gym_welcome_message", 
-            language_code="en_IN",
-            components=components,
-            gym=member.gym,
-            member=member,
-            message_type=WhatsAppMessage.MessageType.WELCOME
-        )
 
     def send_renewal_reminder(self, member):
         """
-        Sends renewal reminder (3 days before).
+        Queues renewal reminder (3 days before).
         """
         if not member.phone or not member.gym:
             return None
@@ -187,23 +300,29 @@ class WhatsAppService:
             }
         ]
 
-        return self.send_template_message(
+        return OutboundQueueService.enqueue_one(OutboundQueueService.template_message(
             recipient_phone=member.phone,
             template_name="gym_renewal_reminder",
             language_code="en",
             components=components,
             gym=member.gym,
             member=member,
-            message_type=WhatsAppMessage.MessageType.EXPIRY_REMINDER
-        )
+            message_type=WhatsAppMessage.MessageType.EXPIRY_REMINDER,
+            idempotency_key=f"renewal:{member.id}:{timezone.localdate().isoformat()}",
+            phone_number_id=self.phone_number_id,
+        ))
 
     def send_daily_quote(self, member, quote):
         """
-        Sends daily motivational quote.
+        Queues daily motivational quote.
         """
         if not member.phone or not member.gym:
             return None
+        return OutboundQueueService.enqueue_one(self.daily_quote_message(member, quote))
 
+    def daily_quote_message(self, member, quote, day=None):
+        """The (unsaved) promotional OutboundMessage for `quote`; one per member per day."""
+        day = day or timezone.localdate()
         components = [
             {
                 "type": "body",
@@ -216,26 +335,45 @@ class WhatsAppService:
             }
         ]
 
-        return self.send_template_message(
+        return OutboundQueueService.template_message(
             recipient_phone=member.phone,
             template_name="gym_daily_motivation",
             language_code="en",
             components=components,
             gym=member.gym,
             member=member,
-            message_type=WhatsAppMessage.MessageType.PROMOTION
+            message_type=WhatsAppMessage.MessageType.PROMOTION,
+            priority=OutboundMessage.Priority.PROMOTION,
+            idempotency_key=f"quote:{member.id}:{day.isoformat()}",
+            phone_number_id=self.phone_number_id,
         )
 
-    def send_whatsapp_message(self, phone, message, gym=None, member=None):
+    def send_whatsapp_message(self, phone, message, gym=None, member=None, automation_type=None, idempotency_key=None,
+                              claimed_log=None):
         """
         Sends a raw WhatsApp message (no template constraints) or handles
         custom Meta API text messaging. Logs the result in WhatsAppMessageLog.
         This provides a swappable interface (e.g. Meta API, Twilio). 
+
+        With an `idempotency_key` the log row is claimed (PENDING) before the
+        send; if the key already exists the message is skipped. A failed send
+        releases its key so a later run can retry it (a `claimed_log` keeps
+        it, see the class docstring).
         """
         formatted_phone = self._format_phone(phone)
-        
-        # We need the WhatsAppMessageLog model
-        from apps.communications.models import WhatsAppMessageLog
+
+        msg_log = claimed_log or self.text_log(phone, message, gym, member, automation_type, idempotency_key)
+        if claimed_log is None and idempotency_key and not self._claim(msg_log):
+            logger.info(f"Skipping duplicate WhatsApp send ({idempotency_key})")
+            return {"status": "skipped", "reason": "duplicate"}
+
+        def record(status, response, wa_message_id=None):
+            if status != WhatsAppMessageLog.DeliveryStatus.FAILED:
+                self._write_outcome(msg_log, status=status, response=response, wa_message_id=wa_message_id)
+            elif claimed_log is not None:
+                self._write_outcome(msg_log, response=response)
+            else:
+                self._write_outcome(msg_log, status=status, response=response, idempotency_key=None)
 
         payload = {
             "messaging_product": "whatsapp",
@@ -248,13 +386,9 @@ class WhatsAppService:
 
         if self.simulation_mode:
             logger.info(f"SIMULATION: Sending Raw WA to {formatted_phone}: {message[:30]}...")
-            msg_log = WhatsAppMessageLog.objects.create(
-                gym=gym,
-                member=member,
-                phone=formatted_phone,
-                message=message,
-                status=WhatsAppMessageLog.DeliveryStatus.SENT,
-                response='{"simulation": true, "status": "success"}'
+            record(
+                WhatsAppMessageLog.DeliveryStatus.SENT, '{"simulation": true, "status": "success"}',
+                wa_message_id=f"sim_{msg_log.id}",
             )
             return {"status": "success", "message_id": f"sim_{msg_log.id}"}
         
@@ -265,29 +399,585 @@ class WhatsAppService:
         url = f"{self.api_url}/{self.phone_number_id}/messages"
 
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.transport.post(url, json=payload, headers=headers)
             response.raise_for_status()
             data = response.json()
             
-            WhatsAppMessageLog.objects.create(
-                gym=gym,
-                member=member,
-                phone=formatted_phone,
-                message=message,
-                status=WhatsAppMessageLog.DeliveryStatus.SENT,
-                response=response.text
-            )
+            # Delivery-status callbacks refer to the message by this id
+            wa_id = data.get('messages', [{}])[0].get('id')
+            record(WhatsAppMessageLog.DeliveryStatus.SENT, response.text, wa_message_id=wa_id)
             return {"status": "success", "data": data}
 
         except requests.exceptions.RequestException as e:
-            error_response = e.response.text if e.response else str(e)
+            error_response = e.response.text if e.response is not None else str(e)
             logger.error(f"WhatsApp Raw Error: {error_response}")
-            WhatsAppMessageLog.objects.create(
+            record(WhatsAppMessageLog.DeliveryStatus.FAILED, error_response)
+            return {"status": "failed", "error": str(e), "status_code": self._status_code(e)}
+
+
+class OutboundQueueService:
+    """
+    The persistent outbound queue (OutboundMessage). Producers enqueue rows in
+    bulk; workers claim due rows in priority order under a lease, send them
+    with a token bucket per sender number, and reschedule failures with
+    exponential backoff until they are dead-lettered.
+    """
+
+    @staticmethod
+    def template_message(recipient_phone, template_name, language_code='en', components=None, gym=None,
+                         member=None, message_type='custom', priority=OutboundMessage.Priority.TRANSACTIONAL,
+                         idempotency_key=None, phone_number_id=None):
+        """An unsaved template OutboundMessage; pass it to enqueue()."""
+        return OutboundMessage(
+            gym=gym,
+            member=member,
+            kind=OutboundMessage.Kind.TEMPLATE,
+            priority=priority,
+            phone_number_id=phone_number_id or getattr(settings, 'META_WHATSAPP_PHONE_NUMBER_ID', ''),
+            recipient_phone=recipient_phone,
+            payload={
+                "template_name": template_name,
+                "language_code": language_code,
+                "components": components or [],
+                "message_type": message_type,
+            },
+            idempotency_key=idempotency_key,
+            max_attempts=getattr(settings, 'WHATSAPP_QUEUE_MAX_ATTEMPTS', 5),
+        )
+
+    @staticmethod
+    def text_message(phone, message, gym=None, member=None, automation_type=None,
+                     priority=OutboundMessage.Priority.TRANSACTIONAL, idempotency_key=None,
+                     phone_number_id=None, broadcast_recipient=None):
+        """An unsaved free-text OutboundMessage; pass it to enqueue()."""
+        return OutboundMessage(
+            gym=gym,
+            member=member,
+            broadcast_recipient=broadcast_recipient,
+            kind=OutboundMessage.Kind.TEXT,
+            priority=priority,
+            phone_number_id=phone_number_id or getattr(settings, 'META_WHATSAPP_PHONE_NUMBER_ID', ''),
+            recipient_phone=phone,
+            payload={"message": message, "automation_type": automation_type},
+            idempotency_key=idempotency_key,
+            max_attempts=getattr(settings, 'WHATSAPP_QUEUE_MAX_ATTEMPTS', 5),
+        )
+
+    @staticmethod
+    def enqueue(messages, check_existing=True):
+        """
+        Insert `messages` in bulk, skipping any whose idempotency key is
+        already queued (or repeated in `messages`). Returns the messages that
+        were added; a background drain starts once they are committed.
+        Pass check_existing=False when the keys cannot exist yet (e.g. for
+        members just created) to skip the lookup query.
+        """
+        messages = [m for m in messages if m.recipient_phone]
+        keys = [m.idempotency_key for m in messages if m.idempotency_key] if check_existing else []
+        seen = set()
+        for start in range(0, len(keys), 1000):
+            seen.update(
+                OutboundMessage.objects.filter(idempotency_key__in=keys[start:start + 1000])
+                .values_list('idempotency_key', flat=True)
+            )
+
+        new = []
+        for message in messages:
+            if message.idempotency_key:
+                if message.idempotency_key in seen:
+                    continue
+                seen.add(message.idempotency_key)
+            new.append(message)
+
+        # A concurrent producer may still win a key between the check and the insert
+        OutboundMessage.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+        if new:
+            OutboundQueueService.kick()
+        return new
+
+    @staticmethod
+    def enqueue_one(message):
+        """enqueue() for a single message, returning a send-style result dict."""
+        if OutboundQueueService.enqueue([message]):
+            return {"status": "queued", "id": str(message.id)}
+        return {"status": "skipped", "reason": "duplicate"}
+
+    @staticmethod
+    def kick():
+        """Start a background drain after the current transaction commits."""
+        if not getattr(settings, 'WHATSAPP_QUEUE_AUTO_DRAIN', True):
+            return
+        from apps.communications.tasks import drain_outbound_queue
+        transaction.on_commit(lambda: run_in_background(drain_outbound_queue))
+
+    @staticmethod
+    def due_q(now=None):
+        """Messages ready to send, including claims whose worker lease expired."""
+        now = now or timezone.now()
+        Status = OutboundMessage.Status
+        return (
+            Q(status__in=[Status.QUEUED, Status.RETRYING], next_attempt_at__lte=now)
+            | Q(status=Status.SENDING, locked_until__lt=now)
+        )
+
+    @staticmethod
+    def claim(limit=None, gyms=None):
+        """
+        Lease up to `limit` due messages (of `gyms` only, if given), highest
+        priority first. The claiming UPDATE re-checks that each row is still
+        due, so concurrent workers never claim the same message.
+        """
+        limit = limit or getattr(settings, 'WHATSAPP_QUEUE_BATCH_SIZE', 100)
+        now = timezone.now()
+        due = OutboundMessage.objects.filter(OutboundQueueService.due_q(now))
+        if gyms is not None:
+            due = due.filter(gym__in=gyms)
+        ids = list(due.order_by('priority', 'next_attempt_at').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+
+        token = uuid.uuid4()
+        OutboundMessage.objects.filter(OutboundQueueService.due_q(now), id__in=ids).update(
+            status=OutboundMessage.Status.SENDING,
+            claim_token=token,
+            locked_until=now + timedelta(seconds=getattr(settings, 'WHATSAPP_QUEUE_LEASE_SECONDS', 300)),
+            updated_at=now,
+        )
+        return list(
+            OutboundMessage.objects.filter(claim_token=token)
+            .select_related('gym', 'member', 'broadcast_recipient')
+            .order_by('priority', 'next_attempt_at')
+        )
+
+    @staticmethod
+    def retry_delay(attempts):
+        """Seconds before retry number `attempts`: exponential, capped, with 10% jitter."""
+        base = getattr(settings, 'WHATSAPP_QUEUE_RETRY_BASE_SECONDS', 30)
+        delay = min(base * 2 ** (attempts - 1), getattr(settings, 'WHATSAPP_QUEUE_RETRY_MAX_SECONDS', 3600))
+        return delay + random.uniform(0, delay / 10)
+
+    @staticmethod
+    def _is_permanent(result):
+        # Client errors will fail the same way again; timeouts and throttling will not
+        code = result.get('status_code')
+        return code is not None and 400 <= code < 500 and code not in (408, 429)
+
+    @staticmethod
+    def log_key(message):
+        """Idempotency key of the one log row a queued message is sent under, across all its attempts."""
+        return message.idempotency_key or f"outbound:{message.id}"
+
+    @staticmethod
+    def claim_logs(messages, service):
+        """
+        Claim the log row of every message before any is sent, in bulk: one
+        insert (skipping keys that exist) and one read per log model.
+        Returns {message id: log row}. A row that is still PENDING is sent
+        (again, if an earlier attempt was interrupted before recording its
+        outcome); any other row was already sent.
+        """
+        new_logs = defaultdict(list)
+        for message in messages:
+            key = OutboundQueueService.log_key(message)
+            if message.kind == OutboundMessage.Kind.TEMPLATE:
+                log = service.template_log(
+                    message.recipient_phone, message.payload['template_name'], message.gym, message.member,
+                    message.payload.get('message_type', 'custom'), key,
+                )
+            else:
+                log = service.text_log(
+                    message.recipient_phone, message.payload['message'], message.gym, message.member,
+                    message.payload.get('automation_type'), key,
+                )
+            new_logs[type(log)].append(log)
+
+        claimed = {}
+        for model, logs in new_logs.items():
+            model.objects.bulk_create(logs, batch_size=1000, ignore_conflicts=True)
+            keys = [log.idempotency_key for log in logs]
+            claimed.update(
+                (log.idempotency_key, log) for log in model.objects.filter(idempotency_key__in=keys)
+            )
+        return {message.id: claimed.get(OutboundQueueService.log_key(message)) for message in messages}
+
+    @staticmethod
+    def renew_leases(tokens):
+        """Extend the lease on every still-unsent message of the given claims."""
+        now = timezone.now()
+        return OutboundMessage.objects.filter(
+            claim_token__in=tokens, status=OutboundMessage.Status.SENDING,
+        ).update(
+            locked_until=now + timedelta(seconds=getattr(settings, 'WHATSAPP_QUEUE_LEASE_SECONDS', 300)),
+            updated_at=now,
+        )
+
+    @staticmethod
+    def _deliver(message, service, bucket, log):
+        """
+        Send one claimed message on a pool thread. Returns the outcome
+        fields for save_outcome(); nothing is written here but the log row.
+        """
+        if log is not None and log.status != log.DeliveryStatus.PENDING:
+            # Sent by an earlier attempt whose own outcome never got saved
+            result = {"status": "skipped", "reason": "duplicate"}
+        else:
+            bucket.acquire()
+            payload = message.payload
+            try:
+                if message.kind == OutboundMessage.Kind.TEMPLATE:
+                    result = service.send_template_message(
+                        recipient_phone=message.recipient_phone,
+                        template_name=payload['template_name'],
+                        language_code=payload.get('language_code', 'en'),
+                        components=payload.get('components'),
+                        gym=message.gym,
+                        member=message.member,
+                        message_type=payload.get('message_type', 'custom'),
+                        claimed_log=log,
+                    )
+                else:
+                    result = service.send_whatsapp_message(
+                        phone=message.recipient_phone,
+                        message=payload['message'],
+                        gym=message.gym,
+                        member=message.member,
+                        automation_type=payload.get('automation_type'),
+                        claimed_log=log,
+                    )
+            except Exception as e:
+                logger.exception(f"Outbound message {message.id} raised: {e}")
+                result = {"status": "failed", "error": str(e)}
+
+        now = timezone.now()
+        outcome = {
+            'attempts': message.attempts + 1,
+            'claim_token': None,
+            'locked_until': None,
+            'updated_at': now,
+        }
+        if result.get('status') in ('success', 'skipped'):
+            outcome.update(status=OutboundMessage.Status.SENT, sent_at=now, last_error='')
+            return outcome
+
+        outcome['last_error'] = result.get('error') or 'Unknown error'
+        if outcome['attempts'] >= message.max_attempts or OutboundQueueService._is_permanent(result):
+            outcome['status'] = OutboundMessage.Status.DEAD
+        else:
+            outcome.update(
+                status=OutboundMessage.Status.RETRYING,
+                next_attempt_at=now + timedelta(seconds=OutboundQueueService.retry_delay(outcome['attempts'])),
+            )
+        return outcome
+
+    @staticmethod
+    def save_outcome(message, outcome, service, log):
+        """
+        Write one message's outcome as soon as it is known, guarded by its
+        claim_token. Returns 'sent', 'retrying' or 'dead', or 'lost' when the
+        lease had expired and another worker claimed the message.
+        """
+        if not OutboundMessage.objects.filter(id=message.id, claim_token=message.claim_token).update(**outcome):
+            logger.warning(f"Outbound message {message.id} was reclaimed by another worker; outcome dropped")
+            return 'lost'
+        for field, value in outcome.items():
+            setattr(message, field, value)
+
+        if message.status == OutboundMessage.Status.DEAD:
+            logger.warning(f"Dead-lettered outbound message {message.id}: {message.last_error}")
+            if log is not None and log.status == log.DeliveryStatus.PENDING:
+                service.fail_claim(log)
+            return 'dead'
+        return 'sent' if message.status == OutboundMessage.Status.SENT else 'retrying'
+
+    @staticmethod
+    def process(messages, workers=None, per_lane=None, rate=None, buckets=None):
+        """
+        Send claimed `messages` over a LaneDispatcher (one lane per gym).
+        Log rows are claimed in bulk first; each outcome is then saved (and
+        its broadcast recipient settled) on this thread as soon as its send
+        completes, while the lease on the rest of the batch is renewed every
+        third of WHATSAPP_QUEUE_LEASE_SECONDS, so no other worker can
+        reclaim a message this batch has sent or is still sending.
+        `buckets` maps sender phone_number_id to a TokenBucket; pass the
+        same dict across batches. Returns a Counter of outcomes ('sent',
+        'retrying', 'dead', 'lost').
+        """
+        workers = workers or getattr(settings, 'WHATSAPP_AUTOMATION_WORKERS', 8)
+        per_lane = per_lane or getattr(settings, 'WHATSAPP_AUTOMATION_WORKERS_PER_GYM', 2)
+        if rate is None:
+            rate = getattr(settings, 'WHATSAPP_RATE_LIMIT_PER_SECOND', 0)
+        buckets = {} if buckets is None else buckets
+
+        log_writer = BufferedLogWriter()
+        services = {}
+        lanes = defaultdict(list)
+        for message in messages:
+            sender = message.phone_number_id
+            if sender not in services:
+                services[sender] = WhatsAppService(log_writer=log_writer, phone_number_id=sender)
+            if sender not in buckets:
+                buckets[sender] = TokenBucket(rate)
+            lanes[message.gym_id].append(message)
+
+        totals = Counter()
+        logs = OutboundQueueService.claim_logs(messages, WhatsAppService())
+        tokens = {message.claim_token for message in messages}
+        renew_every = getattr(settings, 'WHATSAPP_QUEUE_LEASE_SECONDS', 300) / 3
+        renewed_at = time.monotonic()
+        done = queue.SimpleQueue()
+        # A single worker sends on this thread, so it saves as it goes
+        inline = workers <= 1
+
+        def save(completed):
+            nonlocal renewed_at
+            # A send that raised past _deliver has no outcome: it stays claimed and is retried after the lease
+            completed = [(message, outcome) for message, outcome in completed if outcome is not None]
+            for message, outcome in completed:
+                sender = message.phone_number_id
+                totals[OutboundQueueService.save_outcome(message, outcome, services[sender], logs[message.id])] += 1
+            OutboundQueueService.finish_broadcasts([message for message, _ in completed])
+            if time.monotonic() - renewed_at >= renew_every:
+                OutboundQueueService.renew_leases(tokens)
+                renewed_at = time.monotonic()
+
+        def deliver(message):
+            sender = message.phone_number_id
+            outcome = None
+            try:
+                outcome = OutboundQueueService._deliver(message, services[sender], buckets[sender], logs[message.id])
+            finally:
+                done.put((message, outcome))
+            if inline:
+                save(OutboundQueueService._completed(done))
+
+        dispatcher = LaneDispatcher(workers, per_lane=per_lane)
+        with log_writer, dispatcher:
+            for lane in lanes.values():
+                dispatcher.add_lane(lane, deliver)
+            finished = False
+            while not finished:
+                # Read before draining: everything a finished worker sent is already queued
+                finished = not dispatcher.running()
+                completed = OutboundQueueService._completed(done)
+                if not completed and not finished:
+                    try:
+                        completed = [done.get(timeout=1)] + OutboundQueueService._completed(done)
+                    except queue.Empty:
+                        pass
+                save(completed)
+        return totals
+
+    @staticmethod
+    def _completed(done):
+        """Drain everything already in the `done` queue."""
+        completed = []
+        while True:
+            try:
+                completed.append(done.get_nowait())
+            except queue.Empty:
+                return completed
+
+    @staticmethod
+    def finish_broadcasts(messages):
+        """
+        Settle the broadcast recipients of sent or dead-lettered messages:
+        recipient statuses in one bulk_update, counters with one UPDATE per
+        broadcast, and broadcasts with every recipient settled are completed.
+        """
+        now = timezone.now()
+        counts = defaultdict(Counter)
+        recipients = []
+        for message in messages:
+            recipient = message.broadcast_recipient
+            if recipient is None or recipient.status != BroadcastRecipient.DeliveryStatus.QUEUED:
+                continue
+            if message.status == OutboundMessage.Status.SENT:
+                recipient.status = BroadcastRecipient.DeliveryStatus.SENT
+            elif message.status == OutboundMessage.Status.DEAD:
+                recipient.status = BroadcastRecipient.DeliveryStatus.FAILED
+                recipient.error = message.last_error
+            else:
+                continue
+            recipient.updated_at = now
+            recipients.append(recipient)
+            counts[recipient.broadcast_id][recipient.status] += 1
+
+        if not recipients:
+            return
+        BroadcastRecipient.objects.bulk_update(recipients, ['status', 'error', 'updated_at'])
+        for broadcast_id, count in counts.items():
+            Broadcast.objects.filter(id=broadcast_id).update(
+                sent_count=F('sent_count') + count[BroadcastRecipient.DeliveryStatus.SENT],
+                failed_count=F('failed_count') + count[BroadcastRecipient.DeliveryStatus.FAILED],
+                updated_at=now,
+            )
+        Broadcast.objects.filter(
+            id__in=counts,
+            status=Broadcast.Status.RUNNING,
+            total_recipients__lte=F('sent_count') + F('failed_count'),
+        ).update(status=Broadcast.Status.COMPLETED, finished_at=now, updated_at=now)
+
+    @staticmethod
+    def drain(batch_size=None, workers=None, per_lane=None, rate=None, max_batches=None, gyms=None):
+        """
+        Claim and send due messages (of `gyms` only, if given) batch by batch
+        until none are due (or `max_batches` ran). Returns a Counter of
+        outcomes.
+        """
+        totals = Counter()
+        buckets = {}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            messages = OutboundQueueService.claim(batch_size, gyms)
+            if not messages:
+                break
+            totals.update(OutboundQueueService.process(messages, workers, per_lane, rate, buckets))
+            batches += 1
+        return totals
+
+
+class BroadcastService:
+    """
+    Manual WhatsApp broadcasts as background jobs: the audience is written to
+    BroadcastRecipient in bulk, then a worker sends through it in batches.
+    """
+
+    @staticmethod
+    def audience_queryset(gym, audience, audience_filter):
+        """Returns (queryset, is_member) for a Broadcast.Audience choice."""
+        from apps.leads.models import Lead
+        from apps.members.models import Member
+
+        if audience == Broadcast.Audience.LEADS_ONLY:
+            return Lead.objects.filter(gym=gym, is_deleted=False), False
+
+        members = Member.objects.filter(gym=gym, is_deleted=False)
+        segment = AudienceService.segment_q(audience, audience_filter)
+        return (members.filter(segment) if segment is not None else members.none()), True
+
+    @staticmethod
+    def create(gym, audience, message, audience_filter=None, user=None):
+        """
+        Create a Broadcast with its recipient table and queue it for sending.
+        Returns None (and writes nothing) when the audience has no phones.
+        Raises TemplateError if the message uses unknown variables and
+        AudienceError if the audience filter holds a malformed id.
+        """
+        audience_filter = AudienceService.clean_filter(audience_filter)
+        compile_template(message)
+        with transaction.atomic():
+            broadcast = Broadcast.objects.create(
                 gym=gym,
-                member=member,
-                phone=formatted_phone,
+                created_by=user,
+                audience=audience,
+                audience_filter=audience_filter,
                 message=message,
-                status=WhatsAppMessageLog.DeliveryStatus.FAILED,
-                response=error_response
             )
-            return {"status": "failed", "error": str(e)}
+            queryset, is_member = BroadcastService.audience_queryset(gym, audience, audience_filter)
+            rows = queryset.exclude(phone__isnull=True).order_by().values_list('id', 'phone', 'name')
+
+            # Unique (broadcast, phone) de-duplicates the audience during the insert
+            BroadcastRecipient.objects.bulk_create(
+                (
+                    BroadcastRecipient(
+                        broadcast=broadcast,
+                        member_id=pk if is_member else None,
+                        phone=phone.strip(),
+                        name=name,
+                    )
+                    for pk, phone, name in rows.iterator(chunk_size=2000)
+                    if phone.strip()
+                ),
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+            broadcast.total_recipients = broadcast.recipients.count()
+            if not broadcast.total_recipients:
+                transaction.set_rollback(True)
+                return None
+            broadcast.save(update_fields=['total_recipients', 'updated_at'])
+
+            from apps.communications.tasks import send_broadcast
+            transaction.on_commit(lambda: run_in_background(send_broadcast, str(broadcast.id)))
+        return broadcast
+
+    @staticmethod
+    def run(broadcast_id):
+        """
+        Hand every pending recipient to the outbound queue in
+        BROADCAST_BATCH_SIZE batches: one bulk insert of promotional messages
+        and one recipient bulk_update per batch, committed together. The queue worker settles the
+        recipients and completes the broadcast as the messages are sent.
+        Each message carries an idempotency key, so a resumed broadcast never
+        messages the same recipient twice.
+        """
+        broadcast = Broadcast.objects.select_related('gym').get(id=broadcast_id)
+        if broadcast.status == Broadcast.Status.COMPLETED:
+            return broadcast
+
+        broadcast.status = Broadcast.Status.RUNNING
+        broadcast.started_at = broadcast.started_at or timezone.now()
+        broadcast.save(update_fields=['status', 'started_at', 'updated_at'])
+
+        template = compile_template(broadcast.message)
+        pending = broadcast.recipients.filter(
+            status=BroadcastRecipient.DeliveryStatus.PENDING,
+        ).select_related(
+            'member', *(f'member__{path}' for path in template.related)
+        ).order_by('created_at', 'id')
+        queued = 0
+
+        try:
+            while True:
+                batch = list(pending[:BROADCAST_BATCH_SIZE])
+                if not batch:
+                    break
+
+                # Leads have no member row: only {{name}} has a real value
+                messages = template.render_many(
+                    [recipient.member or {'name': recipient.name} for recipient in batch],
+                    broadcast.gym,
+                )
+                # One transaction, so the drain kick() schedules only starts once
+                # the recipients are QUEUED and can be settled by finish_broadcasts
+                with transaction.atomic():
+                    new = OutboundQueueService.enqueue(
+                        OutboundQueueService.text_message(
+                            phone=recipient.phone,
+                            message=message,
+                            gym=broadcast.gym,
+                            member=recipient.member,
+                            priority=OutboundMessage.Priority.PROMOTION,
+                            idempotency_key=f"bcast:{broadcast.id}:{recipient.id}",
+                            broadcast_recipient=recipient,
+                        )
+                        for recipient, message in zip(batch, messages)
+                    )
+                    queued += len(new)
+
+                    now = timezone.now()
+                    for recipient in batch:
+                        recipient.status = BroadcastRecipient.DeliveryStatus.QUEUED
+                        recipient.updated_at = now
+                    BroadcastRecipient.objects.bulk_update(batch, ['status', 'updated_at'])
+
+                # Recipients an interrupted run already queued may have finished meanwhile
+                if len(new) < len(batch):
+                    queued_ids = {message.broadcast_recipient_id for message in new}
+                    OutboundQueueService.finish_broadcasts(
+                        OutboundMessage.objects.filter(
+                            broadcast_recipient__in=[r for r in batch if r.id not in queued_ids],
+                            status__in=[OutboundMessage.Status.SENT, OutboundMessage.Status.DEAD],
+                        ).select_related('broadcast_recipient')
+                    )
+        except Exception as e:
+            logger.exception(f"Broadcast {broadcast_id} failed: {e}")
+            broadcast.status = Broadcast.Status.FAILED
+            broadcast.last_error = str(e)
+            broadcast.finished_at = timezone.now()
+            broadcast.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+            return broadcast
+
+        logger.info(f"Broadcast {broadcast_id}: queued {queued} messages")
+        broadcast.refresh_from_db(fields=['status', 'sent_count', 'failed_count', 'finished_at'])
+        return broadcast
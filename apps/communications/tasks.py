@@ -0,0 +1,57 @@
+"""
+Communications Celery tasks.
+"""
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+DRAIN_LOCK_KEY = 'communications:outbound-drain'
+STATUS_LOCK_KEY = 'communications:status-apply'
+
+
+def _run_exclusively(lock_key, run, has_more):
+    """
+    Call `run` under a cache lock. Kicks that arrive while it runs are
+    absorbed by the lock, so `run` repeats while `has_more()` after the lock
+    is released and no work is stranded.
+    """
+    while cache.add(lock_key, 1, timeout=getattr(settings, 'WHATSAPP_QUEUE_LEASE_SECONDS', 300)):
+        try:
+            run()
+        finally:
+            cache.delete(lock_key)
+        if not has_more():
+            break
+
+
+@shared_task
+def send_broadcast(broadcast_id):
+    from apps.communications.services import BroadcastService
+    BroadcastService.run(broadcast_id)
+
+
+@shared_task
+def drain_outbound_queue():
+    """Send everything due in the outbound queue."""
+    from apps.communications.models import OutboundMessage
+    from apps.communications.services import OutboundQueueService
+
+    _run_exclusively(
+        DRAIN_LOCK_KEY,
+        OutboundQueueService.drain,
+        lambda: OutboundMessage.objects.filter(OutboundQueueService.due_q()).exists(),
+    )
+
+
+@shared_task
+def apply_whatsapp_statuses():
+    """Apply staged delivery-status webhook events to the message logs."""
+    from apps.communications.delivery import DeliveryStatusService
+    from apps.communications.models import WhatsAppStatusEvent
+
+    _run_exclusively(
+        STATUS_LOCK_KEY,
+        DeliveryStatusService.apply_pending,
+        WhatsAppStatusEvent.objects.exists,
+    )
@@ -0,0 +1,107 @@
+"""
+Communications Templating - compiled {{variable}} templates for WhatsApp text.
+"""
+
+import re
+from collections import namedtuple
+
+from django.utils import timezone
+
+PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# `fields` are Member lookups (values() style) the variable reads;
+# `render(get, context)` turns them into text. `get(field)` returns the value
+# or None, `context` carries the gym and today's date.
+Variable = namedtuple('Variable', ['fields', 'render'])
+
+
+def _days_left(get, context):
+    expiry = get('membership_expiry')
+    return str(max((expiry - context['today']).days, 0)) if expiry else '0'
+
+
+VARIABLES = {
+    'name': Variable(('name',), lambda get, context: get('name') or 'Member'),
+    'gym_name': Variable((), lambda get, context: context['gym'].name or 'Gym'),
+    'expiry_date': Variable(
+        ('membership_expiry',),
+        lambda get, context: get('membership_expiry').strftime('%d %b %Y') if get('membership_expiry') else 'Soon',
+    ),
+    'days_left': Variable(('membership_expiry',), _days_left),
+    'plan_name': Variable(
+        ('membership_plan__name',),
+        lambda get, context: get('membership_plan__name') or 'Your Plan',
+    ),
+    'trainer_name': Variable(
+        ('assigned_trainer__name',),
+        lambda get, context: get('assigned_trainer__name') or 'your trainer',
+    ),
+}
+
+
+class TemplateError(ValueError):
+    """A template uses placeholders the renderer does not know."""
+
+
+def _getter(row):
+    """Field accessor over a values() dict or a model instance (FKs may be None)."""
+    if isinstance(row, dict):
+        return row.get
+
+    def get(field):
+        value = row
+        for attr in field.split('__'):
+            value = getattr(value, attr, None)
+            if value is None:
+                return None
+        return value
+    return get
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into alternating literal / variable parts.
+    Rendering is a single join per message, with no re-scanning of the text.
+    """
+
+    def __init__(self, text):
+        self.text = text or ''
+        pieces = PLACEHOLDER_RE.split(self.text)
+        self.literals = pieces[0::2]
+        self.variables = pieces[1::2]
+
+        unknown = sorted(set(self.variables) - set(VARIABLES))
+        if unknown:
+            raise TemplateError(
+                "Unknown variable(s): "
+                + ", ".join(f"{{{{{name}}}}}" for name in unknown)
+                + ". Available: " + ", ".join(f"{{{{{name}}}}}" for name in VARIABLES)
+            )
+
+    @property
+    def fields(self):
+        """Member lookups needed to render, suitable for values()."""
+        return sorted({field for name in self.variables for field in VARIABLES[name].fields})
+
+    @property
+    def related(self):
+        """FK paths needed to render, suitable for select_related()."""
+        return sorted({field.rsplit('__', 1)[0] for field in self.fields if '__' in field})
+
+    def render(self, row, context):
+        get = _getter(row)
+        parts = [self.literals[0]]
+        for name, literal in zip(self.variables, self.literals[1:]):
+            parts.append(VARIABLES[name].render(get, context))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def render_many(self, rows, gym, today=None):
+        """Render the template for every row (dicts or Member instances)."""
+        context = {'gym': gym, 'today': today or timezone.localdate()}
+        return [self.render(row, context) for row in rows]
+
+
+def compile_template(text):
+    """Parse and validate `text`. Raises TemplateError for unknown placeholders."""
+    return CompiledTemplate(text)
@@ -0,0 +1,91 @@
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.communications.audiences import AudienceService
+from apps.communications.models import WhatsAppAutomation
+from apps.gyms.models import Gym
+from apps.members.models import Member
+
+AutomationType = WhatsAppAutomation.AutomationType
+
+
+class AudienceServiceTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Audience Gym", email="aud@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.today = date(2025, 3, 14)
+        self.counter = 0
+
+    def member(self, **kwargs):
+        self.counter += 1
+        defaults = dict(
+            gym=self.gym, name=f"Member {self.counter}", phone=f"91000000{self.counter:02d}",
+            join_date=self.today, membership_start=self.today,
+            membership_expiry=self.today + timedelta(days=60),
+        )
+        defaults.update(kwargs)
+        return Member.objects.create(**defaults)
+
+    def checked_in(self, days_ago, hour=18):
+        return timezone.make_aware(datetime.combine(self.today - timedelta(days=days_ago), time(hour)))
+
+    def test_birthday_key_is_kept_in_sync(self):
+        member = self.member(date_of_birth=date(1990, 3, 14))
+        self.assertEqual(member.birthday_md, 314)
+
+        member.date_of_birth = date(1991, 12, 1)
+        member.save(update_fields=['date_of_birth'])
+        member.refresh_from_db()
+        self.assertEqual(member.birthday_md, 1201)
+
+    def test_leap_day_birthdays_fall_on_feb_28(self):
+        leapling = self.member(date_of_birth=date(1992, 2, 29))
+        q = AudienceService.birthday_q(date(2025, 2, 28))
+        self.assertTrue(Member.objects.filter(q, id=leapling.id).exists())
+        q = AudienceService.birthday_q(date(2024, 2, 28))
+        self.assertFalse(Member.objects.filter(q, id=leapling.id).exists())
+
+    def test_automations_resolve_in_one_query(self):
+        expiring = self.member(membership_expiry=self.today + timedelta(days=3))
+        birthday = self.member(date_of_birth=date(1990, 3, 14))
+        # Matches two rules at once
+        both = self.member(membership_expiry=self.today + timedelta(days=3), date_of_birth=date(1985, 3, 14))
+        inactive = self.member(last_check_in=self.checked_in(5, hour=23))
+        self.member(last_check_in=self.checked_in(4, hour=0))
+        self.member(membership_expiry=self.today + timedelta(days=3), status='frozen')
+        self.member(date_of_birth=date(1990, 3, 14), is_deleted=True)
+
+        rules = {
+            'expiry': AudienceService.automation_q(AutomationType.EXPIRY_REMINDER, 3, self.today),
+            'birthday': AudienceService.automation_q(AutomationType.BIRTHDAY, 0, self.today),
+            'inactive': AudienceService.automation_q(AutomationType.INACTIVE_REMINDER, 5, self.today),
+            'unknown': AudienceService.automation_q('welcome', 0, self.today),
+        }
+        with self.assertNumQueries(1):
+            resolved = AudienceService.resolve_members(self.gym, rules)
+
+        ids = {key: {m.id for m in members} for key, members in resolved.items()}
+        self.assertEqual(ids['expiry'], {expiring.id, both.id})
+        self.assertEqual(ids['birthday'], {birthday.id, both.id})
+        self.assertEqual(ids['inactive'], {inactive.id})
+        self.assertEqual(ids['unknown'], set())
+        self.assertEqual(set(AudienceService.resolve_ids(self.gym, rules)['expiry']), ids['expiry'])
+
+    def test_checkin_buckets(self):
+        recent = self.member(last_check_in=self.checked_in(7))
+        lapsing = self.member(last_check_in=self.checked_in(8))
+        dormant = self.member(last_check_in=self.checked_in(45))
+        never = self.member()
+
+        resolved = AudienceService.resolve_ids(self.gym, {
+            bucket: AudienceService.checkin_bucket_q(bucket, self.today)
+            for bucket in ('recent', 'lapsing', 'inactive', 'dormant')
+        })
+
+        self.assertEqual(resolved['recent'], [recent.id])
+        self.assertEqual(resolved['lapsing'], [lapsing.id])
+        self.assertEqual(resolved['inactive'], [])
+        self.assertEqual(set(resolved['dormant']), {dormant.id, never.id})
@@ -0,0 +1,62 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.models import OutboundMessage
+from apps.gyms.models import Gym
+from apps.members.models import Member
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_reports_every_stage_and_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_communications', gyms=2, members=20, stdout=out)
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results['stages']), {'automations', 'renewal_reminders', 'daily_quotes', 'broadcasts'})
+        # 2 gyms x (2 expiring + 2 birthdays + 2 inactive)
+        self.assertEqual(results['stages']['automations']['messages'], 12)
+        self.assertEqual(results['stages']['renewal_reminders']['messages'], 4)
+        self.assertEqual(results['stages']['daily_quotes']['messages'], 40)
+        self.assertEqual(results['stages']['broadcasts']['sent'], 40)
+        for stage in results['stages'].values():
+            self.assertGreater(stage['messages_per_second'], 0)
+            self.assertGreater(stage['queries_per_message'], 0)
+            self.assertGreater(stage['peak_memory_kb'], 0)
+
+        self.assertFalse(Gym.objects.exists())
+        self.assertFalse(OutboundMessage.objects.exists())
+
+    def test_leaves_existing_gyms_and_queue_alone(self):
+        plan = SubscriptionPlan.objects.create(
+            name="Pro", slug="pro", price_monthly=1000, price_yearly=10000, has_whatsapp_integration=True,
+        )
+        gym = Gym.objects.create(name="Real Gym", email="r@gym.com", owner_name="Owner", subscription_plan=plan)
+        today = timezone.localdate()
+        # Expires in 3 days (renewal audience) and queues a welcome message
+        Member.objects.create(
+            gym=gym, name="Real Member", phone="9800000001", join_date=today,
+            membership_start=today, membership_expiry=today + timedelta(days=3),
+        )
+        queued = OutboundMessage.objects.get()
+
+        out = StringIO()
+        call_command('benchmark_communications', gyms=1, members=10, stdout=out)
+
+        stages = json.loads(out.getvalue())['stages']
+        self.assertEqual(stages['automations']['messages'], 3)
+        self.assertEqual(stages['renewal_reminders']['messages'], 1)
+        self.assertEqual(stages['daily_quotes']['messages'], 10)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundMessage.Status.QUEUED)
+
+    @override_settings(WHATSAPP_SIMULATION_MODE=False)
+    def test_refuses_to_send_for_real(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_communications', gyms=1, members=1, stdout=StringIO())
@@ -0,0 +1,175 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.models import Broadcast, BroadcastRecipient, OutboundMessage, WhatsAppMessageLog
+from apps.communications.services import BroadcastService, OutboundQueueService
+from apps.gyms.models import Gym
+from apps.leads.models import Lead
+from apps.members.models import Member
+from apps.users.models import GymUser
+
+
+class BroadcastServiceTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Broadcast Gym", email="b@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        today = timezone.now().date()
+
+        def member(phone, **kwargs):
+            return Member.objects.create(
+                gym=self.gym, name=f"Member {phone}", phone=phone, join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30), **kwargs
+            )
+
+        member("9100000001")
+        member("9100000002")
+        member("9100000003", status='expired')
+        member("9100000004", is_deleted=True)
+        # Same phone with stray whitespace collapses into one recipient
+        member(" 9100000001 ")
+
+    def create(self, audience='active_members', **kwargs):
+        with patch('apps.communications.services.run_in_background') as mock_dispatch, \
+                self.captureOnCommitCallbacks(execute=True):
+            broadcast = BroadcastService.create(self.gym, audience, "Hi {{name}}!", **kwargs)
+        return broadcast, mock_dispatch
+
+    def test_create_materializes_deduplicated_recipients(self):
+        broadcast, mock_dispatch = self.create()
+
+        self.assertEqual(broadcast.total_recipients, 2)
+        self.assertEqual(
+            sorted(broadcast.recipients.values_list('phone', flat=True)),
+            ["9100000001", "9100000002"],
+        )
+        mock_dispatch.assert_called_once()
+
+    def test_empty_audience_creates_nothing(self):
+        broadcast, mock_dispatch = self.create('leads_only')
+
+        self.assertIsNone(broadcast)
+        self.assertFalse(Broadcast.objects.exists())
+        mock_dispatch.assert_not_called()
+
+    def test_leads_have_no_member(self):
+        Lead.objects.create(gym=self.gym, name="Lead", phone="9200000000")
+        broadcast, _ = self.create('leads_only')
+
+        recipient = broadcast.recipients.get()
+        self.assertIsNone(recipient.member_id)
+
+    @patch('apps.communications.services.BROADCAST_BATCH_SIZE', 1)
+    def test_run_queues_in_batches_and_is_resumable(self):
+        broadcast, _ = self.create()
+
+        broadcast = BroadcastService.run(broadcast.id)
+
+        # Handed to the outbound queue behind transactional messages
+        self.assertEqual(broadcast.status, Broadcast.Status.RUNNING)
+        self.assertFalse(broadcast.recipients.filter(status=BroadcastRecipient.DeliveryStatus.PENDING).exists())
+        self.assertEqual(
+            set(OutboundMessage.objects.filter(broadcast_recipient__broadcast=broadcast).values_list('priority', flat=True)),
+            {OutboundMessage.Priority.PROMOTION},
+        )
+
+        OutboundQueueService.drain(workers=1)
+
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, Broadcast.Status.COMPLETED)
+        self.assertEqual((broadcast.sent_count, broadcast.failed_count), (2, 0))
+        self.assertFalse(broadcast.recipients.exclude(status=BroadcastRecipient.DeliveryStatus.SENT).exists())
+        self.assertEqual(
+            set(WhatsAppMessageLog.objects.filter(gym=self.gym).values_list('message', flat=True)),
+            {"Hi Member 9100000001!", "Hi Member 9100000002!"},
+        )
+
+        # Re-running after a crash never double-sends: the keys are already queued
+        broadcast.recipients.update(status=BroadcastRecipient.DeliveryStatus.PENDING)
+        Broadcast.objects.filter(id=broadcast.id).update(
+            status=Broadcast.Status.FAILED, sent_count=0, failed_count=0,
+        )
+        broadcast = BroadcastService.run(broadcast.id)
+        OutboundQueueService.drain(workers=1)
+        self.assertEqual(WhatsAppMessageLog.objects.filter(gym=self.gym).count(), 2)
+        self.assertEqual(broadcast.status, Broadcast.Status.COMPLETED)
+        self.assertEqual(broadcast.sent_count, 2)
+
+    def test_unknown_variables_are_rejected_before_writing(self):
+        from apps.communications.templating import TemplateError
+
+        with self.assertRaises(TemplateError):
+            BroadcastService.create(self.gym, 'active_members', "Hi {{nickname}}")
+        self.assertFalse(Broadcast.objects.exists())
+
+    def test_malformed_ids_are_rejected_before_writing(self):
+        from apps.communications.audiences import AudienceError
+
+        for key in ('plan_id', 'member_id'):
+            with self.assertRaises(AudienceError):
+                BroadcastService.create(self.gym, 'specific_plan', "Hi", audience_filter={key: "not-a-uuid"})
+        self.assertFalse(Broadcast.objects.exists())
+
+    def test_broadcast_view_reports_malformed_ids(self):
+        plan = SubscriptionPlan.objects.create(
+            name="Pro", slug="pro", price_monthly=1000, price_yearly=10000, has_whatsapp_integration=True,
+        )
+        Gym.objects.filter(id=self.gym.id).update(subscription_plan=plan)
+        owner = GymUser.objects.create_user("owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw')
+        self.client.force_login(owner)
+
+        response = self.client.post(
+            reverse('frontend:whatsapp-broadcast'),
+            {'audience': 'specific_member', 'member_id': "1; DROP", 'message': "Hi"},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Please select a valid member.", [str(m) for m in response.context['messages']])
+        self.assertFalse(Broadcast.objects.exists())
+
+    def test_leads_render_with_fallbacks(self):
+        Lead.objects.create(gym=self.gym, name="Lead", phone="9200000000")
+        with patch('apps.communications.services.run_in_background'):
+            broadcast = BroadcastService.create(self.gym, 'leads_only', "Hi {{name}}, ask about {{plan_name}}")
+
+        BroadcastService.run(broadcast.id)
+        OutboundQueueService.drain(workers=1)
+
+        log = WhatsAppMessageLog.objects.get(gym=self.gym)
+        self.assertEqual(log.message, "Hi Lead, ask about Your Plan")
+
+
+class BroadcastQueueHandoffTests(TransactionTestCase):
+    """The drain a batch kicks off must see its recipients as QUEUED (real commits, no test transaction)."""
+
+    def test_drain_kicked_by_a_batch_completes_the_broadcast(self):
+        from apps.communications.tasks import drain_outbound_queue
+
+        def run_now(task, *args):
+            # Drain synchronously, the moment the queue is kicked
+            if task is drain_outbound_queue:
+                OutboundQueueService.drain(workers=1)
+
+        with patch('apps.communications.services.run_in_background', side_effect=run_now):
+            gym = Gym.objects.create(
+                name="Handoff Gym", email="h@gym.com", owner_name="Owner", owner_phone="9000000000"
+            )
+            today = timezone.now().date()
+            for phone in ("9100000001", "9100000002", "9100000003"):
+                Member.objects.create(
+                    gym=gym, name=f"Member {phone}", phone=phone, join_date=today,
+                    membership_start=today, membership_expiry=today + timedelta(days=30),
+                )
+
+            broadcast = BroadcastService.create(gym, 'active_members', "Hi {{name}}!")
+            broadcast = BroadcastService.run(broadcast.id)
+
+        self.assertEqual(broadcast.status, Broadcast.Status.COMPLETED)
+        self.assertEqual((broadcast.sent_count, broadcast.total_recipients), (3, 3))
+        self.assertFalse(broadcast.recipients.exclude(status=BroadcastRecipient.DeliveryStatus.SENT).exists())
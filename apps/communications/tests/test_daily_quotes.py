@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.models import OutboundMessage, Quote, WhatsAppMessage
+from apps.communications.services import OutboundQueueService
+from apps.gyms.models import Gym
+from apps.members.models import Member
+
+
+class DailyQuoteFanOutTests(TestCase):
+    def setUp(self):
+        pro = SubscriptionPlan.objects.create(
+            name="Pro", slug="pro", price_monthly=1000, price_yearly=10000, has_whatsapp_integration=True
+        )
+        basic = SubscriptionPlan.objects.create(
+            name="Basic", slug="basic", price_monthly=500, price_yearly=5000, has_whatsapp_integration=False
+        )
+        self.gym = Gym.objects.create(
+            name="Pro Gym", email="pro@gym.com", owner_name="Owner", subscription_plan=pro
+        )
+        self.other_gym = Gym.objects.create(
+            name="Second Pro Gym", email="pro2@gym.com", owner_name="Owner", subscription_plan=pro
+        )
+        self.basic_gym = Gym.objects.create(
+            name="Basic Gym", email="basic@gym.com", owner_name="Owner", subscription_plan=basic
+        )
+        self.today = timezone.localdate()
+        self.old_quote = Quote.objects.create(content="Old", last_sent=self.today - timedelta(days=1))
+        self.quote = Quote.objects.create(content="Never sent")
+
+        phones = iter(range(9100000000, 9100000100))
+        for gym, count in ((self.gym, 4), (self.other_gym, 2), (self.basic_gym, 2)):
+            for _ in range(count):
+                phone = str(next(phones))
+                Member.objects.create(
+                    gym=gym, name=f"Member {phone}", phone=phone, join_date=self.today,
+                    membership_start=self.today, membership_expiry=self.today + timedelta(days=30),
+                )
+        Member.objects.create(
+            gym=self.gym, name="Expired", phone="9199999999", status='expired', join_date=self.today,
+            membership_start=self.today, membership_expiry=self.today,
+        )
+
+    def run_command(self, **options):
+        """Queue the quotes, then let the outbound queue worker send them."""
+        out = StringIO()
+        call_command('send_daily_quotes', stdout=out, **options)
+        OutboundQueueService.drain(workers=3, per_lane=2, rate=0)
+        return out.getvalue()
+
+    def quotes_sent(self):
+        # Welcome messages from member creation are not quotes
+        return WhatsAppMessage.objects.filter(message_type=WhatsAppMessage.MessageType.PROMOTION)
+
+    def test_respects_plan_opt_outs_and_already_sent(self):
+        opted_out = Member.objects.filter(gym=self.gym, status='active').first()
+        opted_out.whatsapp_opt_out = True
+        opted_out.save()
+
+        out = self.run_command()
+
+        expected = set(
+            Member.objects.filter(gym__in=[self.gym, self.other_gym], status='active', whatsapp_opt_out=False)
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(set(self.quotes_sent().values_list('member_id', flat=True)), expected)
+        self.assertIn("Successfully queued 5 daily quotes", out)
+
+        # The least recently sent quote was picked and marked
+        self.quote.refresh_from_db()
+        self.assertEqual(self.quote.last_sent, self.today)
+
+        # A second run the same day sends nothing new
+        out = self.run_command()
+        self.assertIn("Successfully queued 0 daily quotes", out)
+        self.assertEqual(self.quotes_sent().count(), 5)
+        self.assertEqual(
+            OutboundMessage.objects.filter(priority=OutboundMessage.Priority.PROMOTION).count(), 5
+        )
+
+    def test_shards_split_gyms_and_share_the_quote(self):
+        self.run_command(shards=2, shard=0)
+        self.run_command(shards=2, shard=1)
+
+        # Every pro gym landed in exactly one shard, and both sent the same quote
+        self.assertEqual(self.quotes_sent().count(), 6)
+        self.assertEqual(self.quotes_sent().filter(content__contains="Never sent").count(), 6)
+
+    def test_invalid_shard(self):
+        with self.assertRaises(CommandError):
+            self.run_command(shards=2, shard=2)
@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from apps.communications.delivery import DeliveryStatusService, build_status_payload
+from apps.communications.models import WhatsAppMessage, WhatsAppMessageLog, WhatsAppStatusEvent
+from apps.communications.services import WhatsAppService
+from apps.gyms.models import Gym
+
+Status = WhatsAppMessage.DeliveryStatus
+
+
+APP_SECRET = 's3cret'
+
+
+@override_settings(META_WHATSAPP_APP_SECRET=APP_SECRET)
+class DeliveryStatusTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Status Gym", email="s@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        for wa_id in ("wamid.1", "wamid.2", "wamid.3"):
+            WhatsAppMessage.objects.create(
+                gym=self.gym, recipient_phone="919100000000", content="Hi",
+                wa_message_id=wa_id, status=Status.SENT,
+            )
+
+    def post(self, payload, signed=True, **headers):
+        body = json.dumps(payload)
+        if signed:
+            headers.setdefault(
+                'HTTP_X_HUB_SIGNATURE_256',
+                'sha256=' + hmac.new(APP_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest(),
+            )
+        with patch('apps.communications.delivery.run_in_background'), \
+                self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/webhooks/whatsapp/', body, content_type='application/json', **headers)
+
+    def status_of(self, wa_id):
+        return WhatsAppMessage.objects.get(wa_message_id=wa_id).status
+
+    def test_webhook_stages_events_and_acknowledges(self):
+        response = self.post(build_status_payload([("wamid.1", "delivered"), ("wamid.2", "typing")]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(WhatsAppStatusEvent.objects.values_list('wa_message_id', 'status')), [
+            ("wamid.1", "delivered"),
+        ])
+        # Nothing applied until the batch runs
+        self.assertEqual(self.status_of("wamid.1"), Status.SENT)
+
+    def test_batch_applies_in_one_update_and_never_regresses(self):
+        self.post(build_status_payload([
+            ("wamid.1", "delivered"),
+            ("wamid.1", "read"),
+            ("wamid.2", "failed", "Message undeliverable"),
+            ("wamid.3", "delivered"),
+            ("wamid.unknown", "read"),
+        ]))
+        # A late 'delivered' must not overwrite 'read'
+        WhatsAppMessage.objects.filter(wa_message_id="wamid.3").update(status=Status.READ)
+
+        # One batch (SELECT, a CASE UPDATE per message table, DELETE in a savepoint), then an empty SELECT
+        with self.assertNumQueries(9):
+            totals = DeliveryStatusService.apply_pending()
+
+        self.assertEqual(totals['events'], 5)
+        self.assertEqual(totals['updated'], 2)
+        self.assertEqual(self.status_of("wamid.1"), Status.READ)
+        self.assertEqual(self.status_of("wamid.2"), Status.FAILED)
+        self.assertEqual(self.status_of("wamid.3"), Status.READ)
+        self.assertIn("Message undeliverable", WhatsAppMessage.objects.get(wa_message_id="wamid.2").error_message)
+        self.assertFalse(WhatsAppStatusEvent.objects.exists())
+
+    def test_large_bursts_apply_in_batches(self):
+        self.post(build_status_payload([("wamid.1", "delivered"), ("wamid.2", "delivered"), ("wamid.3", "read")]))
+
+        totals = DeliveryStatusService.apply_pending(batch_size=2)
+
+        self.assertEqual(totals['events'], 3)
+        self.assertEqual(
+            sorted(WhatsAppMessage.objects.values_list('status', flat=True)),
+            [Status.DELIVERED, Status.DELIVERED, Status.READ],
+        )
+
+    def test_text_sends_keep_their_message_id_and_receive_statuses(self):
+        WhatsAppService().send_whatsapp_message("9100000001", "Hi", gym=self.gym)
+        WhatsAppService().send_whatsapp_message("9100000002", "Hi", gym=self.gym)
+        delivered, failed = WhatsAppMessageLog.objects.order_by('phone')
+        self.assertEqual(delivered.wa_message_id, f"sim_{delivered.id}")
+
+        self.post(build_status_payload([
+            (delivered.wa_message_id, "delivered"),
+            (failed.wa_message_id, "failed", "Message undeliverable"),
+        ]))
+        DeliveryStatusService.apply_pending()
+
+        delivered.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(delivered.status, Status.DELIVERED)
+        self.assertEqual(failed.status, Status.FAILED)
+        self.assertIn("Message undeliverable", failed.response)
+
+    def test_non_object_payload_is_a_bad_request(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post({"entry": ["x", {"changes": [1]}]}).status_code, 200)
+        self.assertFalse(WhatsAppStatusEvent.objects.exists())
+
+    def test_signature_is_required_when_secret_is_set(self):
+        payload = build_status_payload([("wamid.1", "delivered")])
+        self.assertEqual(self.post(payload, signed=False).status_code, 403)
+        self.assertEqual(self.post(payload, HTTP_X_HUB_SIGNATURE_256='sha256=forged').status_code, 403)
+
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WhatsAppStatusEvent.objects.count(), 1)
+
+    @override_settings(META_WHATSAPP_APP_SECRET='', DEBUG=False)
+    def test_unsigned_post_is_rejected_without_a_secret(self):
+        response = self.post(build_status_payload([("wamid.1", "delivered")]), signed=False)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(WhatsAppStatusEvent.objects.exists())
+
+    @override_settings(META_WHATSAPP_APP_SECRET='', DEBUG=True, WHATSAPP_SIMULATION_MODE=True)
+    def test_unsigned_post_is_accepted_in_local_simulation(self):
+        response = self.post(build_status_payload([("wamid.1", "delivered")]), signed=False)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WhatsAppStatusEvent.objects.count(), 1)
+
+    @override_settings(META_WHATSAPP_WEBHOOK_VERIFY_TOKEN='verify-me')
+    def test_subscription_handshake(self):
+        params = {'hub.mode': 'subscribe', 'hub.verify_token': 'verify-me', 'hub.challenge': '1158201444'}
+        response = self.client.get('/webhooks/whatsapp/', params)
+        self.assertEqual(response.content, b'1158201444')
+
+        params['hub.verify_token'] = 'wrong'
+        self.assertEqual(self.client.get('/webhooks/whatsapp/', params).status_code, 403)
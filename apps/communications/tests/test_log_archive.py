@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.archive import WhatsAppLogArchiveService
+from apps.communications.models import WhatsAppLogArchive, WhatsAppMessageLog
+from apps.core.pagination import InvalidCursor, keyset_paginate
+from apps.gyms.models import Gym
+from apps.users.models import GymUser
+
+ORDERING = ('-created_at', '-id')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Log Gym", email="l@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        now = timezone.now()
+        logs = [
+            WhatsAppMessageLog(gym=self.gym, phone=f"91{i:010d}", message=f"Message {i}", status='sent')
+            for i in range(7)
+        ]
+        WhatsAppMessageLog.objects.bulk_create(logs)
+        # Two rows share a timestamp: the id tie-breaker must keep them apart
+        for i, log in enumerate(logs):
+            log.created_at = now - timedelta(minutes=min(i, 5))
+        WhatsAppMessageLog.objects.bulk_update(logs, ['created_at'])
+        self.logs = WhatsAppMessageLog.objects.filter(gym=self.gym)
+        self.expected = list(self.logs.order_by(*ORDERING).values_list('id', flat=True))
+
+    def test_walks_every_row_once_in_both_directions(self):
+        seen, pages, page = [], [], keyset_paginate(self.logs, ORDERING, 3)
+        while True:
+            pages.append(page)
+            seen += [log.id for log in page]
+            if not page.has_next:
+                break
+            page = keyset_paginate(self.logs, ORDERING, 3, after=page.next_cursor)
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = keyset_paginate(self.logs, ORDERING, 3, before=pages[-1].previous_cursor)
+        self.assertEqual([log.id for log in back], self.expected[3:6])
+        self.assertTrue(back.has_previous and back.has_next)
+
+    def test_deep_pages_read_one_page(self):
+        cursor = keyset_paginate(self.logs, ORDERING, 5).next_cursor
+        with self.assertNumQueries(1):
+            page = keyset_paginate(self.logs, ORDERING, 5, after=cursor)
+        self.assertEqual([log.id for log in page], self.expected[5:])
+
+    def test_rejects_garbage_cursors(self):
+        for cursor in ("not-base64!", "WzFd", "WyJ4IiwgIngiXQ"):
+            with self.assertRaises(InvalidCursor):
+                keyset_paginate(self.logs, ORDERING, 3, after=cursor)
+
+
+class WhatsAppLogsViewTests(TestCase):
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(
+            name="Pro", slug="pro", price_monthly=1000, price_yearly=10000, has_whatsapp_integration=True
+        )
+        self.gym = Gym.objects.create(name="View Gym", email="v@gym.com", owner_name="Owner", subscription_plan=plan)
+        owner = GymUser.objects.create_user("owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw')
+        self.client.force_login(owner)
+        WhatsAppMessageLog.objects.bulk_create([
+            WhatsAppMessageLog(gym=self.gym, phone=f"91{i:010d}", message="Hi", status='sent') for i in range(60)
+        ])
+
+    def test_pages_with_cursors(self):
+        url = reverse('frontend:whatsapp-logs')
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['messages']), 50)
+        self.assertTrue(first.context['page'].has_next)
+
+        second = self.client.get(url, {'after': first.context['page'].next_cursor})
+        self.assertEqual(len(second.context['messages']), 10)
+        self.assertFalse(second.context['page'].has_next)
+
+        # A mangled cursor falls back to the first page
+        self.assertEqual(len(self.client.get(url, {'after': 'junk'}).context['messages']), 50)
+
+
+class LogArchiveTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.gym = Gym.objects.create(
+            name="Archive Gym", email="a@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        now = timezone.now()
+        # Every month before the cutoff's month ends at least 211 days ago
+        ages = [400, 399, 370, 250, 10]
+        logs = [
+            WhatsAppMessageLog(gym=self.gym, phone=f"91{i:010d}", message=f"Old {i}", status='sent',
+                               automation_type='birthday')
+            for i in range(len(ages))
+        ]
+        WhatsAppMessageLog.objects.bulk_create(logs)
+        for log, days in zip(logs, ages):
+            log.created_at = now - timedelta(days=days)
+        WhatsAppMessageLog.objects.bulk_update(logs, ['created_at'])
+
+    def test_moves_expired_logs_to_monthly_gzip_files(self):
+        archives = WhatsAppLogArchiveService.archive(retention_days=180, chunk_size=1)
+
+        self.assertEqual(sum(a.row_count for a in archives), 4)
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 1)
+        self.assertEqual(WhatsAppLogArchive.objects.count(), len(archives))
+        self.assertTrue(all(a.file.name.startswith(f"whatsapp_archives/{self.gym.id}/") for a in archives))
+        self.assertTrue(all(a.file.name.endswith(".jsonl.gz") for a in archives))
+
+        rows = [row for a in archives for row in WhatsAppLogArchiveService.iter_rows(a)]
+        self.assertEqual(sorted(row['message'] for row in rows), ["Old 0", "Old 1", "Old 2", "Old 3"])
+        self.assertEqual({row['automation_type'] for row in rows}, {'birthday'})
+
+        # Nothing left to archive
+        self.assertEqual(WhatsAppLogArchiveService.archive(retention_days=180), [])
+
+    def test_command_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_whatsapp_logs', days=180, dry_run=True, stdout=out)
+
+        self.assertIn("Would archive 4 logs", out.getvalue())
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 5)
+        self.assertFalse(WhatsAppLogArchive.objects.exists())
+
+    def test_daily_runs_archive_each_month_once(self):
+        WhatsAppMessageLog.objects.all().delete()
+        for day in (date(2026, 3, 15), date(2026, 4, 10), date(2026, 4, 28)):
+            log = WhatsAppMessageLog.objects.create(gym=self.gym, phone="919100000000", message=f"{day}")
+            WhatsAppMessageLog.objects.filter(id=log.id).update(
+                created_at=timezone.make_aware(datetime.combine(day, time(12))),
+            )
+        real_localdate = timezone.localdate
+
+        def archive_on(today):
+            with mock.patch(
+                'django.utils.timezone.localdate',
+                side_effect=lambda value=None, *args: real_localdate(value, *args) if value else today,
+            ):
+                return WhatsAppLogArchiveService.archive(retention_days=180)
+
+        # 180 days back is 2026-04-20: April is still partly inside the window
+        self.assertEqual([a.month for a in archive_on(date(2026, 10, 17))], [date(2026, 3, 1)])
+        self.assertEqual([a.month for a in archive_on(date(2026, 10, 25))], [])
+        april = archive_on(date(2026, 11, 2))
+
+        self.assertEqual([(a.month, a.row_count) for a in april], [(date(2026, 4, 1), 2)])
+        self.assertEqual(WhatsAppLogArchive.objects.filter(gym=self.gym).count(), 2)
+        self.assertFalse(WhatsAppMessageLog.objects.exists())
@@ -0,0 +1,87 @@
+from django.test import TestCase
+
+from apps.communications import log_writer as log_writer_module
+from apps.communications.log_writer import BufferedLogWriter
+from apps.communications.models import WhatsAppMessageLog
+from apps.communications.services import WhatsAppService
+from apps.gyms.models import Gym
+
+
+class BufferedLogWriterTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Log Gym", email="log@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+
+    def log(self, i):
+        return WhatsAppMessageLog(gym=self.gym, phone=f"91900000{i:04d}", message=f"Hello {i}")
+
+    def test_flushes_every_n_rows(self):
+        writer = BufferedLogWriter(max_batch=3, max_delay_ms=60_000)
+        with self.assertNumQueries(1):
+            for i in range(5):
+                writer.add(self.log(i))
+
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 3)
+        self.assertEqual(len(writer), 2)
+
+        writer.close()
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 5)
+        self.assertEqual(len(writer), 0)
+
+    def test_flushes_when_oldest_row_is_stale(self):
+        writer = BufferedLogWriter(max_batch=100, max_delay_ms=0)
+        writer.add(self.log(1))
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 1)
+
+    def test_context_manager_flushes_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with BufferedLogWriter(max_batch=100, max_delay_ms=60_000) as writer:
+                writer.add(self.log(1))
+                raise RuntimeError("send loop crashed")
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 1)
+
+    def test_saved_rows_are_bulk_updated(self):
+        rows = [self.log(i) for i in range(3)]
+        WhatsAppMessageLog.objects.bulk_create(rows)
+
+        with BufferedLogWriter(max_batch=100, max_delay_ms=60_000) as writer:
+            for row in rows:
+                row.status = WhatsAppMessageLog.DeliveryStatus.SENT
+                row.message = "not part of update_fields"
+                writer.add(row, update_fields=['status'])
+
+        self.assertEqual(
+            WhatsAppMessageLog.objects.filter(status=WhatsAppMessageLog.DeliveryStatus.SENT).count(), 3
+        )
+        self.assertFalse(WhatsAppMessageLog.objects.filter(message="not part of update_fields").exists())
+
+    def test_unflushed_rows_are_written_at_exit(self):
+        writer = BufferedLogWriter(max_batch=100, max_delay_ms=60_000)
+        writer.add(self.log(1))
+        self.assertIn(writer, log_writer_module._open_writers)
+
+        log_writer_module._flush_open_writers()
+
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 1)
+        self.assertNotIn(writer, log_writer_module._open_writers)
+
+    def test_service_buffers_keyed_sends_after_claiming(self):
+        writer = BufferedLogWriter(max_batch=100, max_delay_ms=60_000)
+        service = WhatsAppService(log_writer=writer)
+
+        service.send_whatsapp_message("9100000001", "Hi", gym=self.gym, idempotency_key="k1")
+        service.send_whatsapp_message("9100000002", "Hi", gym=self.gym)
+
+        # The idempotency claim is written immediately; the outcome waits
+        claim = WhatsAppMessageLog.objects.get()
+        self.assertEqual(claim.status, WhatsAppMessageLog.DeliveryStatus.PENDING)
+        self.assertEqual(
+            service.send_whatsapp_message("9100000001", "Hi", gym=self.gym, idempotency_key="k1")['status'],
+            'skipped',
+        )
+
+        writer.close()
+        self.assertEqual(
+            WhatsAppMessageLog.objects.filter(status=WhatsAppMessageLog.DeliveryStatus.SENT).count(), 2
+        )
@@ -0,0 +1,230 @@
+import uuid
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.communications.models import OutboundMessage, WhatsAppMessage, WhatsAppMessageLog
+from apps.communications.services import OutboundQueueService
+from apps.communications.usage import WhatsAppUsageService
+from apps.gyms.models import Gym
+
+Priority = OutboundMessage.Priority
+Status = OutboundMessage.Status
+
+
+@override_settings(WHATSAPP_QUEUE_RETRY_BASE_SECONDS=30, WHATSAPP_QUEUE_RETRY_MAX_SECONDS=3600)
+class OutboundQueueTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Queue Gym", email="q@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+
+    def text(self, phone, priority=Priority.TRANSACTIONAL, **kwargs):
+        return OutboundQueueService.text_message(phone, f"Hi {phone}", gym=self.gym, priority=priority, **kwargs)
+
+    def drain(self):
+        return OutboundQueueService.drain(workers=1, rate=0)
+
+    def test_enqueue_skips_known_keys(self):
+        first = OutboundQueueService.enqueue([self.text("9100000001", idempotency_key="k1")])
+        again = OutboundQueueService.enqueue([
+            self.text("9100000001", idempotency_key="k1"),
+            self.text("9100000002", idempotency_key="k2"),
+            self.text("9100000002", idempotency_key="k2"),
+        ])
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual([m.idempotency_key for m in again], ["k2"])
+        self.assertEqual(OutboundMessage.objects.count(), 2)
+
+    def test_claims_by_priority_and_never_twice(self):
+        OutboundQueueService.enqueue([
+            self.text("9100000001", Priority.PROMOTION),
+            self.text("9100000002", Priority.OTP),
+            self.text("9100000003", Priority.TRANSACTIONAL),
+        ])
+
+        claimed = OutboundQueueService.claim(limit=2)
+
+        self.assertEqual([m.priority for m in claimed], [Priority.OTP, Priority.TRANSACTIONAL])
+        self.assertTrue(all(m.status == Status.SENDING for m in claimed))
+        self.assertEqual([m.priority for m in OutboundQueueService.claim(limit=5)], [Priority.PROMOTION])
+        self.assertEqual(OutboundQueueService.claim(limit=5), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        OutboundQueueService.enqueue([self.text("9100000001")])
+        OutboundQueueService.claim()
+        OutboundMessage.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(len(OutboundQueueService.claim()), 1)
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_failures_back_off_then_dead_letter(self, mock_send):
+        mock_send.return_value = {"status": "failed", "error": "timeout", "status_code": None}
+        OutboundQueueService.enqueue([self.text("9100000001", idempotency_key="k1")])
+        OutboundMessage.objects.update(max_attempts=2)
+
+        before = timezone.now()
+        self.assertEqual(self.drain()['retrying'], 1)
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (Status.RETRYING, 1))
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+        self.assertLess(message.next_attempt_at, before + timedelta(seconds=60))
+        # Not due yet
+        self.assertEqual(self.drain(), {})
+
+        OutboundMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain()['dead'], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), (Status.DEAD, 2, "timeout"))
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_client_errors_are_dead_lettered_immediately(self, mock_send):
+        mock_send.return_value = {"status": "failed", "error": "Bad Request", "status_code": 400}
+        OutboundQueueService.enqueue([self.text("9100000001")])
+
+        self.assertEqual(self.drain()['dead'], 1)
+        self.assertEqual(OutboundMessage.objects.get().attempts, 1)
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_throttling_is_retried(self, mock_send):
+        mock_send.side_effect = [
+            {"status": "failed", "error": "Too Many Requests", "status_code": 429},
+            {"status": "success"},
+        ]
+        OutboundQueueService.enqueue([self.text("9100000001")])
+
+        self.assertEqual(self.drain()['retrying'], 1)
+        OutboundMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain()['sent'], 1)
+        message = OutboundMessage.objects.get()
+        self.assertEqual(message.status, Status.SENT)
+        self.assertIsNotNone(message.sent_at)
+
+    def test_retry_delay_is_capped(self):
+        self.assertLess(OutboundQueueService.retry_delay(1), 34)
+        self.assertGreaterEqual(OutboundQueueService.retry_delay(20), 3600)
+        self.assertLessEqual(OutboundQueueService.retry_delay(20), 3960)
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_rate_limit_is_per_sender_number(self, mock_send):
+        mock_send.return_value = {"status": "success"}
+        OutboundQueueService.enqueue([
+            self.text("9100000001", phone_number_id="sender-a"),
+            self.text("9100000002", phone_number_id="sender-a"),
+            self.text("9100000003", phone_number_id="sender-b"),
+        ])
+
+        buckets = {}
+        with patch('apps.communications.services.TokenBucket', side_effect=lambda rate: MagicMock()) as bucket_class:
+            OutboundQueueService.process(OutboundQueueService.claim(), workers=1, rate=5, buckets=buckets)
+
+        self.assertEqual(set(buckets), {"sender-a", "sender-b"})
+        self.assertEqual(bucket_class.call_count, 2)
+        bucket_class.assert_called_with(5)
+        self.assertEqual(buckets["sender-a"].acquire.call_count, 2)
+        self.assertEqual(OutboundMessage.objects.filter(status=Status.SENT).count(), 3)
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_each_outcome_is_saved_before_the_next_send(self, mock_send):
+        seen = []
+
+        def send(**kwargs):
+            seen.append(sorted(OutboundMessage.objects.values_list('status', flat=True)))
+            return {"status": "success"}
+
+        mock_send.side_effect = send
+        OutboundQueueService.enqueue([self.text("9100000001"), self.text("9100000002")])
+
+        self.assertEqual(self.drain()['sent'], 2)
+        self.assertEqual(seen, [[Status.SENDING, Status.SENDING], [Status.SENDING, Status.SENT]])
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_outcome_of_a_reclaimed_message_is_dropped(self, mock_send):
+        mock_send.return_value = {"status": "success"}
+        OutboundQueueService.enqueue([self.text("9100000001")])
+        messages = OutboundQueueService.claim()
+        # The lease ran out and another worker claimed it
+        OutboundMessage.objects.update(claim_token=uuid.uuid4())
+
+        self.assertEqual(OutboundQueueService.process(messages, workers=1, rate=0), {'lost': 1})
+        self.assertEqual(OutboundMessage.objects.get().status, Status.SENDING)
+
+    def test_leases_of_unsent_messages_are_renewed(self):
+        OutboundQueueService.enqueue([self.text("9100000001"), self.text("9100000002")])
+        claimed = OutboundQueueService.claim()
+        OutboundMessage.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        OutboundMessage.objects.filter(id=claimed[0].id).update(status=Status.SENT)
+
+        self.assertEqual(OutboundQueueService.renew_leases({claimed[0].claim_token}), 1)
+        self.assertEqual(OutboundQueueService.claim(), [])
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_interrupted_attempts_resume_from_their_log_row(self, mock_send):
+        mock_send.return_value = {"status": "success"}
+        OutboundQueueService.enqueue([
+            self.text("9100000001", idempotency_key="k1"),
+            self.text("9100000002", idempotency_key="k2"),
+        ])
+        # A worker died after claiming both log rows: k1 before sending it,
+        # k2 after sending it but before saving the queue outcome
+        WhatsAppMessageLog.objects.create(gym=self.gym, phone="919100000001", message="Hi", idempotency_key="k1")
+        WhatsAppMessageLog.objects.create(
+            gym=self.gym, phone="919100000002", message="Hi", idempotency_key="k2", status='sent',
+        )
+
+        self.assertEqual(self.drain()['sent'], 2)
+        mock_send.assert_called_once()
+        self.assertEqual(mock_send.call_args.kwargs['claimed_log'].idempotency_key, "k1")
+        self.assertEqual(WhatsAppMessageLog.objects.count(), 2)
+        self.assertFalse(OutboundMessage.objects.exclude(status=Status.SENT).exists())
+
+
+@override_settings(WHATSAPP_SIMULATION_MODE=False, WHATSAPP_QUEUE_RETRY_BASE_SECONDS=30)
+class OutboundQueueLoggingTests(TestCase):
+    """Retried template sends keep one claimed log row per queued message."""
+
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Log Gym", email="l@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        OutboundQueueService.enqueue([OutboundQueueService.template_message(
+            "9100000001", "gym_welcome_message", gym=self.gym, message_type='welcome',
+            idempotency_key="welcome:1",
+        )])
+
+    def drain_attempts(self, *responses):
+        with patch('apps.core.transport.HttpTransport.request', side_effect=responses):
+            for _ in responses:
+                OutboundMessage.objects.update(next_attempt_at=timezone.now())
+                OutboundQueueService.drain(workers=1, rate=0)
+
+    def usage(self):
+        totals = WhatsAppUsageService.totals(self.gym, timezone.localdate())
+        return totals['sent'], totals['failed']
+
+    def test_success_after_retries_logs_one_sent_row(self):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"messages": [{"id": "wamid.1"}]}
+
+        self.drain_attempts(requests.ConnectionError("down"), requests.ConnectionError("down"), response)
+
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (Status.SENT, 3))
+        log = WhatsAppMessage.objects.get()
+        self.assertEqual((log.status, log.wa_message_id, log.idempotency_key), ('sent', 'wamid.1', 'welcome:1'))
+        self.assertEqual(self.usage(), (1, 0))
+
+    def test_dead_letter_fails_the_one_log_row(self):
+        OutboundMessage.objects.update(max_attempts=2)
+
+        self.drain_attempts(requests.ConnectionError("down"), requests.ConnectionError("down"))
+
+        self.assertEqual(OutboundMessage.objects.get().status, Status.DEAD)
+        log = WhatsAppMessage.objects.get()
+        self.assertEqual((log.status, log.idempotency_key), ('failed', None))
+        self.assertIn("down", log.error_message)
+        self.assertEqual(self.usage(), (0, 1))
@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.communications.templating import TemplateError, compile_template
+from apps.gyms.models import Gym
+from apps.members.models import Member, MembershipPlan
+from apps.users.models import GymUser
+
+
+class CompiledTemplateTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Iron House", email="iron@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.plan = MembershipPlan.objects.create(
+            gym=self.gym, name="Quarterly", duration_months=3, price=2500
+        )
+        self.trainer = GymUser.objects.create_user(
+            "coach", "9000000001", "Coach Ravi", gym=self.gym, role='trainer', password='pw'
+        )
+        self.today = timezone.now().date()
+
+        for i, trainer in enumerate([self.trainer, None, self.trainer]):
+            Member.objects.create(
+                gym=self.gym, name=f"Member {i}", phone=f"910000000{i}",
+                membership_plan=self.plan, assigned_trainer=trainer,
+                join_date=self.today, membership_start=self.today,
+                membership_expiry=self.today + timedelta(days=5),
+            )
+
+    def test_unknown_placeholders_fail_at_compile_time(self):
+        with self.assertRaisesMessage(TemplateError, "{{coupon}}"):
+            compile_template("Hi {{name}}, use {{coupon}} today")
+
+    def test_renders_values_rows(self):
+        template = compile_template("Hi {{ name }}, {{days_left}} days left on {{plan_name}} ({{expiry_date}}).")
+        row = {
+            'name': "Asha",
+            'membership_expiry': date(2025, 1, 10),
+            'membership_plan__name': "Monthly",
+        }
+
+        rendered = template.render_many([row], self.gym, today=date(2025, 1, 7))
+
+        self.assertEqual(rendered, ["Hi Asha, 3 days left on Monthly (10 Jan 2025)."])
+
+    def test_missing_values_fall_back(self):
+        template = compile_template("{{name}}|{{plan_name}}|{{expiry_date}}|{{days_left}}|{{trainer_name}}|{{gym_name}}")
+
+        rendered = template.render_many([{}], self.gym)
+
+        self.assertEqual(rendered, ["Member|Your Plan|Soon|0|your trainer|Iron House"])
+
+    def test_plain_text_needs_no_fields(self):
+        template = compile_template("Ping!")
+        self.assertEqual(template.fields, [])
+        self.assertEqual(template.render_many([{}], self.gym), ["Ping!"])
+
+    def test_instances_render_in_one_query(self):
+        template = compile_template("{{name}} trains with {{trainer_name}} on {{plan_name}}")
+        self.assertEqual(template.related, ['assigned_trainer', 'membership_plan'])
+
+        with self.assertNumQueries(1):
+            members = list(
+                Member.objects.filter(gym=self.gym).select_related(*template.related).order_by('name')
+            )
+            rendered = template.render_many(members, self.gym)
+
+        self.assertEqual(rendered, [
+            "Member 0 trains with Coach Ravi on Quarterly",
+            "Member 1 trains with your trainer on Quarterly",
+            "Member 2 trains with Coach Ravi on Quarterly",
+        ])
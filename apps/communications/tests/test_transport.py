@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from urllib3.exceptions import ConnectTimeoutError
+
+from apps.communications.models import WhatsAppMessageLog
+from apps.communications.services import WhatsAppService
+from apps.core.transport import RETRY_STATUSES, get_transport
+from apps.gyms.models import Gym
+
+
+class HttpTransportTests(TestCase):
+    def test_transport_is_shared_per_provider(self):
+        self.assertIs(get_transport('test-provider'), get_transport('test-provider'))
+        self.assertIsNot(get_transport('test-provider'), get_transport('other-provider'))
+
+    def test_retries_throttling_but_not_read_timeouts(self):
+        adapter = get_transport('test-retry', max_retries=2).session.get_adapter('https://graph.facebook.com')
+        retry = adapter.max_retries
+        self.assertEqual(retry.status, 2)
+        self.assertEqual(retry.read, 0)
+        self.assertIn(429, RETRY_STATUSES)
+        self.assertIn('POST', retry.allowed_methods)
+
+    def test_posts_are_only_resent_when_throttled(self):
+        retry = get_transport('test-retry-post').session.get_adapter('https://graph.facebook.com').max_retries
+
+        self.assertTrue(retry.is_retry('POST', 429))
+        # The Graph API may have accepted the message before failing
+        self.assertFalse(retry.is_retry('POST', 500))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertTrue(retry.increment('POST', '/messages', error=ConnectTimeoutError()).connect < retry.connect)
+
+
+@override_settings(WHATSAPP_SIMULATION_MODE=False)
+class WhatsAppServiceTransportTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Transport Gym", email="t@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+
+    def test_sends_reuse_pooled_session(self):
+        response = MagicMock(status_code=200, text='{"messages": [{"id": "wamid.1"}]}')
+        response.json.return_value = {"messages": [{"id": "wamid.1"}]}
+
+        with patch('apps.core.transport.HttpTransport.request', return_value=response) as mock_request:
+            first = WhatsAppService()
+            second = WhatsAppService()
+            first.send_whatsapp_message("9876543210", "Hi", gym=self.gym)
+            second.send_whatsapp_message("9876543211", "Hi", gym=self.gym)
+
+        self.assertIs(first.transport, second.transport)
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(
+            WhatsAppMessageLog.objects.filter(gym=self.gym, status='sent').count(), 2
+        )
@@ -0,0 +1,157 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.billing.models import SubscriptionPlan
+from apps.communications.delivery import DeliveryStatusService
+from apps.communications.log_writer import BufferedLogWriter
+from apps.communications.models import WhatsAppMessage, WhatsAppMessageLog, WhatsAppUsageDaily
+from apps.communications.services import WhatsAppService
+from apps.communications.usage import WhatsAppUsageService
+from apps.gyms.models import Gym
+from apps.users.models import GymUser
+
+
+def usage(gym):
+    return {
+        row.message_type: (row.sent, row.failed, row.cost_inr)
+        for row in WhatsAppUsageDaily.objects.filter(gym=gym, date=timezone.localdate())
+    }
+
+
+@override_settings(WHATSAPP_SIMULATION_MODE=True)
+class UsageRollupTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Usage Gym", email="u@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+
+    def test_sends_are_rolled_up_as_they_are_logged(self):
+        service = WhatsAppService()
+        service.send_whatsapp_message("9100000001", "Hi", gym=self.gym, automation_type='birthday')
+        service.send_whatsapp_message("9100000002", "Hi", gym=self.gym, automation_type='birthday',
+                                      idempotency_key="k1")
+        service.send_whatsapp_message("9100000003", "Hi", gym=self.gym)
+        # Duplicate key: skipped, never counted
+        service.send_whatsapp_message("9100000002", "Hi", gym=self.gym, automation_type='birthday',
+                                      idempotency_key="k1")
+
+        self.assertEqual(usage(self.gym), {
+            'birthday': (2, 0, Decimal('0')),
+            'custom': (1, 0, Decimal('0')),
+        })
+
+    def test_buffered_writer_rolls_up_on_flush(self):
+        with BufferedLogWriter(max_batch=100, max_delay_ms=60_000) as writer:
+            service = WhatsAppService(log_writer=writer)
+            for phone in ("9100000001", "9100000002"):
+                service.send_template_message(phone, "promo", gym=self.gym, message_type='promotion')
+            self.assertEqual(usage(self.gym), {})
+
+        self.assertEqual(usage(self.gym), {'promotion': (2, 0, Decimal('0'))})
+
+    def test_increments_cost_and_failures(self):
+        rows = [
+            WhatsAppMessage(gym=self.gym, recipient_phone="1", content="x", message_type='welcome',
+                            status=WhatsAppMessage.DeliveryStatus.SENT, cost_inr=Decimal('0.8')),
+            WhatsAppMessage(gym=self.gym, recipient_phone="2", content="x", message_type='welcome',
+                            status=WhatsAppMessage.DeliveryStatus.FAILED),
+            WhatsAppMessage(gym=self.gym, recipient_phone="3", content="x", message_type='welcome',
+                            status=WhatsAppMessage.DeliveryStatus.PENDING),
+        ]
+        WhatsAppMessage.objects.bulk_create(rows)
+
+        WhatsAppUsageService.record(rows)
+        WhatsAppUsageService.record(rows[:1])
+
+        self.assertEqual(usage(self.gym), {'welcome': (2, 1, Decimal('1.6'))})
+
+    def test_rebuild_matches_incremental_rollup(self):
+        service = WhatsAppService()
+        service.send_whatsapp_message("9100000001", "Hi", gym=self.gym, automation_type='birthday')
+        service.send_template_message("9100000002", "welcome", gym=self.gym, message_type='welcome')
+        WhatsAppMessage.objects.filter(gym=self.gym).update(cost_inr=Decimal('0.8'))
+        expected = {'birthday': (1, 0, Decimal('0')), 'welcome': (1, 0, Decimal('0.8'))}
+
+        out = StringIO()
+        call_command('rebuild_whatsapp_usage', stdout=out)
+
+        self.assertIn("Rebuilt 2 WhatsApp usage rows", out.getvalue())
+        self.assertEqual(usage(self.gym), expected)
+
+    def test_rebuild_after_delivery_receipts_matches_incremental_rollup(self):
+        service = WhatsAppService()
+        for phone in ("9100000001", "9100000002", "9100000003"):
+            service.send_template_message(phone, "welcome", gym=self.gym, message_type='welcome')
+        # A send the API rejected
+        WhatsAppUsageService.record([WhatsAppMessage.objects.create(
+            gym=self.gym, recipient_phone="9100000004", content="x", message_type='welcome',
+            status=WhatsAppMessage.DeliveryStatus.FAILED,
+        )])
+        delivered, read, undeliverable = WhatsAppMessage.objects.filter(
+            gym=self.gym, wa_message_id__isnull=False,
+        ).order_by('recipient_phone').values_list('wa_message_id', flat=True)
+        DeliveryStatusService.apply({
+            delivered: ('delivered', ''),
+            read: ('read', ''),
+            undeliverable: ('failed', 'Message undeliverable'),
+        })
+        incremental = usage(self.gym)
+        self.assertEqual(incremental, {'welcome': (3, 1, Decimal('0'))})
+
+        WhatsAppUsageService.rebuild_day(timezone.localdate())
+
+        self.assertEqual(usage(self.gym), incremental)
+
+    def test_trend_is_zero_filled(self):
+        today = timezone.localdate()
+        WhatsAppUsageDaily.objects.create(gym=self.gym, date=today - timedelta(days=2), message_type='welcome',
+                                          sent=3, cost_inr=Decimal('2.4'))
+        WhatsAppUsageDaily.objects.create(gym=self.gym, date=today - timedelta(days=2), message_type='birthday',
+                                          sent=1, failed=1, cost_inr=Decimal('0.8'))
+
+        trend = WhatsAppUsageService.get_trend(self.gym, days=30)
+
+        self.assertEqual(len(trend), 30)
+        self.assertEqual(trend[-1]['date'], today)
+        self.assertEqual((trend[-3]['sent'], trend[-3]['failed'], trend[-3]['cost_inr']), (4, 1, Decimal('3.2')))
+        self.assertEqual(trend[-1]['sent'], 0)
+
+
+class WhatsAppDashboardTests(TestCase):
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(
+            name="Pro", slug="pro", price_monthly=1000, price_yearly=10000, has_whatsapp_integration=True
+        )
+        self.gym = Gym.objects.create(
+            name="Dash Gym", email="d@gym.com", owner_name="Owner", subscription_plan=plan
+        )
+        owner = GymUser.objects.create_user(
+            "owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw'
+        )
+        self.client.force_login(owner)
+        today = timezone.localdate()
+        WhatsAppUsageDaily.objects.create(gym=self.gym, date=today, message_type='welcome',
+                                          sent=5, failed=2, cost_inr=Decimal('4'))
+        WhatsAppUsageDaily.objects.create(gym=self.gym, date=today - timedelta(days=60), message_type='birthday',
+                                          sent=7, cost_inr=Decimal('5.6'))
+
+    def test_dashboard_reads_the_rollup(self):
+        with patch.object(WhatsAppMessageLog.objects, 'filter', side_effect=AssertionError("scanned logs")):
+            response = self.client.get(reverse('frontend:whatsapp-dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_sent_today'], 5)
+        self.assertEqual(response.context['failed_count_today'], 2)
+        self.assertEqual(response.context['spend']['total_cost'], Decimal('4'))
+        self.assertEqual(len(response.context['spend']['trend']), 30)
+
+        response = self.client.get(reverse('frontend:whatsapp-dashboard'), {'days': '90'})
+        self.assertEqual(response.context['spend']['total_cost'], Decimal('9.6'))
+        self.assertEqual([row['message_type'] for row in response.context['spend']['by_type']], ['birthday', 'welcome'])
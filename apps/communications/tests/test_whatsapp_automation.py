@@ -7,8 +7,9 @@ from django.core.management import call_command
 from apps.gyms.models import Gym
 from apps.billing.models import SubscriptionPlan
 from apps.members.models import Member, MembershipPlan
-from apps.communications.models import WhatsAppAutomation, WhatsAppMessageLog
-from apps.communications.services import WhatsAppService
+from apps.communications.models import OutboundMessage, WhatsAppAutomation, WhatsAppMessageLog
+from apps.communications.services import OutboundQueueService, WhatsAppService
+from apps.communications.throttling import TokenBucket
 from unittest.mock import patch, MagicMock
 
 class WhatsAppAutomationTests(TestCase):
@@ -58,6 +59,11 @@ class WhatsAppAutomationTests(TestCase):
             status='active'
         )
 
+    def run_automations(self, stdout=None, workers=1, **drain_options):
+        """Run the command, then let the outbound queue worker send what it queued."""
+        call_command('run_whatsapp_automations', stdout=stdout or StringIO())
+        return OutboundQueueService.drain(workers=workers, **drain_options)
+
     @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
     def test_automation_filtering_logic(self, mock_send):
         """Test that members matching rules are found correctly"""
@@ -72,8 +78,7 @@ class WhatsAppAutomationTests(TestCase):
 
         mock_send.return_value = {"status": "success", "message_id": "test_123"}
 
-        out = StringIO()
-        call_command('run_whatsapp_automations', stdout=out)
+        self.run_automations()
         
         # Verify
         mock_send.assert_called_once()
@@ -103,15 +108,59 @@ class WhatsAppAutomationTests(TestCase):
             member=self.member1,
             phone=self.member1.phone,
             message="Ping!",
-            status='sent'
+            status='sent',
+            automation_type=auto_expiry.type,
+            idempotency_key=auto_expiry.idempotency_key(self.member1.id, self.today),
         )
         
         out = StringIO()
-        call_command('run_whatsapp_automations', stdout=out)
+        with self.assertNumQueries(5):
+            # gyms, automations, already-sent set, targets and the final
+            # last_run_at update - independent of member count
+            call_command('run_whatsapp_automations', stdout=out)
         
         # Assert send wasn't called because it was skipped
         mock_send.assert_not_called()
 
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_manual_message_does_not_block_automation(self, mock_send):
+        """Only the same automation counts as a duplicate, not any message that day."""
+        WhatsAppAutomation.objects.create(
+            gym=self.gym_pro,
+            type=WhatsAppAutomation.AutomationType.EXPIRY_REMINDER,
+            enabled=True,
+            days_before=3,
+            template="Ping!"
+        )
+        WhatsAppMessageLog.objects.create(
+            gym=self.gym_pro, member=self.member1, phone=self.member1.phone,
+            message="Manual broadcast", status='sent'
+        )
+        mock_send.return_value = {"status": "success"}
+
+        self.run_automations()
+
+        mock_send.assert_called_once()
+        self.assertEqual(mock_send.call_args.kwargs['automation_type'], 'expiry_reminder')
+
+    def test_idempotency_key_blocks_second_send(self):
+        """Re-running the same send with its key never produces a second message."""
+        service = WhatsAppService()
+        key = f"auto:expiry_reminder:{self.member1.id}:{self.today.isoformat()}"
+
+        first = service.send_whatsapp_message(
+            self.member1.phone, "Hi", gym=self.gym_pro, member=self.member1,
+            automation_type='expiry_reminder', idempotency_key=key,
+        )
+        second = service.send_whatsapp_message(
+            self.member1.phone, "Hi", gym=self.gym_pro, member=self.member1,
+            automation_type='expiry_reminder', idempotency_key=key,
+        )
+
+        self.assertEqual(first['status'], 'success')
+        self.assertEqual(second['status'], 'skipped')
+        self.assertEqual(WhatsAppMessageLog.objects.filter(idempotency_key=key).count(), 1)
+
     @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
     def test_pro_plan_restriction(self, mock_send):
         """Test that gyms without the integration flag are ignored."""
@@ -129,8 +178,80 @@ class WhatsAppAutomationTests(TestCase):
             status='active'
         )
         
-        out = StringIO()
-        call_command('run_whatsapp_automations', stdout=out)
+        self.run_automations()
         
         # Basic gym should be skipped
         mock_send.assert_not_called()
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_concurrent_run_sends_each_member_once(self, mock_send):
+        """Sends fan out over the worker pool; every target is messaged once."""
+        auto = WhatsAppAutomation.objects.create(
+            gym=self.gym_pro,
+            type=WhatsAppAutomation.AutomationType.EXPIRY_REMINDER,
+            enabled=True,
+            days_before=3,
+            template="Hi {{name}}"
+        )
+        for i in range(6):
+            Member.objects.create(
+                gym=self.gym_pro, name=f"Member {i}", phone=f"90000000{i:02d}",
+                membership_plan=self.mplan, join_date=self.today,
+                membership_start=self.today, membership_expiry=self.target_expiry,
+                status='active'
+            )
+        mock_send.return_value = {"status": "success"}
+
+        out = StringIO()
+        self.run_automations(stdout=out, workers=4, per_lane=3, rate=0)
+
+        phones = sorted(call.kwargs['phone'] for call in mock_send.call_args_list)
+        self.assertEqual(len(phones), 7)
+        self.assertEqual(len(set(phones)), 7)
+        self.assertIn("Queued: 7", out.getvalue())
+        self.assertFalse(OutboundMessage.objects.exclude(status=OutboundMessage.Status.SENT).exists())
+        auto.refresh_from_db()
+        self.assertIsNotNone(auto.last_run_at)
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_template_variables_are_rendered(self, mock_send):
+        WhatsAppAutomation.objects.create(
+            gym=self.gym_pro,
+            type=WhatsAppAutomation.AutomationType.EXPIRY_REMINDER,
+            enabled=True,
+            days_before=3,
+            template="Hi {{name}}, {{plan_name}} ends in {{days_left}} days"
+        )
+        mock_send.return_value = {"status": "success"}
+
+        self.run_automations()
+
+        self.assertEqual(mock_send.call_args.kwargs['message'], "Hi John Doe, Monthly ends in 3 days")
+
+    @patch('apps.communications.services.WhatsAppService.send_whatsapp_message')
+    def test_invalid_template_is_skipped(self, mock_send):
+        WhatsAppAutomation.objects.create(
+            gym=self.gym_pro,
+            type=WhatsAppAutomation.AutomationType.EXPIRY_REMINDER,
+            enabled=True,
+            days_before=3,
+            template="Hi {{nme}}"
+        )
+        out = StringIO()
+
+        self.run_automations(stdout=out)
+
+        mock_send.assert_not_called()
+        self.assertIn("Invalid template", out.getvalue())
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_throttle(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        self.assertTrue(all(bucket.try_acquire() for _ in range(100)))
@@ -0,0 +1,50 @@
+"""
+Communications Throttling - thread-safe rate limiting for outbound providers.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket shared between sender threads: refills `rate` tokens per
+    second and allows bursts of up to `capacity`. A rate of 0 disables
+    limiting.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(self.rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` if available right now. Returns True on success."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
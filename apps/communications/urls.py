@@ -0,0 +1,11 @@
+"""Communications URL routes - Meta webhooks."""
+
+from django.urls import path
+
+from apps.communications import views
+
+app_name = 'communications'
+
+urlpatterns = [
+    path('whatsapp/', views.WhatsAppWebhookView.as_view(), name='whatsapp-webhook'),
+]
@@ -0,0 +1,192 @@
+"""
+Communications Usage - the WhatsAppUsageDaily rollup of WhatsApp volume and
+spend. Message and log rows are folded in as they are written (see
+WhatsAppService._write_log and BufferedLogWriter.flush), so dashboards read
+a few rollup rows per day instead of scanning the message logs.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import WhatsAppAutomation, WhatsAppMessage, WhatsAppMessageLog, WhatsAppUsageDaily
+
+logger = logging.getLogger(__name__)
+
+DeliveryStatus = WhatsAppMessage.DeliveryStatus
+# The rollup counts send outcomes: "sent" once the API accepted a message,
+# "failed" when the send itself failed. Delivery receipts applied later
+# (delivered, read, or a failure reported for an accepted message, which
+# keeps its wa_message_id) never move a row between the two, so
+# rebuild_day() and the incremental record() agree.
+SENT_STATUSES = (DeliveryStatus.SENT, DeliveryStatus.DELIVERED, DeliveryStatus.READ)
+FAILED = DeliveryStatus.FAILED
+MANUAL_TYPE = WhatsAppMessage.MessageType.CUSTOM
+TYPE_LABELS = {
+    **dict(WhatsAppMessage.MessageType.choices),
+    **dict(WhatsAppAutomation.AutomationType.choices),
+}
+
+
+def _outcome(row):
+    """'sent' or 'failed' for a finished message / log row, else None."""
+    if row.status in SENT_STATUSES or (row.status == FAILED and getattr(row, 'wa_message_id', None)):
+        return 'sent'
+    if row.status == FAILED:
+        return 'failed'
+    return None
+
+
+def _outcome_filters():
+    """(sent, failed) Q objects selecting the rows _outcome() classifies that way."""
+    accepted = Q(wa_message_id__isnull=False) & ~Q(wa_message_id='')
+    return Q(status__in=SENT_STATUSES) | (Q(status=FAILED) & accepted), Q(status=FAILED) & ~accepted
+
+
+def _usage_key(row):
+    """(gym_id, local date, message_type) for a finished message row, else None."""
+    if isinstance(row, WhatsAppMessage):
+        message_type = row.message_type
+    elif isinstance(row, WhatsAppMessageLog):
+        message_type = row.automation_type or MANUAL_TYPE
+    else:
+        return None
+    if _outcome(row) is None or not row.gym_id:
+        return None
+    return row.gym_id, timezone.localdate(row.created_at or timezone.now()), message_type
+
+
+class WhatsAppUsageService:
+    """Maintains and reads the WhatsAppUsageDaily rollup."""
+
+    @staticmethod
+    def record(rows):
+        """
+        Add just-written WhatsAppMessage / WhatsAppMessageLog rows to the
+        rollup: one increment per (gym, day, type) touched, however many rows
+        there are. Other models and unfinished rows are ignored. Returns the
+        number of rollup rows touched.
+        """
+        deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+        for row in rows:
+            key = _usage_key(row)
+            if key is None:
+                continue
+            delta = deltas[key]
+            if _outcome(row) == 'sent':
+                delta[0] += 1
+            else:
+                delta[1] += 1
+            delta[2] += Decimal(str(getattr(row, 'cost_inr', 0) or 0))
+
+        for (gym_id, day, message_type), (sent, failed, cost) in deltas.items():
+            WhatsAppUsageService._increment(gym_id, day, message_type, sent, failed, cost)
+        return len(deltas)
+
+    @staticmethod
+    def _increment(gym_id, day, message_type, sent, failed, cost):
+        """Atomic F() increment, creating the row on first use."""
+        row = WhatsAppUsageDaily.objects.filter(gym_id=gym_id, date=day, message_type=message_type)
+        increments = dict(
+            sent=F('sent') + sent,
+            failed=F('failed') + failed,
+            cost_inr=F('cost_inr') + cost,
+            updated_at=timezone.now(),
+        )
+        if row.update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                WhatsAppUsageDaily.objects.create(
+                    gym_id=gym_id, date=day, message_type=message_type,
+                    sent=sent, failed=failed, cost_inr=cost,
+                )
+        except IntegrityError:
+            # Another writer created it first
+            row.update(**increments)
+
+    @staticmethod
+    def rebuild_day(day, gyms=None):
+        """
+        Recompute the rollup for `day` from the message tables (backfill or
+        drift repair), replacing that day's rows for `gyms` (default: all).
+        Returns the number of rollup rows written.
+        """
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = start + timedelta(days=1)
+        gym_filter = Q() if gyms is None else Q(gym_id__in=list(gyms.values_list('id', flat=True)))
+
+        totals = defaultdict(lambda: [0, 0, Decimal('0')])
+        sources = (
+            (WhatsAppMessage, 'message_type', dict(cost=Sum('cost_inr'))),
+            (WhatsAppMessageLog, 'automation_type', {}),
+        )
+        for model, type_field, extra in sources:
+            sent, failed = _outcome_filters()
+            for row in model.objects.filter(
+                sent | failed, gym_filter, created_at__gte=start, created_at__lt=end,
+            ).order_by().values('gym_id', type_field).annotate(
+                sent=Count('id', filter=sent), failed=Count('id', filter=failed), **extra,
+            ):
+                total = totals[(row['gym_id'], row[type_field] or MANUAL_TYPE)]
+                total[0] += row['sent']
+                total[1] += row['failed']
+                total[2] += row.get('cost') or 0
+
+        objs = [
+            WhatsAppUsageDaily(
+                gym_id=gym_id, date=day, message_type=message_type,
+                sent=sent, failed=failed, cost_inr=cost,
+            )
+            for (gym_id, message_type), (sent, failed, cost) in totals.items()
+        ]
+        with transaction.atomic():
+            WhatsAppUsageDaily.objects.filter(gym_filter, date=day).delete()
+            WhatsAppUsageDaily.objects.bulk_create(objs, batch_size=500)
+        logger.info(f"Rebuilt WhatsApp usage for {day}: {len(objs)} rows")
+        return len(objs)
+
+    @staticmethod
+    def totals(gym, since, until=None):
+        """Sent, failed and cost_inr summed over [since, until] (default: through today)."""
+        rows = WhatsAppUsageDaily.objects.filter(gym=gym, date__gte=since, date__lte=until or timezone.localdate())
+        result = rows.aggregate(sent=Sum('sent'), failed=Sum('failed'), cost_inr=Sum('cost_inr'))
+        return {key: value or 0 for key, value in result.items()}
+
+    @staticmethod
+    def get_trend(gym, days=30):
+        """
+        One dict per day for the last `days` days (oldest first, zero-filled):
+        date, sent, failed and cost_inr across all message types.
+        """
+        today = timezone.localdate()
+        since = today - timedelta(days=days - 1)
+        by_day = {
+            row['date']: row
+            for row in WhatsAppUsageDaily.objects.filter(gym=gym, date__gte=since).order_by().values('date').annotate(
+                sent=Sum('sent'), failed=Sum('failed'), cost_inr=Sum('cost_inr'),
+            )
+        }
+        return [
+            by_day.get(day, {'date': day, 'sent': 0, 'failed': 0, 'cost_inr': Decimal('0')})
+            for day in (since + timedelta(days=offset) for offset in range(days))
+        ]
+
+    @staticmethod
+    def by_type(gym, days=30):
+        """
+        Per-message-type sent, failed and cost_inr (plus a display `label`)
+        for the last `days` days, costliest first.
+        """
+        since = timezone.localdate() - timedelta(days=days - 1)
+        rows = list(WhatsAppUsageDaily.objects.filter(gym=gym, date__gte=since).order_by().values('message_type').annotate(
+            sent=Sum('sent'), failed=Sum('failed'), cost_inr=Sum('cost_inr'),
+        ).order_by('-cost_inr', '-sent'))
+        for row in rows:
+            row['label'] = TYPE_LABELS.get(row['message_type'], row['message_type'])
+        return rows
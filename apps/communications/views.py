@@ -0,0 +1,67 @@
+"""
+Communications Views - Meta WhatsApp webhook.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .delivery import DeliveryStatusService
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WhatsAppWebhookView(View):
+    """
+    GET answers Meta's subscription handshake. POST receives delivery-status
+    callbacks: events are staged with one insert and applied in batches in
+    the background, so the request is acknowledged immediately.
+    """
+
+    def get(self, request):
+        token = settings.META_WHATSAPP_WEBHOOK_VERIFY_TOKEN
+        if (
+            request.GET.get('hub.mode') == 'subscribe'
+            and token
+            and hmac.compare_digest(request.GET.get('hub.verify_token', ''), token)
+        ):
+            return HttpResponse(request.GET.get('hub.challenge', ''), content_type='text/plain')
+        return HttpResponseForbidden()
+
+    def post(self, request):
+        if not self._signature_valid(request):
+            return HttpResponseForbidden()
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return HttpResponseBadRequest()
+        if not isinstance(payload, dict):
+            return HttpResponseBadRequest()
+
+        count = DeliveryStatusService.record(payload)
+        logger.debug(f"Staged {count} WhatsApp status events")
+        return HttpResponse(status=200)
+
+    def _signature_valid(self, request):
+        """
+        Check X-Hub-Signature-256 against META_WHATSAPP_APP_SECRET. Without a
+        secret every POST is rejected, except in local development (DEBUG
+        with WHATSAPP_SIMULATION_MODE) where unsigned test callbacks are
+        accepted.
+        """
+        secret = settings.META_WHATSAPP_APP_SECRET
+        if not secret:
+            if settings.DEBUG and getattr(settings, 'WHATSAPP_SIMULATION_MODE', True):
+                return True
+            logger.warning("Rejected WhatsApp webhook POST: META_WHATSAPP_APP_SECRET is not configured")
+            return False
+        expected = 'sha256=' + hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(request.headers.get('X-Hub-Signature-256', ''), expected)
@@ -0,0 +1,34 @@
+"""
+Core Background - dispatch long-running jobs off the request thread.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('apps.core.background')
+
+
+def run_in_background(task, *args):
+    """
+    Run a Celery `task` with `args`: through the broker when
+    BACKGROUND_TASKS_USE_CELERY is on, otherwise (or when the broker is
+    unreachable) on an in-process daemon thread. Call it after the rows the
+    task reads are committed, e.g. from transaction.on_commit.
+    """
+    if settings.BACKGROUND_TASKS_USE_CELERY:
+        try:
+            task.delay(*args)
+            return
+        except Exception as e:
+            logger.warning(f"Celery unavailable for {task.name}, running in-process: {e}")
+
+    def target():
+        try:
+            task(*args)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=target, name=task.name, daemon=True).start()
@@ -0,0 +1,126 @@
+"""
+Core Pagination - keyset (cursor) pagination for large, append-mostly tables.
+
+OFFSET pagination reads and throws away every row before the page, so deep
+pages get slower as a table grows. A keyset page instead starts right after
+the last row the client saw: `WHERE (created_at, id) < (:ts, :id)`, which an
+index on the ordering columns answers directly however deep the page is.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """A cursor that was tampered with or built for a different ordering."""
+
+
+def _cursor_value(value):
+    # Full precision: DjangoJSONEncoder would truncate datetimes to milliseconds
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(obj, ordering):
+    """Opaque, URL-safe cursor for the position of `obj` (instance or values() dict) in `ordering`."""
+    get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+    values = [_cursor_value(get(field.lstrip('-'))) for field in ordering]
+    raw = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Field values encoded in `cursor`, converted back to Python types."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor(cursor)
+    try:
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except Exception:
+        raise InvalidCursor(cursor)
+
+
+def _beyond(ordering, values, forward):
+    """
+    Q for rows strictly after `values` in `ordering` (before them when not
+    `forward`): (a > x) OR (a = x AND b > y) OR ..., flipped per descending field.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class KeysetPage:
+    """One page of rows plus the cursors to its neighbours (None at either end)."""
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def keyset_paginate(queryset, ordering, page_size, after=None, before=None):
+    """
+    The page of `queryset` (sorted by `ordering`, which must end in a unique
+    field such as 'id') that follows the `after` cursor, or precedes the
+    `before` cursor. With neither, the first page. Raises InvalidCursor for
+    cursors that cannot be decoded.
+
+    Only `page_size + 1` rows are read, so the cost is independent of depth.
+    """
+    ordering = list(ordering)
+    forward = before is None
+    cursor = after if forward else before
+
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(_beyond(ordering, values, forward))
+    scan_order = ordering
+    if not forward:
+        # Walk backwards from the cursor, then restore the display order
+        scan_order = [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+
+    rows = list(queryset.order_by(*scan_order)[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows)
+    first, last = encode_cursor(rows[0], ordering), encode_cursor(rows[-1], ordering)
+    if forward:
+        return KeysetPage(rows, next_cursor=last if more else None, previous_cursor=first if cursor else None)
+    return KeysetPage(rows, next_cursor=last, previous_cursor=first if more else None)
@@ -0,0 +1,94 @@
+"""
+Core Transport - pooled, retrying HTTP sessions shared by outbound providers
+(WhatsApp Cloud API, OpenAI, ...).
+
+One keep-alive `requests.Session` per provider avoids a fresh TCP + TLS
+handshake per call; urllib3's pool is thread-safe, so sender threads share it.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Throttling and transient upstream errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# The only statuses a POST is resent on: the request was refused, not acted on
+POST_RETRY_STATUSES = (429,)
+
+
+class SendSafeRetry(Retry):
+    """
+    Retry that resends non-idempotent requests (POST) only on
+    POST_RETRY_STATUSES. A 5xx can come after the server accepted the
+    message; those are left to the caller's idempotent retry path (the
+    outbound queue).
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() not in Retry.DEFAULT_ALLOWED_METHODS and status_code not in POST_RETRY_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class HttpTransport:
+    """
+    Keep-alive HTTP client with a bounded connection pool and retry/backoff.
+
+    Retries cover connection errors before the request was sent and
+    RETRY_STATUSES (honouring Retry-After; POST_RETRY_STATUSES for a POST),
+    never read timeouts or other mid-request errors: a POST that reached the
+    server may have been acted on, and resending it could duplicate a
+    message.
+    """
+
+    def __init__(self, pool_maxsize=10, max_retries=3, backoff_factor=0.5, timeout=10):
+        self.timeout = timeout
+        retry = SendSafeRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            other=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'POST'}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name, **options):
+    """
+    Process-wide shared transport for a provider. `options` (HttpTransport
+    arguments) only apply when the transport is first created.
+    """
+    transport = _transports.get(name)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(name)
+            if transport is None:
+                transport = _transports[name] = HttpTransport(**options)
+    return transport
@@ -1,9 +1,11 @@
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import OuterRef, Subquery, Sum
 from datetime import date
 from decimal import Decimal
 
-from apps.enterprises.models import RoyaltyLedger, Organization
+from apps.enterprises.models import RoyaltyLedger, Organization, Brand, HoldingCompany
+from apps.gyms.models import Gym, GymDailyMetrics
+from apps.gyms.services import GymMetricsService
 from apps.members.models import Member
 # Assuming a Payment model exists or we use Member.amount_paid for simplicity in Phase 3
 # Ideally, we should query a Transaction/Payment model. 
@@ -69,3 +71,103 @@ class RoyaltyService:
             ledger = RoyaltyService.generate_ledger_for_month(org, year, month)
             results.append(ledger)
         return results
+
+
+# Holding -> Brand -> Organization -> Gym, as (level name, GymDailyMetrics path field)
+HIERARCHY_LEVELS = (
+    ('holding', 'holding_company'),
+    ('brand', 'brand'),
+    ('organization', 'organization'),
+    ('gym', 'gym'),
+)
+
+
+class HierarchyRollupService:
+    @staticmethod
+    def get_tree(scope):
+        """
+        Consolidated rollup tree below a HoldingCompany, Brand or Organization.
+
+        Every GymDailyMetrics row carries its hierarchy path, so all gyms in
+        scope are read in ONE statement: today's rows (member snapshot and
+        current path) with each gym's month-to-date revenue summed by gym in
+        a subquery. A gym moved between organizations this month therefore
+        counts once, under its current parent, with all of its revenue.
+        Subtotals for every brand/organization node are then folded up from
+        those leaf rows in Python.
+
+        Returns a node dict: {id, name, level, stats, children}, where stats
+        holds gyms, active_gyms, total_members, active_members, revenue_mtd.
+        """
+        if isinstance(scope, HoldingCompany):
+            level, gym_filter = 'holding', {'organization__brand__holding_company': scope}
+        elif isinstance(scope, Brand):
+            level, gym_filter = 'brand', {'organization__brand': scope}
+        elif isinstance(scope, Organization):
+            level, gym_filter = 'organization', {'organization': scope}
+        else:
+            raise ValueError(f"Unsupported rollup scope: {scope!r}")
+
+        # Backfill any day of the month the scheduled refresh missed (and
+        # today) before summing, so month-to-date revenue has no gaps
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        GymMetricsService.ensure_days(Gym.objects.filter(**gym_filter), month_start, today)
+
+        field = dict(HIERARCHY_LEVELS)[level]
+        revenue_mtd = GymDailyMetrics.objects.filter(
+            gym=OuterRef('gym'), date__gte=month_start, date__lte=today,
+        ).order_by().values('gym').annotate(total=Sum('revenue')).values('total')
+        rows = GymDailyMetrics.objects.filter(**{field: scope}, date=today).values(
+            'holding_company_id', 'holding_company__name',
+            'brand_id', 'brand__name',
+            'organization_id', 'organization__name',
+            'gym_id', 'gym__name', 'gym__city', 'gym__is_active',
+            'total_members', 'active_members',
+        ).annotate(revenue_mtd=Subquery(revenue_mtd))
+
+        def new_node(node_id, name, node_level):
+            return {
+                'id': node_id,
+                'name': name,
+                'level': node_level,
+                'stats': {
+                    'gyms': 0,
+                    'active_gyms': 0,
+                    'total_members': 0,
+                    'active_members': 0,
+                    'revenue_mtd': Decimal('0.00'),
+                },
+                'children': {},
+            }
+
+        root = new_node(scope.id, scope.name, level)
+        levels = [name for name, _ in HIERARCHY_LEVELS]
+        below = HIERARCHY_LEVELS[levels.index(level) + 1:]
+
+        for row in rows:
+            path = [root]
+            for node_level, path_field in below:
+                children = path[-1]['children']
+                node_id = row[f'{path_field}_id']
+                if node_id not in children:
+                    children[node_id] = new_node(node_id, row[f'{path_field}__name'], node_level)
+                path.append(children[node_id])
+            path[-1]['city'] = row['gym__city']
+
+            for node in path:
+                stats = node['stats']
+                stats['gyms'] += 1
+                stats['active_gyms'] += 1 if row['gym__is_active'] else 0
+                stats['total_members'] += row['total_members'] or 0
+                stats['active_members'] += row['active_members'] or 0
+                stats['revenue_mtd'] += row['revenue_mtd'] or 0
+
+        def finalize(node):
+            node['children'] = sorted(
+                (finalize(child) for child in node['children'].values()),
+                key=lambda child: child['name'] or '',
+            )
+            return node
+
+        return finalize(root)
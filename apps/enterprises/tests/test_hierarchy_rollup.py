@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.enterprises.models import Brand, HoldingCompany, Organization
+from apps.enterprises.services import HierarchyRollupService
+from apps.gyms.models import Gym, GymDailyMetrics
+from apps.gyms.services import GymMetricsService
+from apps.members.models import Member
+
+
+class HierarchyRollupTests(TestCase):
+    def setUp(self):
+        self.holding = HoldingCompany.objects.create(
+            name="FitGroup", contact_email="hq@fit.com", contact_phone="9000000000"
+        )
+        self.brand_a = Brand.objects.create(holding_company=self.holding, name="Alpha", brand_code="ALPHA")
+        self.brand_b = Brand.objects.create(holding_company=self.holding, name="Beta", brand_code="BETA")
+        self.org_a = Organization.objects.create(
+            brand=self.brand_a, name="Alpha Jaipur", owner_name="A", owner_email="a@fit.com", owner_phone="9000000001"
+        )
+        self.org_b = Organization.objects.create(
+            brand=self.brand_b, name="Beta Pune", owner_name="B", owner_email="b@fit.com", owner_phone="9000000002"
+        )
+        self.today = timezone.localdate()
+
+        def gym(name, org, phone):
+            return Gym.objects.create(
+                name=name, email=f"{phone}@gym.com", owner_name="Owner", owner_phone=phone, organization=org
+            )
+
+        self.gym_a1 = gym("Alpha One", self.org_a, "9100000001")
+        self.gym_a2 = gym("Alpha Two", self.org_a, "9100000002")
+        self.gym_b1 = gym("Beta One", self.org_b, "9100000003")
+
+        def member(g, phone, **kwargs):
+            return Member.objects.create(
+                gym=g, name=f"Member {phone}", phone=phone, join_date=self.today,
+                membership_start=self.today, membership_expiry=self.today + timedelta(days=30),
+                **kwargs
+            )
+
+        member(self.gym_a1, "9200000001", amount_paid=1000)
+        member(self.gym_a1, "9200000002", amount_paid=500, status='expired')
+        member(self.gym_a2, "9200000003", amount_paid=700)
+        member(self.gym_b1, "9200000004", amount_paid=2000)
+
+    def test_tree_totals(self):
+        tree = HierarchyRollupService.get_tree(self.holding)
+
+        self.assertEqual(tree['stats']['gyms'], 3)
+        self.assertEqual(tree['stats']['total_members'], 4)
+        self.assertEqual(tree['stats']['active_members'], 3)
+        self.assertEqual(tree['stats']['revenue_mtd'], 4200)
+
+        alpha, beta = tree['children']
+        self.assertEqual(alpha['name'], "Alpha")
+        self.assertEqual(alpha['stats']['total_members'], 3)
+        self.assertEqual(alpha['stats']['revenue_mtd'], 2200)
+        self.assertEqual(beta['stats']['total_members'], 1)
+
+        org = alpha['children'][0]
+        self.assertEqual(org['level'], 'organization')
+        self.assertEqual([g['name'] for g in org['children']], ["Alpha One", "Alpha Two"])
+
+    def test_rollup_read_is_one_statement(self):
+        GymMetricsService.ensure_days(Gym.objects.all(), self.today.replace(day=1))
+        # gym id lookup + existing-row check + the rollup read
+        with self.assertNumQueries(3):
+            HierarchyRollupService.get_tree(self.holding)
+
+    def test_organization_scope(self):
+        tree = HierarchyRollupService.get_tree(self.org_a)
+
+        self.assertEqual(tree['level'], 'organization')
+        self.assertEqual(tree['stats']['gyms'], 2)
+        self.assertEqual(tree['children'][0]['level'], 'gym')
+
+    @mock.patch('django.utils.timezone.localdate', return_value=date(2026, 3, 15))
+    def test_missing_days_are_backfilled(self, _localdate):
+        Member.objects.create(
+            gym=self.gym_a1, name="Early Joiner", phone="9200000009", amount_paid=900,
+            join_date=date(2026, 3, 2), membership_start=date(2026, 3, 2), membership_expiry=date(2026, 4, 2),
+        )
+
+        tree = HierarchyRollupService.get_tree(self.org_a)
+
+        self.assertEqual(tree['stats']['revenue_mtd'], 900)
+        self.assertEqual(GymDailyMetrics.objects.filter(gym=self.gym_a1).count(), 15)
+
+    @mock.patch('django.utils.timezone.localdate', return_value=date(2026, 3, 15))
+    def test_moved_gym_counts_once_under_current_parent(self, _localdate):
+        # Beta One sat under Alpha Jaipur earlier this month
+        GymDailyMetrics.objects.create(
+            gym=self.gym_b1, date=date(2026, 3, 10), revenue=300,
+            organization=self.org_a, brand=self.brand_a, holding_company=self.holding,
+        )
+
+        tree = HierarchyRollupService.get_tree(self.holding)
+
+        self.assertEqual(tree['stats']['gyms'], 3)
+        alpha, beta = tree['children']
+        self.assertEqual(alpha['stats']['gyms'], 2)
+        self.assertEqual(alpha['stats']['revenue_mtd'], 0)
+        self.assertEqual(beta['stats']['revenue_mtd'], 300)
+        self.assertEqual(HierarchyRollupService.get_tree(self.org_b)['stats']['revenue_mtd'], 300)
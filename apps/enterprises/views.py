@@ -2,10 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from apps.enterprises.models import HoldingCompany, Organization, RoyaltyLedger
-from apps.gyms.models import Gym
-from apps.members.models import Member
 from apps.enterprises.permissions import IsHoldingAdmin, IsOrgAdmin
-from apps.enterprises.services import RoyaltyService
+from apps.enterprises.services import RoyaltyService, HierarchyRollupService
 from django.utils import timezone
 
 class HoldingDashboardView(APIView):
@@ -20,31 +18,24 @@ class HoldingDashboardView(APIView):
         if not holding_company:
              return Response({"error": "User not linked to a Holding Company"}, status=400)
 
-        # Get all brands, organizations, and gyms under this holding
         brands = holding_company.brands.all()
-        # Flat list of all gyms under this holding
-        gyms = Gym.objects.filter(organization__brand__in=brands)
-        
-        # Aggregated Stats
-        total_gyms = gyms.count()
-        active_gyms = gyms.filter(is_active=True).count()
-        total_members = Member.objects.filter(gym__in=gyms).count()
-        active_members = Member.objects.filter(gym__in=gyms, status=Member.Status.ACTIVE).count()
-        
-        # Revenue (Mocked for now, future Phase 3)
-        total_revenue = 0 
+
+        # One grouped statement over the daily rollup, folded into a tree
+        tree = HierarchyRollupService.get_tree(holding_company)
+        stats = tree['stats']
 
         return Response({
             "holding_name": holding_company.name,
             "stats": {
                 "total_brands": brands.count(),
-                "total_gyms": total_gyms,
-                "active_gyms": active_gyms,
-                "total_members": total_members,
-                "active_members": active_members,
-                "total_revenue": total_revenue
+                "total_gyms": stats['gyms'],
+                "active_gyms": stats['active_gyms'],
+                "total_members": stats['total_members'],
+                "active_members": stats['active_members'],
+                "total_revenue": stats['revenue_mtd']
             },
-            "brands": [{"id": b.id, "name": b.name, "code": b.brand_code} for b in brands]
+            "brands": [{"id": b.id, "name": b.name, "code": b.brand_code} for b in brands],
+            "hierarchy": tree['children']
         })
 
 class OrganizationDashboardView(APIView):
@@ -59,28 +50,27 @@ class OrganizationDashboardView(APIView):
         if not organization:
             return Response({"error": "User not linked to an Organization"}, status=400)
 
-        gyms = organization.locations.all()
-
-        # Aggregated Stats
-        total_gyms = gyms.count()
-        total_members = Member.objects.filter(gym__in=gyms).count()
-        active_members = Member.objects.filter(gym__in=gyms, status=Member.Status.ACTIVE).count()
+        tree = HierarchyRollupService.get_tree(organization)
+        stats = tree['stats']
 
         return Response({
             "organization_name": organization.name,
             "brand_name": organization.brand.name,
             "stats": {
-                "total_locations": total_gyms,
-                "total_members": total_members,
-                "active_members": active_members,
+                "total_locations": stats['gyms'],
+                "total_members": stats['total_members'],
+                "active_members": stats['active_members'],
+                "revenue_mtd": stats['revenue_mtd'],
             },
             "locations": [
                 {
-                    "id": g.id, 
-                    "name": g.name, 
-                    "city": g.city, 
-                    "members": g.members.count()
-                } for g in gyms
+                    "id": g['id'], 
+                    "name": g['name'], 
+                    "city": g['city'], 
+                    "members": g['stats']['total_members'],
+                    "active_members": g['stats']['active_members'],
+                    "revenue_mtd": g['stats']['revenue_mtd'],
+                } for g in tree['children']
             ]
         })
 
@@ -1,12 +1,15 @@
 """
-Fitness Admin - WorkoutPlan, DietPlan, Attendance, ProgressLog with import/export.
+Fitness Admin - WorkoutPlan, DietPlan, Attendance, ProgressLog with import/export,
+plus the read-mostly attendance rollups.
 """
 
 from django.contrib import admin
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
-from apps.fitness.models import WorkoutPlan, DietPlan, Attendance, ProgressLog
+from apps.fitness.models import (
+    WorkoutPlan, DietPlan, Attendance, AttendanceDaily, AttendanceHourly, ProgressLog,
+)
 
 
 # ── WorkoutPlan ───────────────────────────────────────────────
@@ -95,6 +98,24 @@ class AttendanceAdmin(ImportExportModelAdmin):
     date_hierarchy = 'check_in'
 
 
+@admin.register(AttendanceHourly)
+class AttendanceHourlyAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'date', 'hour', 'check_ins', 'visit_minutes')
+    list_filter = ('gym',)
+    search_fields = ('gym__name',)
+    readonly_fields = ('created_at', 'updated_at')
+    date_hierarchy = 'date'
+
+
+@admin.register(AttendanceDaily)
+class AttendanceDailyAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'date', 'check_ins', 'unique_members')
+    list_filter = ('gym',)
+    search_fields = ('gym__name',)
+    readonly_fields = ('created_at', 'updated_at')
+    date_hierarchy = 'date'
+
+
 # ── ProgressLog ───────────────────────────────────────────────
 
 class ProgressLogResource(resources.ModelResource):
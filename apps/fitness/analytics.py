@@ -0,0 +1,276 @@
+"""
+Fitness Analytics - the AttendanceHourly / AttendanceDaily rollups and the
+heatmap, occupancy, trend and visit-frequency reports built on them.
+
+CheckInService folds each batch of new check-ins into the rollups inside
+its own transaction, so reports read a few hundred rollup rows however
+much attendance history a gym has. Occupancy is time-weighted: each visit
+spreads its minutes over the hours it covers (ATTENDANCE_ASSUMED_VISIT_MINUTES
+when there is no check-out yet), so an hour's visit_minutes / 60 is the
+average number of members on the floor.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.fitness.models import Attendance, AttendanceDaily, AttendanceHourly
+
+logger = logging.getLogger('apps.fitness.analytics')
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+# (label, minimum visits per week) for visit_frequency(), highest first
+FREQUENCY_BUCKETS = (
+    ('5+ / week', 5),
+    ('3-4 / week', 3),
+    ('1-2 / week', 1),
+    ('Under 1 / week', 0),
+)
+
+
+def assumed_visit_minutes():
+    return getattr(settings, 'ATTENDANCE_ASSUMED_VISIT_MINUTES', 60)
+
+
+def visit_minutes_by_hour(check_in, check_out=None):
+    """
+    {(local date, hour): minutes} covered by a visit, from check-in to
+    check-out (or ATTENDANCE_ASSUMED_VISIT_MINUTES when still open).
+    """
+    start = timezone.localtime(check_in)
+    if check_out and check_out > check_in:
+        end = timezone.localtime(check_out)
+    else:
+        end = start + timedelta(minutes=assumed_visit_minutes())
+
+    minutes = {}
+    cursor = start
+    while cursor < end:
+        boundary = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        segment_end = min(boundary, end)
+        minutes[(cursor.date(), cursor.hour)] = round((segment_end - cursor).total_seconds() / 60)
+        cursor = segment_end
+    return minutes
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+class AttendanceAnalyticsService:
+    """Maintains and reads the attendance rollups."""
+
+    @staticmethod
+    def record(gym_id, rows, visitors=None):
+        """
+        Add just-inserted Attendance `rows` of one gym to the rollups.
+        `visitors` counts, per local date, members whose first visit of the
+        day is among `rows` (for AttendanceDaily.unique_members).
+
+        Six queries however large the batch: per table, create the missing
+        rollup rows, lock the touched ones and write them back.
+        """
+        hourly = defaultdict(Counter)
+        daily = defaultdict(Counter)
+        for row in rows:
+            local = timezone.localtime(row.check_in)
+            hourly[(local.date(), local.hour)]['check_ins'] += 1
+            daily[local.date()]['check_ins'] += 1
+            for key, minutes in visit_minutes_by_hour(row.check_in, row.check_out).items():
+                hourly[key]['visit_minutes'] += minutes
+        for day, count in (visitors or {}).items():
+            daily[day]['unique_members'] += count
+
+        AttendanceAnalyticsService._add(
+            AttendanceHourly, gym_id, ('date', 'hour'), hourly, ['check_ins', 'visit_minutes'],
+        )
+        AttendanceAnalyticsService._add(
+            AttendanceDaily, gym_id, ('date',),
+            {(day,): delta for day, delta in daily.items()}, ['check_ins', 'unique_members'],
+        )
+
+    @staticmethod
+    def record_check_out(gym_id, check_in, check_out):
+        """
+        Swap the assumed length of a visit recorded by record() for its real
+        one: move visit_minutes between the hours the two spans cover.
+        """
+        assumed = visit_minutes_by_hour(check_in)
+        actual = visit_minutes_by_hour(check_in, check_out)
+        deltas = {
+            key: Counter(visit_minutes=actual.get(key, 0) - assumed.get(key, 0))
+            for key in assumed.keys() | actual.keys()
+            if actual.get(key, 0) != assumed.get(key, 0)
+        }
+        AttendanceAnalyticsService._add(AttendanceHourly, gym_id, ('date', 'hour'), deltas, ['visit_minutes'])
+
+    @staticmethod
+    def _add(model, gym_id, key_fields, deltas, fields):
+        """Add `deltas` ({key tuple: Counter of fields}) to `model`'s rows for `gym_id`."""
+        if not deltas:
+            return
+        keys = sorted(deltas)
+        with transaction.atomic(savepoint=False):
+            model.objects.bulk_create(
+                [model(gym_id=gym_id, **dict(zip(key_fields, key))) for key in keys],
+                ignore_conflicts=True,
+            )
+            lookup = reduce(or_, (Q(**dict(zip(key_fields, key))) for key in keys))
+            rows = list(model.objects.select_for_update().filter(lookup, gym_id=gym_id).order_by(*key_fields))
+            now = timezone.now()
+            for row in rows:
+                delta = deltas[tuple(getattr(row, f) for f in key_fields)]
+                for field in fields:
+                    setattr(row, field, max(getattr(row, field) + delta[field], 0))
+                row.updated_at = now
+            model.objects.bulk_update(rows, fields + ['updated_at'])
+
+    @staticmethod
+    def rebuild_day(day, gyms=None):
+        """
+        Recompute both rollups for `day` from fitness_attendance (backfill or
+        drift repair), replacing that day's rows for `gyms` (default: all).
+        Returns the number of gyms with attendance that day.
+        """
+        start, end = _day_bounds(day)
+        gym_filter = Q() if gyms is None else Q(gym_id__in=list(gyms.values_list('id', flat=True)))
+
+        hourly = defaultdict(Counter)
+        check_ins = Counter()
+        members = defaultdict(set)
+        # Visits from the evening before can run past midnight
+        for gym_id, member_id, check_in, check_out in Attendance.objects.filter(
+            gym_filter, is_deleted=False, check_in__gte=start - timedelta(days=1), check_in__lt=end,
+        ).order_by().values_list('gym_id', 'member_id', 'check_in', 'check_out').iterator(chunk_size=2000):
+            if check_in >= start:
+                hourly[(gym_id, timezone.localtime(check_in).hour)]['check_ins'] += 1
+                check_ins[gym_id] += 1
+                members[gym_id].add(member_id)
+            for (date, hour), minutes in visit_minutes_by_hour(check_in, check_out).items():
+                if date == day:
+                    hourly[(gym_id, hour)]['visit_minutes'] += minutes
+
+        hourly_objs = [
+            AttendanceHourly(gym_id=gym_id, date=day, hour=hour, **counts)
+            for (gym_id, hour), counts in hourly.items()
+        ]
+        daily_objs = [
+            AttendanceDaily(gym_id=gym_id, date=day, check_ins=count, unique_members=len(members[gym_id]))
+            for gym_id, count in check_ins.items()
+        ]
+        with transaction.atomic():
+            AttendanceHourly.objects.filter(gym_filter, date=day).delete()
+            AttendanceDaily.objects.filter(gym_filter, date=day).delete()
+            AttendanceHourly.objects.bulk_create(hourly_objs, batch_size=500)
+            AttendanceDaily.objects.bulk_create(daily_objs, batch_size=500)
+        logger.info(f"Rebuilt attendance rollups for {day}: {len(daily_objs)} gyms, {len(hourly_objs)} hours")
+        return len(daily_objs)
+
+    @staticmethod
+    def heatmap(gym, weeks=8):
+        """
+        Average check-ins per weekday and hour over the last `weeks` full
+        weeks (ending yesterday): `cells` is 7 rows (Mon-Sun) of 24 hourly
+        averages; `peak` is the busiest slot, or None with no attendance.
+        """
+        until = timezone.localdate() - timedelta(days=1)
+        since = until - timedelta(days=weeks * 7 - 1)
+        totals = [[0] * 24 for _ in WEEKDAYS]
+        for date, hour, count in AttendanceHourly.objects.filter(
+            gym=gym, date__gte=since, date__lte=until, check_ins__gt=0,
+        ).values_list('date', 'hour', 'check_ins'):
+            totals[date.weekday()][hour] += count
+
+        cells = [[round(count / weeks, 1) for count in row] for row in totals]
+        peak = max(
+            ((cells[weekday][hour], weekday, hour) for weekday in range(7) for hour in range(24)),
+            default=(0, 0, 0),
+        )
+        return {
+            'since': since,
+            'until': until,
+            'weeks': weeks,
+            'weekdays': list(WEEKDAYS),
+            'cells': cells,
+            'peak': {'weekday': WEEKDAYS[peak[1]], 'hour': peak[2], 'average_check_ins': peak[0]} if peak[0] else None,
+        }
+
+    @staticmethod
+    def occupancy(gym, until=None, days=1):
+        """
+        One dict per hour for the `days` days ending `until` (default: today),
+        oldest first and zero-filled: date, hour, check_ins and `occupancy`
+        (average members on the floor during that hour).
+        """
+        until = until or timezone.localdate()
+        since = until - timedelta(days=days - 1)
+        by_hour = {
+            (date, hour): (check_ins, minutes)
+            for date, hour, check_ins, minutes in AttendanceHourly.objects.filter(
+                gym=gym, date__gte=since, date__lte=until,
+            ).values_list('date', 'hour', 'check_ins', 'visit_minutes')
+        }
+        series = []
+        for offset in range(days):
+            date = since + timedelta(days=offset)
+            for hour in range(24):
+                check_ins, minutes = by_hour.get((date, hour), (0, 0))
+                series.append({'date': date, 'hour': hour, 'check_ins': check_ins, 'occupancy': round(minutes / 60, 1)})
+        return series
+
+    @staticmethod
+    def trend(gym, days=30):
+        """
+        One dict per day for the last `days` days (oldest first, zero-filled):
+        date, check_ins and unique_members.
+        """
+        today = timezone.localdate()
+        since = today - timedelta(days=days - 1)
+        by_day = {
+            date: (check_ins, unique_members)
+            for date, check_ins, unique_members in AttendanceDaily.objects.filter(
+                gym=gym, date__gte=since,
+            ).values_list('date', 'check_ins', 'unique_members')
+        }
+        return [
+            dict(zip(('date', 'check_ins', 'unique_members'), (day,) + by_day.get(day, (0, 0))))
+            for day in (since + timedelta(days=offset) for offset in range(days))
+        ]
+
+    @staticmethod
+    def visit_frequency(gym, days=30):
+        """
+        How often active members came in over the last `days` days: the
+        number of members in each FREQUENCY_BUCKETS band of visits per week,
+        plus the overall average. One grouped query over the window's
+        attendance (the (gym, check_in) index) and one member count.
+        """
+        from apps.members.models import Member
+
+        since = timezone.now() - timedelta(days=days)
+        active = Q(member__status=Member.Status.ACTIVE, member__is_deleted=False)
+        visits = list(Attendance.objects.filter(
+            active, gym=gym, is_deleted=False, check_in__gte=since,
+        ).order_by().values('member_id').annotate(visits=Count('id')).values_list('visits', flat=True))
+        members = Member.objects.filter(gym=gym, status=Member.Status.ACTIVE, is_deleted=False).count()
+
+        weeks = days / 7
+        counts = Counter()
+        for count in visits:
+            per_week = count / weeks
+            counts[next(label for label, minimum in FREQUENCY_BUCKETS if per_week >= minimum)] += 1
+        return {
+            'days': days,
+            'active_members': members,
+            'never_visited': max(members - len(visits), 0),
+            'average_visits_per_week': round(sum(visits) / weeks / members, 2) if members else 0,
+            'buckets': [{'label': label, 'members': counts[label]} for label, _ in FREQUENCY_BUCKETS],
+        }
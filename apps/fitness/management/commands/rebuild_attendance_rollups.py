@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.fitness.analytics import AttendanceAnalyticsService
+from apps.gyms.models import Gym
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the AttendanceHourly / AttendanceDaily rollups from fitness_attendance '
+        '(backfill, or repair after imports, check-in edits and late-synced scans)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Day to rebuild (YYYY-MM-DD). Defaults to today.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Also rebuild the N-1 days before --date (backfill). Default: 1',
+        )
+        parser.add_argument(
+            '--gym',
+            help='Only rebuild a single gym (gym code).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end_day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format.')
+
+        gyms = None
+        if options['gym']:
+            gyms = Gym.objects.filter(gym_code=options['gym'].upper())
+            if not gyms.exists():
+                raise CommandError(f"No gym with code {options['gym']}.")
+
+        total = 0
+        for offset in range(max(options['days'], 1) - 1, -1, -1):
+            day = end_day - timedelta(days=offset)
+            written = AttendanceAnalyticsService.rebuild_day(day, gyms=gyms)
+            total += written
+            self.stdout.write(f"  {day}: {written} gyms")
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt attendance rollups for {total} gym-days'))
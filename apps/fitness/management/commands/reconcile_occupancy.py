@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.fitness.occupancy import OccupancyService
+from apps.gyms.models import Gym
+
+
+class Command(BaseCommand):
+    help = 'Recounts live gym occupancy from open check-ins and closes visits that never checked out'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gym',
+            help='Only reconcile a single gym (gym code).',
+        )
+
+    def handle(self, *args, **options):
+        gyms = None
+        if options['gym']:
+            gyms = Gym.objects.filter(gym_code=options['gym'].upper(), is_deleted=False)
+            if not gyms.exists():
+                raise CommandError(f"No gym with code {options['gym']}.")
+
+        counts = OccupancyService.reconcile(gyms)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {len(counts)} gyms: {sum(counts.values())} members currently in"
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0003_initial'),
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDaily',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('check_ins', models.PositiveIntegerField(default=0, verbose_name='Check-ins')),
+                ('unique_members', models.PositiveIntegerField(default=0, verbose_name='Unique Members')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_daily', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'Daily Attendance',
+                'verbose_name_plural': 'Daily Attendance',
+                'db_table': 'fitness_attendancedaily',
+                'ordering': ['-date'],
+                'unique_together': {('gym', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceHourly',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Hour (0-23)')),
+                ('check_ins', models.PositiveIntegerField(default=0, verbose_name='Check-ins')),
+                ('visit_minutes', models.PositiveIntegerField(default=0, help_text='Member-minutes spent in the gym during this hour; / 60 = average occupancy', verbose_name='Visit Minutes')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_hourly', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'Hourly Attendance',
+                'verbose_name_plural': 'Hourly Attendance',
+                'db_table': 'fitness_attendancehourly',
+                'ordering': ['-date', 'hour'],
+                'unique_together': {('gym', 'date', 'hour')},
+            },
+        ),
+    ]
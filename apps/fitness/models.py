@@ -1,5 +1,5 @@
 """
-Fitness App - WorkoutPlan, DietPlan, Attendance, ProgressLog
+Fitness App - WorkoutPlan, DietPlan, Attendance (+ hourly/daily rollups), ProgressLog
 AI-generated plans + tracking = the core product value.
 """
 
@@ -201,6 +201,73 @@ class Attendance(BaseModel):
         return f"{self.member.name} - {self.check_in.strftime('%Y-%m-%d %H:%M')}"
 
 
+class AttendanceHourly(BaseModel):
+    """
+    Per-gym, per-hour rollup of check-ins and time spent in the gym (local
+    time). Maintained by AttendanceAnalyticsService as check-ins are recorded,
+    so heatmaps and occupancy charts never scan fitness_attendance.
+    """
+
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='attendance_hourly',
+        verbose_name="Gym",
+    )
+    date = models.DateField(verbose_name="Date")
+    hour = models.PositiveSmallIntegerField(verbose_name="Hour (0-23)")
+    check_ins = models.PositiveIntegerField(default=0, verbose_name="Check-ins")
+    visit_minutes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Visit Minutes",
+        help_text="Member-minutes spent in the gym during this hour; / 60 = average occupancy",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'fitness_attendancehourly'
+        verbose_name = 'Hourly Attendance'
+        verbose_name_plural = 'Hourly Attendance'
+        ordering = ['-date', 'hour']
+        # Also serves the (gym, date) range scans of the charts
+        unique_together = ['gym', 'date', 'hour']
+
+    def __str__(self):
+        return f"{self.gym_id} {self.date} {self.hour:02d}:00: {self.check_ins} check-ins"
+
+
+class AttendanceDaily(BaseModel):
+    """
+    Per-gym, per-day rollup of check-ins and distinct members, maintained
+    alongside AttendanceHourly.
+    """
+
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='attendance_daily',
+        verbose_name="Gym",
+    )
+    date = models.DateField(verbose_name="Date")
+    check_ins = models.PositiveIntegerField(default=0, verbose_name="Check-ins")
+    unique_members = models.PositiveIntegerField(default=0, verbose_name="Unique Members")
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'fitness_attendancedaily'
+        verbose_name = 'Daily Attendance'
+        verbose_name_plural = 'Daily Attendance'
+        ordering = ['-date']
+        unique_together = ['gym', 'date']
+
+    def __str__(self):
+        return f"{self.gym_id} {self.date}: {self.check_ins} check-ins, {self.unique_members} members"
+
+
 class ProgressLog(BaseModel):
     """
     Body measurement history.
@@ -0,0 +1,157 @@
+"""
+Fitness Occupancy - live "members in the gym now" counter per gym.
+
+The count lives in the default cache (Redis in production, LocMemCache
+otherwise) and moves with check-ins and check-outs, so dashboards and
+capacity checks read one key instead of counting fitness_attendance on
+every poll. A visit is open from check-in until check-out, or for at most
+ATTENDANCE_MAX_VISIT_MINUTES when the member never checks out.
+
+Counters drift (forgotten check-outs, a flushed cache, per-process
+LocMemCache), so reconcile() recounts open visits from the database: on a
+cache miss, and every ATTENDANCE_RECONCILE_MINUTES through the
+reconcile_occupancy task (CELERY_BEAT_SCHEDULE), which is also what stops
+visits without a check-out from counting once they run past the limit.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.fitness.analytics import assumed_visit_minutes
+from apps.fitness.models import Attendance
+
+logger = logging.getLogger('apps.fitness.occupancy')
+
+ALERT_COOLDOWN_SECONDS = 30 * 60
+
+
+def max_visit():
+    return timedelta(minutes=getattr(settings, 'ATTENDANCE_MAX_VISIT_MINUTES', 240))
+
+
+def is_open(check_in, now=None):
+    """Whether a visit without a check-out still counts towards occupancy."""
+    now = now or timezone.now()
+    return now - max_visit() < check_in <= now
+
+
+def _key(gym_id):
+    return f"fitness:occupancy:{gym_id}"
+
+
+def _open_visits(now):
+    return Attendance.objects.filter(
+        is_deleted=False, check_out__isnull=True, check_in__gt=now - max_visit(), check_in__lte=now,
+    )
+
+
+class OccupancyService:
+    """Maintains and reads the live occupancy counters."""
+
+    class Level:
+        OK = 'ok'
+        NEAR_CAPACITY = 'near_capacity'
+        AT_CAPACITY = 'at_capacity'
+
+    @staticmethod
+    def adjust(gym, delta):
+        """Move `gym`'s counter by `delta` (recounting on a cache miss). Returns the new count."""
+        if not delta:
+            return OccupancyService.count(gym)
+        try:
+            count = cache.incr(_key(gym.id), delta)
+        except ValueError:
+            # Cold cache: the recount already includes this change
+            count = OccupancyService.reconcile_gym(gym)
+        if count < 0:
+            cache.set(_key(gym.id), 0, timeout=None)
+            count = 0
+        if delta > 0:
+            OccupancyService._alert(gym, count)
+        return count
+
+    @staticmethod
+    def count(gym):
+        """Members in `gym` right now: one cache read, recounted only on a miss."""
+        count = cache.get(_key(gym.id))
+        if count is None:
+            count = OccupancyService.reconcile_gym(gym)
+        return count
+
+    @staticmethod
+    def status(gym):
+        """The counter against Gym.member_capacity, for dashboards and alerts."""
+        count = OccupancyService.count(gym)
+        capacity = gym.member_capacity or 0
+        percent = round(count * 100 / capacity) if capacity else None
+        return {
+            'current': count,
+            'capacity': capacity,
+            'percent': percent,
+            'level': OccupancyService._level(count, capacity),
+        }
+
+    @staticmethod
+    def _level(count, capacity):
+        if not capacity:
+            return OccupancyService.Level.OK
+        if count >= capacity:
+            return OccupancyService.Level.AT_CAPACITY
+        if count * 100 >= capacity * getattr(settings, 'ATTENDANCE_CAPACITY_WARN_PERCENT', 90):
+            return OccupancyService.Level.NEAR_CAPACITY
+        return OccupancyService.Level.OK
+
+    @staticmethod
+    def _alert(gym, count):
+        """Log a capacity warning, at most once per ALERT_COOLDOWN_SECONDS per gym and level."""
+        level = OccupancyService._level(count, gym.member_capacity or 0)
+        if level == OccupancyService.Level.OK:
+            return
+        if cache.add(f"{_key(gym.id)}:alert:{level}", 1, timeout=ALERT_COOLDOWN_SECONDS):
+            logger.warning(f"Gym {gym.id} is {level.replace('_', ' ')}: {count}/{gym.member_capacity} members in")
+
+    @staticmethod
+    def reconcile_gym(gym):
+        """Recount `gym`'s open visits from the database and reset its counter."""
+        count = _open_visits(timezone.now()).filter(gym=gym).count()
+        cache.set(_key(gym.id), count, timeout=None)
+        return count
+
+    @staticmethod
+    def reconcile(gyms=None):
+        """
+        Close visits that ran past ATTENDANCE_MAX_VISIT_MINUTES within the last
+        day without a check-out (at check-in + ATTENDANCE_ASSUMED_VISIT_MINUTES,
+        which is what the hourly rollup already assumed), then reset the
+        counters of `gyms` (default: all active gyms) from one grouped count.
+        Both statements are (gym, check_in) index range scans.
+        Returns {gym_id: count}.
+        """
+        from apps.gyms.models import Gym
+
+        if gyms is None:
+            gyms = Gym.objects.filter(is_active=True, is_deleted=False)
+        gym_ids = list(gyms.values_list('id', flat=True))
+        now = timezone.now()
+        expired = now - max_visit()
+        assumed = assumed_visit_minutes()
+
+        closed = Attendance.objects.filter(
+            gym_id__in=gym_ids, is_deleted=False, check_out__isnull=True,
+            check_in__gt=expired - timedelta(days=1), check_in__lte=expired,
+        ).update(check_out=F('check_in') + timedelta(minutes=assumed), duration_minutes=assumed, updated_at=now)
+
+        counts = dict.fromkeys(gym_ids, 0)
+        counts.update(
+            _open_visits(now).filter(gym_id__in=gym_ids).order_by().values('gym_id').annotate(
+                n=Count('id'),
+            ).values_list('gym_id', 'n')
+        )
+        cache.set_many({_key(gym_id): count for gym_id, count in counts.items()}, timeout=None)
+        logger.info(f"Reconciled occupancy for {len(counts)} gyms; closed {closed} stale visits")
+        return counts
@@ -0,0 +1,87 @@
+"""
+Fitness Serializers - check-in / check-out ingestion, live occupancy and
+attendance analytics queries.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+# Device clocks drift; anything further ahead than this is rejected
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+class CheckInSerializer(serializers.Serializer):
+    """One scan: the member by id (QR code) or phone, and when it happened."""
+    member_id = serializers.UUIDField(required=False)
+    phone = serializers.CharField(required=False, max_length=20)
+    check_in = serializers.DateTimeField(
+        required=False,
+        help_text="When the member scanned in. Defaults to now; set it when replaying offline scans.",
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+    def validate_check_in(self, value):
+        if value > timezone.now() + MAX_CLOCK_SKEW:
+            raise serializers.ValidationError("Check-in time is in the future.")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('member_id') and not attrs.get('phone'):
+            raise serializers.ValidationError("Provide member_id or phone.")
+        return attrs
+
+
+class CheckOutSerializer(serializers.Serializer):
+    """The member leaving, by id (QR code) or phone."""
+    member_id = serializers.UUIDField(required=False)
+    phone = serializers.CharField(required=False, max_length=20)
+    check_out = serializers.DateTimeField(required=False, help_text="When the member left. Defaults to now.")
+
+    def validate_check_out(self, value):
+        if value > timezone.now() + MAX_CLOCK_SKEW:
+            raise serializers.ValidationError("Check-out time is in the future.")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('member_id') and not attrs.get('phone'):
+            raise serializers.ValidationError("Provide member_id or phone.")
+        return attrs
+
+
+class CheckInBatchSerializer(serializers.Serializer):
+    """Scans buffered by a device, sent together."""
+    check_ins = serializers.ListField(
+        child=CheckInSerializer(),
+        allow_empty=False,
+        max_length=getattr(settings, 'ATTENDANCE_BATCH_MAX', 500),
+    )
+
+
+class CheckInResultSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=['checked_in', 'duplicate', 'not_found'])
+    member_id = serializers.UUIDField(allow_null=True)
+    attendance_id = serializers.UUIDField(allow_null=True)
+
+
+class CheckOutResultSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=['checked_out', 'not_found', 'not_checked_in'])
+    member_id = serializers.UUIDField(allow_null=True)
+    attendance_id = serializers.UUIDField(allow_null=True)
+    duration_minutes = serializers.IntegerField(allow_null=True)
+
+
+class OccupancySerializer(serializers.Serializer):
+    current = serializers.IntegerField(help_text="Members in the gym now")
+    capacity = serializers.IntegerField(help_text="Gym.member_capacity")
+    percent = serializers.IntegerField(allow_null=True)
+    level = serializers.ChoiceField(choices=['ok', 'near_capacity', 'at_capacity'])
+
+
+class AttendanceWindowSerializer(serializers.Serializer):
+    """Query parameters of the attendance analytics endpoints."""
+    days = serializers.IntegerField(required=False, min_value=1, max_value=365)
+    weeks = serializers.IntegerField(required=False, min_value=1, max_value=52, default=8)
+    date = serializers.DateField(required=False, help_text="Last day of the occupancy window. Defaults to today.")
@@ -0,0 +1,229 @@
+"""
+Fitness Services - check-in and check-out ingestion for front-desk kiosks
+and QR / biometric devices.
+"""
+
+import bisect
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.fitness.analytics import AttendanceAnalyticsService
+from apps.fitness.models import Attendance
+from apps.fitness.occupancy import OccupancyService, is_open, max_visit
+
+logger = logging.getLogger('apps.fitness.services')
+
+
+def normalize_phone(phone):
+    """Digits only, without a country code: the last 10 digits of an Indian number."""
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    return digits[-10:] if len(digits) > 10 else digits
+
+
+def advance_streak(streak, last_day, days):
+    """
+    Fold check-in `days` (sorted local dates) into an attendance streak whose
+    latest visit was `last_day`. Days not after `last_day` (a second visit
+    the same day, or a late-synced older scan) leave the streak alone.
+    Returns (streak, last_day).
+    """
+    for day in days:
+        if last_day is not None and day <= last_day:
+            continue
+        # The previous visit counts even if the streak was never maintained
+        streak = max(streak, 1) + 1 if last_day is not None and day - last_day == timedelta(days=1) else 1
+        last_day = day
+    return streak, last_day
+
+
+class CheckInService:
+    """
+    Records batches of check-ins in a constant number of queries: one to
+    resolve and lock the members, one to load their recent check-ins for
+    de-duplication, one INSERT for the new Attendance rows, one UPDATE
+    for every touched member's attendance_streak and last_check_in, and
+    six to fold the batch into the attendance rollups.
+    """
+
+    class Status:
+        CHECKED_IN = 'checked_in'
+        CHECKED_OUT = 'checked_out'
+        DUPLICATE = 'duplicate'
+        NOT_FOUND = 'not_found'
+        NOT_CHECKED_IN = 'not_checked_in'
+
+    @staticmethod
+    def dedupe_window():
+        return timedelta(minutes=getattr(settings, 'ATTENDANCE_DEDUPE_MINUTES', 10))
+
+    @staticmethod
+    def record(gym, check_ins, window=None):
+        """
+        Record `check_ins` for `gym`: dicts with `member_id` or `phone`, and
+        optional `check_in` (default: now) and `notes`. A scan within
+        `window` (default: ATTENDANCE_DEDUPE_MINUTES) of another check-in by
+        the same member, stored or earlier in the batch, is a duplicate.
+
+        Returns (results, totals): one result per input, in input order,
+        with `status`, `member_id` and `attendance_id`; totals count each status.
+        """
+        from apps.members.models import Member
+
+        window = CheckInService.dedupe_window() if window is None else window
+        now = timezone.now()
+        items = [dict(item, check_in=item.get('check_in') or now) for item in check_ins]
+        results = [{'status': CheckInService.Status.NOT_FOUND, 'member_id': None, 'attendance_id': None} for _ in items]
+        if not items:
+            return results, Counter()
+
+        member_ids = {str(item['member_id']) for item in items if item.get('member_id')}
+        raw_phones = [str(item['phone']).strip() for item in items if not item.get('member_id') and item.get('phone')]
+        phones = {normalize_phone(phone) for phone in raw_phones} | set(raw_phones)
+        phones.discard('')
+
+        with transaction.atomic():
+            lookup = Q(id__in=member_ids) if member_ids else Q()
+            if phones:
+                lookup |= Q(phone__in=phones)
+            members = {}
+            if member_ids or phones:
+                members = {
+                    m.id: m for m in Member.objects.select_for_update().filter(
+                        lookup, gym=gym, is_deleted=False,
+                    ).only('id', 'phone', 'attendance_streak', 'last_check_in')
+                }
+            by_id = {str(pk): pk for pk in members}
+            by_phone = {normalize_phone(m.phone): pk for pk, m in members.items()}
+
+            resolved = []
+            for index, item in enumerate(items):
+                pk = by_id.get(str(item['member_id'])) if item.get('member_id') else by_phone.get(normalize_phone(item.get('phone')))
+                if pk is not None:
+                    resolved.append((item['check_in'], index, pk))
+            if not resolved:
+                return results, Counter(r['status'] for r in results)
+            resolved.sort(key=lambda r: (r[0], r[1]))
+
+            # Stored check-ins near the batch, per member, for de-duplication
+            seen = defaultdict(list)
+            for member_id, check_in in Attendance.objects.filter(
+                gym=gym, member_id__in={pk for _, _, pk in resolved}, is_deleted=False,
+                check_in__gt=resolved[0][0] - window, check_in__lt=resolved[-1][0] + window,
+            ).values_list('member_id', 'check_in'):
+                bisect.insort(seen[member_id], check_in)
+
+            new_rows = []
+            for check_in, index, pk in resolved:
+                times = seen[pk]
+                i = bisect.bisect_left(times, check_in)
+                near = (i < len(times) and times[i] - check_in < window) or (i > 0 and check_in - times[i - 1] < window)
+                results[index]['member_id'] = pk
+                if near:
+                    results[index]['status'] = CheckInService.Status.DUPLICATE
+                    continue
+                times.insert(i, check_in)
+                attendance = Attendance(gym=gym, member_id=pk, check_in=check_in, notes=items[index].get('notes') or None)
+                new_rows.append(attendance)
+                results[index].update(status=CheckInService.Status.CHECKED_IN, attendance_id=attendance.id)
+
+            Attendance.objects.bulk_create(new_rows, batch_size=500)
+            visitors = CheckInService._update_members(members, new_rows)
+            AttendanceAnalyticsService.record(gym.id, new_rows, visitors)
+            # Late-synced scans of visits that are already over do not count
+            opened = sum(1 for row in new_rows if is_open(row.check_in, now))
+            if opened:
+                transaction.on_commit(lambda: OccupancyService.adjust(gym, opened))
+
+        totals = Counter(r['status'] for r in results)
+        logger.info(
+            f"Gym {gym.id}: {totals[CheckInService.Status.CHECKED_IN]} check-ins, "
+            f"{totals[CheckInService.Status.DUPLICATE]} duplicates, {totals[CheckInService.Status.NOT_FOUND]} unknown"
+        )
+        return results, totals
+
+    @staticmethod
+    def check_out(gym, member_id=None, phone=None, check_out=None):
+        """
+        Close the member's latest open visit (checked in within
+        ATTENDANCE_MAX_VISIT_MINUTES before `check_out`, default: now): store
+        check_out and duration_minutes, move the hourly rollup from the
+        assumed visit length to the real one and decrement the live counter.
+
+        Returns a result with `status` (checked_out, not_found or
+        not_checked_in), `member_id`, `attendance_id` and `duration_minutes`.
+        """
+        from apps.members.models import Member
+
+        now = timezone.now()
+        check_out = check_out or now
+        result = {'status': CheckInService.Status.NOT_FOUND, 'member_id': None, 'attendance_id': None, 'duration_minutes': None}
+
+        members = Member.objects.filter(gym=gym, is_deleted=False).only('id', 'phone')
+        if member_id:
+            member = members.filter(id=member_id).first()
+        else:
+            raw = str(phone or '').strip()
+            member = members.filter(phone__in={normalize_phone(raw), raw} - {''}).first() if raw else None
+        if member is None:
+            return result
+        result['member_id'] = member.id
+
+        with transaction.atomic():
+            visit = Attendance.objects.select_for_update().filter(
+                gym=gym, member=member, is_deleted=False, check_out__isnull=True,
+                check_in__gt=check_out - max_visit(), check_in__lte=check_out,
+            ).order_by('-check_in').first()
+            if visit is None:
+                result['status'] = CheckInService.Status.NOT_CHECKED_IN
+                return result
+
+            visit.check_out = check_out
+            visit.duration_minutes = round((check_out - visit.check_in).total_seconds() / 60)
+            visit.save(update_fields=['check_out', 'duration_minutes', 'updated_at'])
+            AttendanceAnalyticsService.record_check_out(gym.id, visit.check_in, check_out)
+            if is_open(visit.check_in, now):
+                transaction.on_commit(lambda: OccupancyService.adjust(gym, -1))
+
+        result.update(
+            status=CheckInService.Status.CHECKED_OUT, attendance_id=visit.id, duration_minutes=visit.duration_minutes,
+        )
+        return result
+
+    @staticmethod
+    def _update_members(members, new_rows):
+        """
+        Advance streak and last_check_in of every member in `new_rows` with one
+        bulk UPDATE. Returns, per local date, how many members made their
+        first visit of that day.
+        """
+        from apps.members.models import Member
+
+        days = defaultdict(set)
+        latest = {}
+        for row in new_rows:
+            days[row.member_id].add(timezone.localdate(row.check_in))
+            latest[row.member_id] = max(latest.get(row.member_id, row.check_in), row.check_in)
+
+        changed = []
+        visitors = Counter()
+        for pk, member_days in days.items():
+            member = members[pk]
+            last = member.last_check_in
+            last_day = timezone.localdate(last) if last else None
+            # A late-synced scan for an earlier day is left to rebuild_attendance_rollups
+            visitors.update(day for day in member_days if last_day is None or day > last_day)
+            streak, _ = advance_streak(member.attendance_streak, last_day, sorted(member_days))
+            newest = max(last, latest[pk]) if last else latest[pk]
+            if (streak, newest) != (member.attendance_streak, last):
+                member.attendance_streak, member.last_check_in = streak, newest
+                member.updated_at = timezone.now()
+                changed.append(member)
+        if changed:
+            Member.objects.bulk_update(changed, ['attendance_streak', 'last_check_in', 'updated_at'])
+        return visitors
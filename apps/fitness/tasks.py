@@ -0,0 +1,12 @@
+"""
+Fitness Celery tasks.
+"""
+
+from celery import shared_task
+
+
+@shared_task
+def reconcile_occupancy():
+    """Close overdue visits and reset the live occupancy counters (Celery beat)."""
+    from apps.fitness.occupancy import OccupancyService
+    OccupancyService.reconcile()
@@ -0,0 +1,120 @@
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.fitness.analytics import AttendanceAnalyticsService, visit_minutes_by_hour
+from apps.fitness.models import Attendance, AttendanceDaily, AttendanceHourly
+from apps.fitness.services import CheckInService
+from apps.gyms.models import Gym
+from apps.members.models import Member
+from apps.users.models import GymUser
+
+URL = '/api/v1/attendance/analytics/'
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Peak Gym", email="peak@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        today = timezone.localdate()
+        self.members = [
+            Member.objects.create(
+                gym=self.gym, name=f"Member {i}", phone=f"910000000{i}", join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30),
+            )
+            for i in range(3)
+        ]
+        self.day = today - timedelta(days=1)
+        a, b, c = (str(m.id) for m in self.members)
+        CheckInService.record(self.gym, [
+            {'member_id': a, 'check_in': at(self.day, 7, 10)},
+            {'member_id': b, 'check_in': at(self.day, 7, 50)},
+            {'member_id': a, 'check_in': at(self.day, 18, 30)},
+            {'member_id': c, 'check_in': at(self.day, 23, 30)},
+        ])
+
+    def snapshot(self):
+        return (
+            sorted(AttendanceHourly.objects.values_list('date', 'hour', 'check_ins', 'visit_minutes')),
+            sorted(AttendanceDaily.objects.values_list('date', 'check_ins', 'unique_members')),
+        )
+
+    def test_visit_minutes_split_across_hours(self):
+        self.assertEqual(
+            visit_minutes_by_hour(at(self.day, 10, 40)),
+            {(self.day, 10): 20, (self.day, 11): 40},
+        )
+        self.assertEqual(visit_minutes_by_hour(at(self.day, 10, 0), at(self.day, 10, 45)), {(self.day, 10): 45})
+
+    def test_check_ins_maintain_rollups(self):
+        hourly, daily = self.snapshot()
+        self.assertEqual(daily, [(self.day, 4, 3)])
+        self.assertIn((self.day, 7, 2, 60), hourly)
+        self.assertIn((self.day, 8, 0, 60), hourly)
+        # The late visit runs past midnight into the next day
+        self.assertIn((self.day + timedelta(days=1), 0, 0, 30), hourly)
+
+        # A repeat visit later the same day is not a new unique member
+        CheckInService.record(self.gym, [{'member_id': str(self.members[1].id), 'check_in': at(self.day, 20)}])
+        self.assertEqual(AttendanceDaily.objects.get(date=self.day).unique_members, 3)
+        self.assertEqual(AttendanceDaily.objects.get(date=self.day).check_ins, 5)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        incremental = self.snapshot()
+        AttendanceHourly.objects.all().delete()
+        AttendanceDaily.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_attendance_rollups', date=str(self.day + timedelta(days=1)), days=2, stdout=out)
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertIn("Rebuilt attendance rollups for 1 gym-days", out.getvalue())
+
+    def test_reports(self):
+        heatmap = AttendanceAnalyticsService.heatmap(self.gym, weeks=1)
+        self.assertEqual(heatmap['peak'], {
+            'weekday': heatmap['weekdays'][self.day.weekday()], 'hour': 7, 'average_check_ins': 2.0,
+        })
+
+        series = AttendanceAnalyticsService.occupancy(self.gym, until=self.day)
+        self.assertEqual(len(series), 24)
+        self.assertEqual(series[7], {'date': self.day, 'hour': 7, 'check_ins': 2, 'occupancy': 1.0})
+
+        trend = AttendanceAnalyticsService.trend(self.gym, days=3)
+        self.assertEqual([row['check_ins'] for row in trend], [0, 4, 0])
+
+        frequency = AttendanceAnalyticsService.visit_frequency(self.gym, days=7)
+        self.assertEqual(frequency['active_members'], 3)
+        self.assertEqual(frequency['never_visited'], 0)
+        self.assertEqual({b['label']: b['members'] for b in frequency['buckets']}['1-2 / week'], 3)
+
+
+class AttendanceAnalyticsApiTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Api Gym", email="api@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.owner = GymUser.objects.create_user("owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_endpoints(self):
+        for path in ('heatmap/', 'occupancy/?days=2', 'trend/?days=7', 'visit-frequency/'):
+            self.assertEqual(self.client.get(URL + path).status_code, 200, path)
+        self.assertEqual(len(self.client.get(URL + 'occupancy/?days=2').data['series']), 48)
+        self.assertEqual(self.client.get(URL + 'trend/?days=0').status_code, 400)
+
+    def test_front_desk_cannot_read_reports(self):
+        desk = GymUser.objects.create_user(
+            "desk", "9000000002", "Front Desk", gym=self.gym, role='receptionist', password='pw'
+        )
+        self.client.force_authenticate(desk)
+        self.assertEqual(self.client.get(URL + 'heatmap/').status_code, 403)
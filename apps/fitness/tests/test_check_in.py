@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.fitness.models import Attendance
+from apps.fitness.services import CheckInService, advance_streak
+from apps.gyms.models import Gym
+from apps.members.models import Member
+from apps.users.models import GymUser
+
+URL = '/api/v1/attendance/check-ins/'
+
+
+class CheckInTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Desk Gym", email="desk@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        other_gym = Gym.objects.create(
+            name="Other Gym", email="other@gym.com", owner_name="Owner", owner_phone="9000000001"
+        )
+        today = timezone.localdate()
+        self.members = [
+            Member.objects.create(
+                gym=self.gym, name=f"Member {i}", phone=f"910000000{i}", join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30),
+            )
+            for i in range(3)
+        ]
+        self.stranger = Member.objects.create(
+            gym=other_gym, name="Stranger", phone="9200000000", join_date=today,
+            membership_start=today, membership_expiry=today + timedelta(days=30),
+        )
+        desk = GymUser.objects.create_user(
+            "desk", "9000000002", "Front Desk", gym=self.gym, role='receptionist', password='pw'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(desk)
+
+    def test_single_check_in_updates_member(self):
+        member = self.members[0]
+        response = self.client.post(URL, {'member_id': str(member.id)}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'checked_in')
+        attendance = Attendance.objects.get(id=response.data['attendance_id'])
+        member.refresh_from_db()
+        self.assertEqual(member.last_check_in, attendance.check_in)
+        self.assertEqual(member.attendance_streak, 1)
+
+        # A second scan moments later is acknowledged but not stored
+        response = self.client.post(URL, {'phone': '+91 91000 00000'}, format='json')
+        self.assertEqual((response.status_code, response.data['status']), (200, 'duplicate'))
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_other_gyms_members_are_not_found(self):
+        response = self.client.post(URL, {'member_id': str(self.stranger.id)}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.post(URL, {}, format='json').status_code, 400)
+
+    def test_batch_dedupes_and_updates_in_constant_queries(self):
+        now = timezone.now().replace(microsecond=0)
+        first, second, third = self.members
+        scans = [
+            {'member_id': str(first.id), 'check_in': now - timedelta(days=2)},
+            {'member_id': str(first.id), 'check_in': now - timedelta(days=1)},
+            {'member_id': str(first.id), 'check_in': now - timedelta(days=1, minutes=-3)},
+            {'member_id': str(first.id), 'check_in': now},
+            {'phone': second.phone, 'check_in': now},
+            {'phone': '9999999999', 'check_in': now},
+        ]
+        scans.extend({'member_id': str(third.id), 'check_in': now - timedelta(hours=h)} for h in range(5))
+
+        payload = {'check_ins': [dict(s, check_in=s['check_in'].isoformat()) for s in scans]}
+        # SAVEPOINT, members, recent check-ins, INSERT, UPDATE, 2 x 3 rollup upserts, RELEASE
+        with self.assertNumQueries(12):
+            response = self.client.post(URL + 'batch/', payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['checked_in'], response.data['duplicates'], response.data['not_found']), (9, 1, 1),
+        )
+        self.assertEqual([r['status'] for r in response.data['results'][:6]],
+                         ['checked_in', 'checked_in', 'duplicate', 'checked_in', 'checked_in', 'not_found'])
+
+        first.refresh_from_db()
+        self.assertEqual(first.last_check_in, now)
+        self.assertEqual(first.attendance_streak, 3)
+        third.refresh_from_db()
+        self.assertEqual(third.last_check_in, now)
+
+    def test_future_check_ins_are_rejected(self):
+        future = (timezone.now() + timedelta(hours=1)).isoformat()
+        response = self.client.post(URL, {'member_id': str(self.members[0].id), 'check_in': future}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_late_synced_scans_do_not_break_the_streak(self):
+        member = self.members[0]
+        now = timezone.now()
+        CheckInService.record(self.gym, [{'member_id': member.id, 'check_in': now}])
+        CheckInService.record(self.gym, [{'member_id': member.id, 'check_in': now - timedelta(days=3)}])
+
+        member.refresh_from_db()
+        self.assertEqual((member.attendance_streak, member.last_check_in), (1, now))
+        self.assertEqual(Attendance.objects.filter(member=member).count(), 2)
+
+
+class StreakTests(TestCase):
+    def test_advance_streak(self):
+        d = date(2025, 3, 10)
+        self.assertEqual(advance_streak(0, None, [d]), (1, d))
+        self.assertEqual(advance_streak(4, d, [d, d + timedelta(days=1)]), (5, d + timedelta(days=1)))
+        self.assertEqual(advance_streak(4, d, [d + timedelta(days=2)]), (1, d + timedelta(days=2)))
+        self.assertEqual(advance_streak(4, d, [d - timedelta(days=1)]), (4, d))
+        # Unmaintained streak: yesterday's visit still counts
+        self.assertEqual(advance_streak(0, d, [d + timedelta(days=1)]), (2, d + timedelta(days=1)))
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.fitness.models import Attendance, AttendanceHourly
+from apps.fitness.occupancy import OccupancyService
+from apps.gyms.models import Gym
+from apps.members.models import Member
+from apps.users.models import GymUser
+
+URL = '/api/v1/attendance/check-ins/'
+
+
+class OccupancyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.gym = Gym.objects.create(
+            name="Busy Gym", email="busy@gym.com", owner_name="Owner", owner_phone="9000000000", member_capacity=2,
+        )
+        today = timezone.localdate()
+        self.members = [
+            Member.objects.create(
+                gym=self.gym, name=f"Member {i}", phone=f"910000000{i}", join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30),
+            )
+            for i in range(3)
+        ]
+        desk = GymUser.objects.create_user(
+            "desk", "9000000002", "Front Desk", gym=self.gym, role='receptionist', password='pw'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(desk)
+
+    def post(self, path, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(URL + path, data, format='json')
+
+    def test_check_ins_and_check_outs_move_the_counter(self):
+        now = timezone.now()
+        with self.assertLogs('apps.fitness.occupancy', 'WARNING') as logs:
+            self.post('batch/', {'check_ins': [
+                {'member_id': str(self.members[0].id), 'check_in': (now - timedelta(minutes=30)).isoformat()},
+                {'member_id': str(self.members[1].id)},
+                # Replayed from yesterday: the visit is long over
+                {'member_id': str(self.members[2].id), 'check_in': (now - timedelta(days=1)).isoformat()},
+            ]})
+        self.assertIn("at capacity: 2/2", logs.output[-1])
+
+        with self.assertNumQueries(0):
+            status = OccupancyService.status(self.gym)
+        self.assertEqual(status, {'current': 2, 'capacity': 2, 'percent': 100, 'level': 'at_capacity'})
+
+        response = self.post('check-out/', {'phone': self.members[0].phone, 'check_out': now.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['duration_minutes'], 30)
+        self.assertEqual(self.client.get(URL + 'occupancy/').data['current'], 1)
+
+        # The rollup now holds the real 30 minutes instead of the assumed hour
+        visit = Attendance.objects.get(id=response.data['attendance_id'])
+        self.assertEqual(visit.check_out - visit.check_in, timedelta(minutes=30))
+        self.assertEqual(AttendanceHourly.objects.aggregate(m=Sum('visit_minutes'))['m'], 30 + 60 + 60)
+
+        self.assertEqual(self.post('check-out/', {'phone': self.members[0].phone}).status_code, 409)
+        self.assertEqual(self.post('check-out/', {'phone': '9999999999'}).status_code, 404)
+
+    def test_reconcile_closes_stale_visits_and_resets_counters(self):
+        now = timezone.now()
+        stale = Attendance.objects.create(gym=self.gym, member=self.members[0], check_in=now - timedelta(hours=5))
+        Attendance.objects.create(gym=self.gym, member=self.members[1], check_in=now - timedelta(minutes=10))
+        cache.set(f"fitness:occupancy:{self.gym.id}", 7)
+
+        out = StringIO()
+        call_command('reconcile_occupancy', stdout=out)
+        self.assertIn("1 members currently in", out.getvalue())
+        self.assertEqual(OccupancyService.count(self.gym), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.duration_minutes, 60)
+        self.assertEqual(stale.check_out, stale.check_in + timedelta(minutes=60))
+
+    def test_cache_miss_recounts_from_database(self):
+        Attendance.objects.create(gym=self.gym, member=self.members[0], check_in=timezone.now())
+        with self.assertNumQueries(1):
+            self.assertEqual(OccupancyService.count(self.gym), 1)
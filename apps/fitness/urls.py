@@ -0,0 +1,18 @@
+"""
+Fitness URL Configuration - REST Router.
+"""
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from apps.fitness.views import AttendanceAnalyticsViewSet, CheckInViewSet
+
+app_name = 'fitness'
+
+router = DefaultRouter()
+router.register(r'check-ins', CheckInViewSet, basename='check-in')
+router.register(r'analytics', AttendanceAnalyticsViewSet, basename='attendance-analytics')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,179 @@
+"""
+Fitness Views - check-in API for kiosks and access-control devices, and
+attendance analytics for gym owners.
+"""
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.core.permissions import IsGymOwnerOrManager, IsGymStaff
+from apps.fitness.analytics import AttendanceAnalyticsService
+from apps.fitness.serializers import (
+    AttendanceWindowSerializer,
+    CheckInBatchSerializer,
+    CheckInResultSerializer,
+    CheckInSerializer,
+    CheckOutResultSerializer,
+    CheckOutSerializer,
+    OccupancySerializer,
+)
+from apps.fitness.occupancy import OccupancyService
+from apps.fitness.services import CheckInService
+
+
+class CheckInViewSet(viewsets.ViewSet):
+    """
+    Check-in ingestion, scoped to the caller's gym.
+
+    - **POST /check-ins/**: one scan
+    - **POST /check-ins/batch/**: many scans (e.g. replayed after a device was offline)
+    - **POST /check-ins/check-out/**: close the member's open visit
+    - **GET /check-ins/occupancy/**: members in the gym now, against capacity
+
+    Repeat scans within ATTENDANCE_DEDUPE_MINUTES of a member's previous
+    check-in are acknowledged as `duplicate` and not stored.
+    """
+    permission_classes = [IsAuthenticated, IsGymStaff]
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Check In",
+        request=CheckInSerializer,
+        responses={201: CheckInResultSerializer, 200: CheckInResultSerializer, 404: CheckInResultSerializer},
+    )
+    def create(self, request):
+        """POST /api/v1/attendance/check-ins/ — Record one check-in."""
+        serializer = CheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        (result,), _ = CheckInService.record(request.user.gym, [serializer.validated_data])
+        code = {
+            CheckInService.Status.CHECKED_IN: status.HTTP_201_CREATED,
+            CheckInService.Status.DUPLICATE: status.HTTP_200_OK,
+            CheckInService.Status.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+        }[result['status']]
+        return Response(result, status=code)
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Check In (Batch)",
+        description="Record up to ATTENDANCE_BATCH_MAX check-ins. Results are returned in input order.",
+        request=CheckInBatchSerializer,
+    )
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """POST /api/v1/attendance/check-ins/batch/ — Record many check-ins."""
+        serializer = CheckInBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results, totals = CheckInService.record(request.user.gym, serializer.validated_data['check_ins'])
+        return Response({
+            'checked_in': totals[CheckInService.Status.CHECKED_IN],
+            'duplicates': totals[CheckInService.Status.DUPLICATE],
+            'not_found': totals[CheckInService.Status.NOT_FOUND],
+            'results': results,
+        })
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Check Out",
+        request=CheckOutSerializer,
+        responses={200: CheckOutResultSerializer, 404: CheckOutResultSerializer, 409: CheckOutResultSerializer},
+    )
+    @action(detail=False, methods=['post'], url_path='check-out')
+    def check_out(self, request):
+        """POST /api/v1/attendance/check-ins/check-out/ — Record a check-out."""
+        serializer = CheckOutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = CheckInService.check_out(request.user.gym, **serializer.validated_data)
+        code = {
+            CheckInService.Status.CHECKED_OUT: status.HTTP_200_OK,
+            CheckInService.Status.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+            CheckInService.Status.NOT_CHECKED_IN: status.HTTP_409_CONFLICT,
+        }[result['status']]
+        return Response(result, status=code)
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Live Occupancy",
+        description="Members in the gym right now, read from the cache (no database query once warm).",
+        responses={200: OccupancySerializer},
+    )
+    @action(detail=False, methods=['get'])
+    def occupancy(self, request):
+        """GET /api/v1/attendance/check-ins/occupancy/ — Live occupancy counter."""
+        return Response(OccupancyService.status(request.user.gym))
+
+
+def _window(request, default_days=1, max_days=1):
+    """Validated analytics query parameters, with `days` defaulted and capped for the endpoint."""
+    serializer = AttendanceWindowSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    params['days'] = min(params.get('days', default_days), max_days)
+    return params
+
+
+class AttendanceAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Attendance reports for the caller's gym, read from the hourly and daily
+    rollups (visit frequency scans at most 90 days of check-ins).
+
+    - **GET /analytics/heatmap/**: average check-ins per weekday and hour
+    - **GET /analytics/occupancy/**: hourly check-ins and average occupancy
+    - **GET /analytics/trend/**: daily check-ins and unique members
+    - **GET /analytics/visit-frequency/**: active members by visits per week
+    """
+    permission_classes = [IsAuthenticated, IsGymOwnerOrManager]
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Peak-Hour Heatmap",
+        parameters=[OpenApiParameter('weeks', int, description="Weeks to average over (1-52, default 8)")],
+    )
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """GET /api/v1/attendance/analytics/heatmap/ — Weekday x hour check-in averages."""
+        params = _window(request)
+        return Response(AttendanceAnalyticsService.heatmap(request.user.gym, weeks=params['weeks']))
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Occupancy Over Time",
+        parameters=[
+            OpenApiParameter('date', str, description="Last day (YYYY-MM-DD, default today)"),
+            OpenApiParameter('days', int, description="Days ending at `date` (1-31, default 1)"),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def occupancy(self, request):
+        """GET /api/v1/attendance/analytics/occupancy/ — Hourly occupancy series."""
+        params = _window(request, max_days=31)
+        series = AttendanceAnalyticsService.occupancy(request.user.gym, until=params.get('date'), days=params['days'])
+        return Response({'days': params['days'], 'series': series})
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Daily Attendance Trend",
+        parameters=[OpenApiParameter('days', int, description="Days to return (1-365, default 30)")],
+    )
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """GET /api/v1/attendance/analytics/trend/ — Daily check-ins and unique members."""
+        params = _window(request, 30, 365)
+        return Response({'days': params['days'], 'series': AttendanceAnalyticsService.trend(request.user.gym, params['days'])})
+
+    @extend_schema(
+        tags=['Attendance'],
+        summary="Visit Frequency",
+        parameters=[OpenApiParameter('days', int, description="Window in days (1-90, default 30)")],
+    )
+    @action(detail=False, methods=['get'], url_path='visit-frequency')
+    def visit_frequency(self, request):
+        """GET /api/v1/attendance/analytics/visit-frequency/ — Members by visits per week."""
+        params = _window(request, 30, 90)
+        return Response(AttendanceAnalyticsService.visit_frequency(request.user.gym, params['days']))
@@ -17,7 +17,7 @@ class MemberForm(forms.ModelForm):
             'dietary_preference', 'medical_conditions',
             'membership_plan', 'assigned_trainer',
             'join_date', 'membership_start', 'membership_expiry',
-            'amount_paid', 'status', 'emergency_contact',
+            'amount_paid', 'status', 'emergency_contact', 'whatsapp_opt_out',
         ]
 
     def __init__(self, *args, gym=None, **kwargs):
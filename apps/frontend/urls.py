@@ -41,6 +41,8 @@ urlpatterns = [
     path('members/', views.MemberListView.as_view(), name='member-list'),
     path('members/add/', views.MemberCreateView.as_view(), name='member-add'),
     path('members/import/', views.BulkImportView.as_view(), name='member-import'),
+    path('members/import/<uuid:pk>/status/', views.ImportJobStatusView.as_view(), name='member-import-status'),
+    path('members/import/<uuid:pk>/resume/', views.ImportJobResumeView.as_view(), name='member-import-resume'),
     path('members/import/sample/', views.SampleFileView.as_view(), name='member-import-sample'),
     path('members/scan-card/', views.CardScanView.as_view(), name='member-scan-card'),
     path('members/<uuid:pk>/', views.MemberDetailView.as_view(), name='member-detail'),
@@ -60,6 +62,8 @@ urlpatterns = [
     # ── WhatsApp Integration ──────────────────────────────
     path('whatsapp/', views.WhatsAppDashboardView.as_view(), name='whatsapp-dashboard'),
     path('whatsapp/broadcast/', views.WhatsAppBroadcastView.as_view(), name='whatsapp-broadcast'),
+    path('whatsapp/broadcast/<uuid:pk>/', views.WhatsAppBroadcastDetailView.as_view(), name='whatsapp-broadcast-detail'),
+    path('whatsapp/broadcast/<uuid:pk>/status/', views.WhatsAppBroadcastStatusView.as_view(), name='whatsapp-broadcast-status'),
     path('whatsapp/templates/', views.WhatsAppTemplatesView.as_view(), name='whatsapp-templates'),
     path('whatsapp/logs/', views.WhatsAppLogsView.as_view(), name='whatsapp-logs'),
 ]
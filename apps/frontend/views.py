@@ -10,7 +10,6 @@ from datetime import timedelta
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
@@ -19,13 +18,16 @@ from django.views import View
 from django.views.generic import ListView
 from apps.communications.models import WhatsAppMessage
 
+from apps.fitness.occupancy import OccupancyService
 from apps.gyms.models import Gym
+from apps.gyms.services import GymMetricsService
 from apps.enterprises.models import HoldingCompany, Brand, Organization
-from apps.members.models import Member, MembershipPlan
+from apps.members.models import ImportJob, Member, MembershipPlan
 from apps.billing.models import SubscriptionPlan
 from apps.users.models import GymUser
 from apps.users.services import OTPService
-from apps.members.services import BulkImportService, AIScanService
+from apps.members.search import MemberSearchService
+from apps.members.services import ImportJobService, AIScanService, GymStatsService
 from apps.frontend.forms import MemberForm
 
 logger = logging.getLogger('apps.frontend')
@@ -658,59 +660,23 @@ class DashboardView(LoginRequiredMixin, View):
         # Build stats
         if gym:
             members_qs = Member.objects.filter(gym=gym, is_deleted=False)
-            
-            # 1. Total & Status Counts
-            total_members = members_qs.count()
-            active_count = members_qs.filter(status='active').count()
-            expired_count = members_qs.filter(status='expired').count()
-            frozen_count = members_qs.filter(status='frozen').count()
-            
-            # 2. Revenue MTD
-            from django.db.models import Sum
-            today = timezone.now().date()
-            current_month_start = today.replace(day=1)
-            revenue_mtd = members_qs.filter(
-                join_date__gte=current_month_start
-            ).aggregate(total=Sum('amount_paid'))['total'] or 0
-            
-            # Last Month Revenue (Approximation for demo)
-            last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-            last_month_end = current_month_start - timedelta(days=1)
-            revenue_last_month = members_qs.filter(
-                join_date__gte=last_month_start,
-                join_date__lte=last_month_end
-            ).aggregate(total=Sum('amount_paid'))['total'] or 0
-            
-            revenue_growth = 0
-            if revenue_last_month > 0:
-                revenue_growth = int(((revenue_mtd - revenue_last_month) / revenue_last_month) * 100)
-            else:
-                 revenue_growth = 100 if revenue_mtd > 0 else 0
+            member_stats = GymStatsService.get_member_stats(queryset=members_qs)
 
-            # 3. Pending Renewals
+            # Pending Renewals
+            today = timezone.now().date()
             week_later = today + timedelta(days=7)
             expiring_soon_qs = members_qs.filter(
                 status='active',
                 membership_expiry__gte=today,
                 membership_expiry__lte=week_later,
             )
-            expiring_count = expiring_soon_qs.count()
-            # Calculate potential revenue from these renewals
-            pending_revenue = 0
-            for m in expiring_soon_qs:
-                if m.membership_plan:
-                    pending_revenue += m.membership_plan.price
-
-            # 4. Churn Risk & AI Insights
-            high_risk_qs = members_qs.filter(churn_risk_score__gte=70)
-            high_risk_count = high_risk_qs.count()
-            
-            # Detailed breakdown for "Why"
-            inactive_10_days = members_qs.filter(
-                last_check_in__lt=timezone.now() - timedelta(days=10),
-                status='active'
-            ).count()
-            
+            expiring_count = member_stats['expiring_7_days']
+            # Potential revenue from these renewals (summed over plan price in SQL)
+            pending_revenue = member_stats['expiring_7_days_amount']
+
+            high_risk_count = member_stats['high_churn_risk']
+            inactive_10_days = member_stats['inactive_10_days']
+
             # AI Insights List (Conversational)
             ai_insights = []
             if high_risk_count > 0:
@@ -723,13 +689,13 @@ class DashboardView(LoginRequiredMixin, View):
                 ai_insights.append("AI is analyzing member patterns. No critical alerts today.")
 
             stats = {
-                'total_members': total_members,
-                'active': active_count,
-                'expired': expired_count,
-                'frozen': frozen_count,
+                'total_members': member_stats['total_members'],
+                'active': member_stats['active'],
+                'expired': member_stats['expired'],
+                'frozen': member_stats['frozen'],
                 'high_churn_risk': high_risk_count,
-                'revenue_mtd': revenue_mtd,
-                'revenue_growth': revenue_growth,
+                'revenue_mtd': member_stats['revenue_mtd'],
+                'revenue_growth': member_stats['revenue_growth'],
                 'pending_renewals_amount': pending_revenue,
                 'pending_renewals_count': expiring_count,
                 'risk_inactive_count': inactive_10_days,
@@ -737,17 +703,20 @@ class DashboardView(LoginRequiredMixin, View):
             }
             recent_members = members_qs.order_by('-created_at')[:5]
             expiring_soon = expiring_soon_qs.order_by('membership_expiry')[:10]
+            occupancy = OccupancyService.status(gym)
         else:
             stats = {}
             recent_members = []
             expiring_soon = []
             ai_insights = []
+            occupancy = None
 
         return render(request, 'dashboard/index.html', {
             'stats': stats,
             'recent_members': recent_members,
             'expiring_soon': expiring_soon,
             'ai_insights': ai_insights,
+            'occupancy': occupancy,
             'today': timezone.now().date(),
         })
 
@@ -761,38 +730,19 @@ class BusinessHealthView(LoginRequiredMixin, View):
             return redirect('frontend:dashboard')
 
         members_qs = Member.objects.filter(gym=gym, is_deleted=False)
-        total_members = members_qs.count() or 1
+        member_stats = GymStatsService.get_member_stats(queryset=members_qs)
+        total_members = member_stats['total_members'] or 1
+        today = timezone.now().date()
 
         # 1. Revenue
-        from django.db.models import Sum
-        today = timezone.now().date()
-        current_month_start = today.replace(day=1)
-        revenue_mtd = members_qs.filter(
-            join_date__gte=current_month_start
-        ).aggregate(total=Sum('amount_paid'))['total'] or 0
-        
-        last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-        last_month_end = current_month_start - timedelta(days=1)
-        revenue_last = members_qs.filter(
-            join_date__gte=last_month_start,
-            join_date__lte=last_month_end
-        ).aggregate(total=Sum('amount_paid'))['total'] or 0
-
-        growth = 0
-        if revenue_last > 0:
-            growth = int(((revenue_mtd - revenue_last) / revenue_last) * 100)
-        else:
-            growth = 100 if revenue_mtd > 0 else 0
+        revenue_mtd = member_stats['revenue_mtd']
+        revenue_last = member_stats['revenue_last_month']
+        growth = member_stats['revenue_growth']
 
         # 2. Retention
-        active_count = members_qs.filter(status='active').count()
-        active_pct = int((active_count / total_members) * 100)
-        
-        expired_count = members_qs.filter(status='expired').count()
-        expired_pct = int((expired_count / total_members) * 100)
-        
-        at_risk_count = members_qs.filter(churn_risk_score__gte=70).count()
-        at_risk_pct = int((at_risk_count / total_members) * 100)
+        active_pct = int((member_stats['active'] / total_members) * 100)
+        expired_pct = int((member_stats['expired'] / total_members) * 100)
+        at_risk_pct = int((member_stats['high_churn_risk'] / total_members) * 100)
 
         # 3. Action Needed Lists
         inactive_7_days = members_qs.filter(
@@ -813,7 +763,16 @@ class BusinessHealthView(LoginRequiredMixin, View):
             membership_expiry__lte=today
         )[:5]
 
+        # 4. 30-day trend from the daily metrics rollup
+        trend = list(GymMetricsService.get_trend(gym, days=30).values(
+            'date', 'active_members', 'check_ins', 'revenue',
+        ))
+        peak = max((d['active_members'] for d in trend), default=0) or 1
+        for day in trend:
+            day['height_pct'] = max(int(day['active_members'] / peak * 100), 2)
+
         context = {
+            'trend': trend,
             'revenue': {
                 'mtd': revenue_mtd,
                 'last': revenue_last,
@@ -823,12 +782,15 @@ class BusinessHealthView(LoginRequiredMixin, View):
                 'active_pct': active_pct,
                 'expired_pct': expired_pct,
                 'at_risk_pct': at_risk_pct,
-                'total_members': total_members if members_qs.count() > 0 else 0
+                'total_members': member_stats['total_members']
             },
             'actions': {
                 'inactive': inactive_7_days,
                 'expiring': expiring_3_days,
-                'pending': payment_pending
+                'pending': payment_pending,
+                'inactive_count': member_stats['inactive_7_days'],
+                'expiring_count': member_stats['expiring_3_days'],
+                'pending_count': member_stats['payment_pending'],
             }
         }
         return render(request, 'dashboard/business_health.html', context)
@@ -854,11 +816,7 @@ class MemberListView(LoginRequiredMixin, View):
         # Search
         search = request.GET.get('search', '').strip()
         if search:
-            qs = qs.filter(
-                Q(name__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(email__icontains=search)
-            )
+            qs = MemberSearchService.filter(qs, search)
 
         # Filters
         status = request.GET.get('status', '')
@@ -968,7 +926,7 @@ class MemberEditView(LoginRequiredMixin, View):
 
 
 class BulkImportView(LoginRequiredMixin, View):
-    """Handle bulk import of members via CSV/Excel."""
+    """Start a background bulk import of members from CSV/Excel."""
     def post(self, request):
         gym = request.user.gym
         if not gym:
@@ -978,16 +936,39 @@ class BulkImportView(LoginRequiredMixin, View):
         if not file:
             return JsonResponse({'success': False, 'message': 'No file uploaded.'}, status=400)
 
-        success_count, errors = BulkImportService.process_file(file, gym)
+        if not file.name.endswith(('.csv', '.xls', '.xlsx')):
+            return JsonResponse({
+                'success': False,
+                'message': 'Import failed.',
+                'errors': ['Invalid file format. Please upload CSV or Excel.'],
+            }, status=400)
 
-        if success_count > 0:
-            if errors:
-                msg = f"Imported {success_count} members. {len(errors)} errors: " + "; ".join(errors[:3])
-            else:
-                msg = f"Successfully imported {success_count} members."
-            return JsonResponse({'success': True, 'message': msg, 'errors': errors})
-        else:
-            return JsonResponse({'success': False, 'message': 'Import failed.', 'errors': errors}, status=400)
+        job = ImportJobService.create_job(file, gym, user=request.user)
+        return JsonResponse({
+            'success': True,
+            'message': 'Import started.',
+            'job_id': str(job.id),
+            'status_url': reverse('frontend:member-import-status', args=[job.id]),
+        }, status=202)
+
+
+class ImportJobStatusView(LoginRequiredMixin, View):
+    """HTMX-polled progress fragment for a bulk import job."""
+    login_url = '/login/'
+
+    def get(self, request, pk):
+        job = get_object_or_404(ImportJob, pk=pk, gym=request.user.gym)
+        return render(request, 'members/import_status.html', {'job': job})
+
+
+class ImportJobResumeView(LoginRequiredMixin, View):
+    """Re-queue a failed or stalled import job from its last committed chunk."""
+    login_url = '/login/'
+
+    def post(self, request, pk):
+        job = get_object_or_404(ImportJob, pk=pk, gym=request.user.gym)
+        ImportJobService.resume(job)
+        return render(request, 'members/import_status.html', {'job': job})
 
 
 class SampleFileView(LoginRequiredMixin, View):
@@ -1321,33 +1302,50 @@ class WhatsAppDashboardView(WhatsAppBaseView, View):
     """
     Main dashboard for WhatsApp Automation.
     Shows general stats, recent runs, and options to manually broadcast.
+    Volume and spend come from the WhatsAppUsageDaily rollup, never the logs.
     """
+    SPEND_WINDOWS = (30, 90)
+
     def get(self, request):
         gym = request.user.gym
-        from apps.communications.models import WhatsAppAutomation, WhatsAppMessageLog
-        from django.db.models import Sum
+        from apps.communications.models import WhatsAppAutomation
+        from apps.communications.usage import WhatsAppUsageService
         from django.utils import timezone
 
-        today = timezone.now().date()
+        today = timezone.localdate()
+        days = next((d for d in self.SPEND_WINDOWS if request.GET.get('days') == str(d)), self.SPEND_WINDOWS[0])
         
         # Load automations
         automations = WhatsAppAutomation.objects.filter(gym=gym)
         
         # Stats
-        messages_today = WhatsAppMessageLog.objects.filter(
-            gym=gym, 
-            created_at__date=today
-        )
-        total_sent_today = messages_today.filter(status=WhatsAppMessageLog.DeliveryStatus.SENT).count()
-        failed_count_today = messages_today.filter(status=WhatsAppMessageLog.DeliveryStatus.FAILED).count()
+        totals_today = WhatsAppUsageService.totals(gym, since=today)
         latest_run = automations.order_by('-last_run_at').first()
         last_run_timestamp = latest_run.last_run_at if latest_run else None
 
+        # Spend chart
+        trend = WhatsAppUsageService.get_trend(gym, days=days)
+        peak_cost = max((d['cost_inr'] for d in trend), default=0) or 1
+        peak_sent = max((d['sent'] + d['failed'] for d in trend), default=0) or 1
+        for day in trend:
+            day['cost_pct'] = max(int(day['cost_inr'] / peak_cost * 100), 2)
+            day['volume_pct'] = max(int((day['sent'] + day['failed']) / peak_sent * 100), 2)
+
         context = {
             'automations': automations,
-            'total_sent_today': total_sent_today,
-            'failed_count_today': failed_count_today,
+            'total_sent_today': totals_today['sent'],
+            'failed_count_today': totals_today['failed'],
+            'cost_today': totals_today['cost_inr'],
             'last_run_timestamp': last_run_timestamp,
+            'spend': {
+                'days': days,
+                'windows': self.SPEND_WINDOWS,
+                'trend': trend,
+                'total_cost': sum(d['cost_inr'] for d in trend),
+                'total_sent': sum(d['sent'] for d in trend),
+                'total_failed': sum(d['failed'] for d in trend),
+                'by_type': WhatsAppUsageService.by_type(gym, days=days),
+            },
         }
         return render(request, 'communications/whatsapp_dashboard.html', context)
 
@@ -1378,6 +1376,8 @@ class WhatsAppTemplatesView(WhatsAppBaseView, View):
     def post(self, request):
         gym = request.user.gym
         from apps.communications.models import WhatsAppAutomation
+        from apps.communications.templating import TemplateError, compile_template
+        from django.contrib import messages
         
         auto_id = request.POST.get('automation_id')
         enabled = request.POST.get('enabled') == 'on'
@@ -1391,8 +1391,11 @@ class WhatsAppTemplatesView(WhatsAppBaseView, View):
                 if days_before is not None and days_before.strip():
                      automation.days_before = int(days_before)
                 if template:
+                     compile_template(template)
                      automation.template = template
                 automation.save()
+            except TemplateError as e:
+                messages.error(request, str(e))
             except WhatsAppAutomation.DoesNotExist:
                 pass
         
@@ -1402,15 +1405,36 @@ class WhatsAppTemplatesView(WhatsAppBaseView, View):
 class WhatsAppLogsView(WhatsAppBaseView, ListView):
     """
     Shows a table of recent WhatsApp messages sent.
+    Pages are keyset-paginated on (created_at, id), so older pages stay as
+    cheap as the first one however large the log grows.
     """
     template_name = 'communications/whatsapp_logs.html'
     context_object_name = 'messages'
-    paginate_by = 50
+    page_size = 50
+    ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         gym = self.request.user.gym
         from apps.communications.models import WhatsAppMessageLog
-        return WhatsAppMessageLog.objects.filter(gym=gym).select_related('member').order_by('-created_at')
+        from apps.core.pagination import InvalidCursor, keyset_paginate
+
+        # Only the columns the table shows: log responses and member rows are wide
+        logs = WhatsAppMessageLog.objects.filter(gym=gym).select_related('member').only(
+            'created_at', 'phone', 'message', 'status', 'member__id', 'member__name',
+        )
+        try:
+            self.page = keyset_paginate(
+                logs, self.ordering, self.page_size,
+                after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            self.page = keyset_paginate(logs, self.ordering, self.page_size)
+        return self.page.items
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        return context
 
 class WhatsAppBroadcastView(WhatsAppBaseView, View):
     """
@@ -1420,6 +1444,7 @@ class WhatsAppBroadcastView(WhatsAppBaseView, View):
         gym = request.user.gym
         from apps.members.models import MembershipPlan, Member
         from apps.leads.models import Lead
+        from apps.communications.audiences import CHECKIN_BUCKET_CHOICES
 
         plans = MembershipPlan.active_objects.filter(gym=gym)
         goals = Member.Goal.choices
@@ -1431,14 +1456,15 @@ class WhatsAppBroadcastView(WhatsAppBaseView, View):
             'plans': plans,
             'goals': goals,
             'members': members,
+            'checkin_buckets': CHECKIN_BUCKET_CHOICES,
         }
         return render(request, 'communications/whatsapp_broadcast.html', context)
 
     def post(self, request):
         gym = request.user.gym
-        from apps.members.models import Member, MembershipPlan
-        from apps.leads.models import Lead
-        from apps.communications.services import WhatsAppService
+        from apps.communications.audiences import AudienceError
+        from apps.communications.services import BroadcastService
+        from apps.communications.templating import TemplateError
         from django.contrib import messages
 
         audience = request.POST.get('audience')
@@ -1448,67 +1474,42 @@ class WhatsAppBroadcastView(WhatsAppBaseView, View):
             messages.error(request, "Please select an audience and write a message.")
             return redirect('frontend:whatsapp-broadcast')
 
-        recipients = {} # Dict to deduplicate: {phone: {'phone': str, 'name': str, 'member_obj': Member|None}}
-
-        def add_recipients(queryset, is_lead=False):
-            for obj in queryset:
-                if obj.phone:
-                    # Dedup by raw phone string
-                    clean_phone = obj.phone.strip()
-                    if clean_phone not in recipients:
-                        recipients[clean_phone] = {
-                            'phone': clean_phone,
-                            'name': obj.name,
-                            'member_obj': None if is_lead else obj
-                        }
-
-        if audience == 'active_members':
-            add_recipients(Member.objects.filter(gym=gym, status=Member.Status.ACTIVE))
-        
-        elif audience == 'expired_members':
-            add_recipients(Member.objects.filter(gym=gym, status=Member.Status.EXPIRED))
-        
-        elif audience == 'goal_group':
-            goal = request.POST.get('goal')
-            if goal:
-                add_recipients(Member.objects.filter(gym=gym, goal=goal))
-        
-        elif audience == 'specific_plan':
-            plan_id = request.POST.get('plan_id')
-            if plan_id:
-                add_recipients(Member.objects.filter(gym=gym, membership_plan_id=plan_id))
-        
-        elif audience == 'leads_only':
-            add_recipients(Lead.objects.filter(gym=gym), is_lead=True)
-        
-        elif audience == 'specific_member':
-            member_id = request.POST.get('member_id')
-            if member_id:
-                add_recipients(Member.objects.filter(gym=gym, id=member_id))
-        
-        final_recipients = list(recipients.values())
+        audience_filter = {
+            key: request.POST[key]
+            for key in ('goal', 'plan_id', 'member_id', 'bucket')
+            if request.POST.get(key)
+        }
+        try:
+            broadcast = BroadcastService.create(
+                gym, audience, message_text, audience_filter=audience_filter, user=request.user,
+            )
+        except (TemplateError, AudienceError) as e:
+            messages.error(request, str(e))
+            return redirect('frontend:whatsapp-broadcast')
         
-        if not final_recipients:
+        if not broadcast:
             messages.warning(request, "No users found with valid phone numbers for the selected criteria.")
             return redirect('frontend:whatsapp-broadcast')
-            
-        wa_service = WhatsAppService()
-        success_count = 0
-        
-        for r in final_recipients:
-            # Simple personalization
-            personalized_msg = message_text.replace('{{name}}', r['name'])
-            
-            # Send message using the service
-            result = wa_service.send_whatsapp_message(
-                phone=r['phone'],
-                message=personalized_msg,
-                gym=gym,
-                member=r['member_obj']
-            )
-            
-            if result and result.get('status') == 'sent':
-                success_count += 1
                 
-        messages.success(request, f"Successfully sent broadcast to {success_count} recipients (attempted {len(final_recipients)}).")
-        return redirect('frontend:whatsapp-logs')
+        messages.success(request, f"Broadcast queued for {broadcast.total_recipients} recipients.")
+        return redirect('frontend:whatsapp-broadcast-detail', pk=broadcast.id)
+
+
+class WhatsAppBroadcastDetailView(WhatsAppBaseView, View):
+    """
+    Live progress of a background broadcast (polls the status fragment).
+    """
+    def get(self, request, pk):
+        from apps.communications.models import Broadcast
+        broadcast = get_object_or_404(Broadcast, pk=pk, gym=request.user.gym)
+        return render(request, 'communications/whatsapp_broadcast_detail.html', {'broadcast': broadcast})
+
+
+class WhatsAppBroadcastStatusView(WhatsAppBaseView, View):
+    """
+    HTMX-polled progress fragment for a broadcast.
+    """
+    def get(self, request, pk):
+        from apps.communications.models import Broadcast
+        broadcast = get_object_or_404(Broadcast, pk=pk, gym=request.user.gym)
+        return render(request, 'communications/broadcast_status.html', {'broadcast': broadcast})
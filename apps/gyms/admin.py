@@ -7,7 +7,7 @@ from django.utils.html import format_html
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
-from apps.gyms.models import Gym
+from apps.gyms.models import Gym, GymDailyMetrics
 
 
 class GymResource(resources.ModelResource):
@@ -87,3 +87,16 @@ class GymAdmin(ImportExportModelAdmin):
             'border-radius:12px; font-size:11px; font-weight:600;">{}</span>',
             color, obj.get_subscription_status_display(),
         )
+
+
+@admin.register(GymDailyMetrics)
+class GymDailyMetricsAdmin(admin.ModelAdmin):
+    list_display = (
+        'gym', 'date', 'active_members', 'new_members', 'revenue',
+        'check_ins', 'whatsapp_sent', 'refreshed_at',
+    )
+    list_filter = ('date', 'gym')
+    search_fields = ('gym__name', 'gym__gym_code')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'refreshed_at')
+    date_hierarchy = 'date'
+    list_per_page = 50
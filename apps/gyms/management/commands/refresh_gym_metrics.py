@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.gyms.models import Gym
+from apps.gyms.services import GymMetricsService
+
+
+class Command(BaseCommand):
+    help = 'Refreshes the GymDailyMetrics rollup (one row per gym per day)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Day to refresh (YYYY-MM-DD). Defaults to today.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Also refresh the N-1 days before --date (backfill). Default: 1',
+        )
+        parser.add_argument(
+            '--gym',
+            help='Only refresh a single gym (gym code).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end_day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format.')
+
+        gyms = Gym.objects.filter(is_active=True, is_deleted=False)
+        if options['gym']:
+            gyms = gyms.filter(gym_code=options['gym'].upper())
+            if not gyms.exists():
+                raise CommandError(f"No active gym with code {options['gym']}.")
+
+        total = 0
+        for offset in range(max(options['days'], 1) - 1, -1, -1):
+            day = end_day - timedelta(days=offset)
+            written = GymMetricsService.refresh_day(day, gyms=gyms)
+            total += written
+            self.stdout.write(f"  {day}: {written} gyms")
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {total} daily metric rows'))
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:47
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0004_gym_organization'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GymDailyMetrics',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('total_members', models.IntegerField(default=0, verbose_name='Total Members')),
+                ('active_members', models.IntegerField(default=0, verbose_name='Active Members')),
+                ('expired_members', models.IntegerField(default=0, verbose_name='Expired Members')),
+                ('frozen_members', models.IntegerField(default=0, verbose_name='Frozen Members')),
+                ('churn_risk_low', models.IntegerField(default=0, help_text='Active members scoring below 40', verbose_name='Churn Risk: Low')),
+                ('churn_risk_medium', models.IntegerField(default=0, help_text='Active members scoring 40-69', verbose_name='Churn Risk: Medium')),
+                ('churn_risk_high', models.IntegerField(default=0, help_text='Active members scoring 70+', verbose_name='Churn Risk: High')),
+                ('new_members', models.IntegerField(default=0, verbose_name='New Members')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of amount_paid for members who joined on this date', max_digits=12, verbose_name='Revenue (₹)')),
+                ('check_ins', models.IntegerField(default=0, verbose_name='Check-ins')),
+                ('whatsapp_sent', models.IntegerField(default=0, verbose_name='WhatsApp Sent')),
+                ('whatsapp_failed', models.IntegerField(default=0, verbose_name='WhatsApp Failed')),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True, verbose_name='Refreshed At')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'Gym Daily Metrics',
+                'verbose_name_plural': 'Gym Daily Metrics',
+                'db_table': 'gyms_gymdailymetrics',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='idx_gdm_date')],
+                'unique_together': {('gym', 'date')},
+            },
+        ),
+    ]
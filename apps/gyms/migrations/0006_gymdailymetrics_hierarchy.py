@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0004_organization_entity_code_alter_organization_brand_and_more'),
+        ('gyms', '0005_gymdailymetrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gymdailymetrics',
+            name='brand',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_metrics', to='enterprises.brand', verbose_name='Brand'),
+        ),
+        migrations.AddField(
+            model_name='gymdailymetrics',
+            name='holding_company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_metrics', to='enterprises.holdingcompany', verbose_name='Holding Company'),
+        ),
+        migrations.AddField(
+            model_name='gymdailymetrics',
+            name='organization',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_metrics', to='enterprises.organization', verbose_name='Organization'),
+        ),
+        migrations.AddIndex(
+            model_name='gymdailymetrics',
+            index=models.Index(fields=['holding_company', 'date'], name='idx_gdm_holding_date'),
+        ),
+        migrations.AddIndex(
+            model_name='gymdailymetrics',
+            index=models.Index(fields=['brand', 'date'], name='idx_gdm_brand_date'),
+        ),
+        migrations.AddIndex(
+            model_name='gymdailymetrics',
+            index=models.Index(fields=['organization', 'date'], name='idx_gdm_org_date'),
+        ),
+    ]
@@ -275,3 +275,106 @@ class Gym(BaseModel):
         # Default to PNG if raw base64
         return f"data:image/png;base64,{self.logo_base64}"
 
+
+
+class GymDailyMetrics(BaseModel):
+    """
+    Materialized per-gym, per-day rollup of member, revenue, attendance and
+    messaging activity. Refreshed every GYM_METRICS_REFRESH_MINUTES by the
+    refresh_gym_metrics task (Celery beat; `manage.py refresh_gym_metrics`
+    from cron) so trend charts and consolidated dashboards never scan
+    members_member live.
+    """
+
+    gym = models.ForeignKey(
+        Gym,
+        on_delete=models.CASCADE,
+        related_name='daily_metrics',
+        verbose_name="Gym",
+    )
+    date = models.DateField(verbose_name="Date")
+
+    # ── Hierarchy Path (denormalized for one-statement rollups) ──
+    organization = models.ForeignKey(
+        'enterprises.Organization',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_metrics',
+        verbose_name="Organization",
+    )
+    brand = models.ForeignKey(
+        'enterprises.Brand',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_metrics',
+        verbose_name="Brand",
+    )
+    holding_company = models.ForeignKey(
+        'enterprises.HoldingCompany',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_metrics',
+        verbose_name="Holding Company",
+    )
+
+    # ── Member Snapshot (as of last refresh for this date) ────
+    total_members = models.IntegerField(default=0, verbose_name="Total Members")
+    active_members = models.IntegerField(default=0, verbose_name="Active Members")
+    expired_members = models.IntegerField(default=0, verbose_name="Expired Members")
+    frozen_members = models.IntegerField(default=0, verbose_name="Frozen Members")
+    churn_risk_low = models.IntegerField(
+        default=0,
+        verbose_name="Churn Risk: Low",
+        help_text="Active members scoring below 40",
+    )
+    churn_risk_medium = models.IntegerField(
+        default=0,
+        verbose_name="Churn Risk: Medium",
+        help_text="Active members scoring 40-69",
+    )
+    churn_risk_high = models.IntegerField(
+        default=0,
+        verbose_name="Churn Risk: High",
+        help_text="Active members scoring 70+",
+    )
+
+    # ── Daily Activity ────────────────────────────────────────
+    new_members = models.IntegerField(default=0, verbose_name="New Members")
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Revenue (₹)",
+        help_text="Sum of amount_paid for members who joined on this date",
+    )
+    check_ins = models.IntegerField(default=0, verbose_name="Check-ins")
+    whatsapp_sent = models.IntegerField(default=0, verbose_name="WhatsApp Sent")
+    whatsapp_failed = models.IntegerField(default=0, verbose_name="WhatsApp Failed")
+
+    refreshed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Refreshed At",
+    )
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'gyms_gymdailymetrics'
+        verbose_name = 'Gym Daily Metrics'
+        verbose_name_plural = 'Gym Daily Metrics'
+        ordering = ['-date']
+        unique_together = ['gym', 'date']
+        indexes = [
+            models.Index(fields=['date'], name='idx_gdm_date'),
+            models.Index(fields=['holding_company', 'date'], name='idx_gdm_holding_date'),
+            models.Index(fields=['brand', 'date'], name='idx_gdm_brand_date'),
+            models.Index(fields=['organization', 'date'], name='idx_gdm_org_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.gym.name} - {self.date}"
@@ -0,0 +1,160 @@
+"""
+Gyms Services - Daily metrics rollup (GymDailyMetrics).
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.gyms.models import Gym, GymDailyMetrics
+
+logger = logging.getLogger('apps.gyms.services')
+
+# Written only while `date` is today: they describe current member state.
+SNAPSHOT_FIELDS = [
+    'total_members', 'active_members', 'expired_members', 'frozen_members',
+    'churn_risk_low', 'churn_risk_medium', 'churn_risk_high',
+]
+# Event counts for the day itself: safe to recompute for any past date.
+ACTIVITY_FIELDS = [
+    'new_members', 'revenue', 'check_ins', 'whatsapp_sent', 'whatsapp_failed',
+]
+HIERARCHY_FIELDS = ['organization', 'brand', 'holding_company']
+
+
+def _day_bounds(day):
+    """Aware [start, end) datetimes for a local calendar day (index-friendly)."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+class GymMetricsService:
+    """Builds and reads the GymDailyMetrics rollup."""
+
+    @staticmethod
+    def refresh_day(day=None, gyms=None):
+        """
+        Recompute GymDailyMetrics rows for `day` (default: today) across `gyms`
+        (default: all active gyms) using one grouped query per source table,
+        then upsert every row in a single bulk statement.
+
+        Member snapshot fields are only written when `day` is today; backfilled
+        rows keep whatever snapshot was captured when that day was current.
+        Returns the number of rows written.
+        """
+        from apps.communications.models import WhatsAppUsageDaily
+        from apps.fitness.models import Attendance
+        from apps.members.models import Member
+
+        today = timezone.localdate()
+        day = day or today
+        if gyms is None:
+            gyms = Gym.objects.filter(is_active=True, is_deleted=False)
+        gym_ids = list(gyms.values_list('id', flat=True))
+        if not gym_ids:
+            return 0
+
+        start, end = _day_bounds(day)
+        rows = {
+            g['id']: {
+                'organization_id': g['organization_id'],
+                'brand_id': g['organization__brand_id'],
+                'holding_company_id': g['organization__brand__holding_company_id'],
+            }
+            for g in Gym.objects.filter(id__in=gym_ids).values(
+                'id', 'organization_id', 'organization__brand_id',
+                'organization__brand__holding_company_id',
+            )
+        }
+
+        def merge(queryset):
+            for row in queryset:
+                rows[row.pop('gym_id')].update(row)
+
+        members = Member.objects.filter(gym_id__in=gym_ids, is_deleted=False).order_by()
+        active = Q(status=Member.Status.ACTIVE)
+
+        if day == today:
+            merge(members.values('gym_id').annotate(
+                total_members=Count('id'),
+                active_members=Count('id', filter=active),
+                expired_members=Count('id', filter=Q(status=Member.Status.EXPIRED)),
+                frozen_members=Count('id', filter=Q(status=Member.Status.FROZEN)),
+                churn_risk_low=Count('id', filter=active & Q(churn_risk_score__lt=40)),
+                churn_risk_medium=Count('id', filter=active & Q(churn_risk_score__gte=40, churn_risk_score__lt=70)),
+                churn_risk_high=Count('id', filter=active & Q(churn_risk_score__gte=70)),
+            ))
+
+        merge(members.filter(join_date=day).values('gym_id').annotate(
+            new_members=Count('id'),
+            revenue=Sum('amount_paid'),
+        ))
+
+        merge(Attendance.objects.filter(
+            gym_id__in=gym_ids, is_deleted=False, check_in__gte=start, check_in__lt=end,
+        ).order_by().values('gym_id').annotate(check_ins=Count('id')))
+
+        merge(WhatsAppUsageDaily.objects.filter(
+            gym_id__in=gym_ids, date=day,
+        ).order_by().values('gym_id').annotate(
+            whatsapp_sent=Sum('sent'),
+            whatsapp_failed=Sum('failed'),
+        ))
+
+        refreshed_at = timezone.now()
+        objs = []
+        for gym_id, data in rows.items():
+            data['revenue'] = data.get('revenue') or 0
+            objs.append(GymDailyMetrics(gym_id=gym_id, date=day, refreshed_at=refreshed_at, **data))
+
+        update_fields = HIERARCHY_FIELDS + ACTIVITY_FIELDS + ['refreshed_at', 'updated_at']
+        if day == today:
+            update_fields = SNAPSHOT_FIELDS + update_fields
+
+        GymDailyMetrics.objects.bulk_create(
+            objs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['gym', 'date'],
+            update_fields=update_fields,
+        )
+        logger.info(f"Refreshed daily metrics for {len(objs)} gyms on {day}")
+        return len(objs)
+
+    @staticmethod
+    def ensure_days(gyms, since, until=None):
+        """
+        Make sure every gym in `gyms` has a rollup row for each day from
+        `since` to `until` (default: today), refreshing only the missing
+        (day, gym) pairs. One query when nothing is missing. Returns the
+        gym ids.
+        """
+        until = until or timezone.localdate()
+        gym_ids = list(gyms.values_list('id', flat=True))
+        have = set(GymDailyMetrics.objects.filter(
+            gym_id__in=gym_ids, date__gte=since, date__lte=until,
+        ).values_list('gym_id', 'date'))
+        for offset in range((until - since).days + 1):
+            day = since + timedelta(days=offset)
+            missing = [gym_id for gym_id in gym_ids if (gym_id, day) not in have]
+            if missing:
+                GymMetricsService.refresh_day(day, gyms=Gym.objects.filter(id__in=missing))
+        return gym_ids
+
+    @staticmethod
+    def get_today(gyms):
+        """
+        Today's rollup rows for `gyms`, refreshing any gym that has no row yet
+        (e.g. the scheduled job has not run today). Returns a queryset.
+        """
+        today = timezone.localdate()
+        gym_ids = GymMetricsService.ensure_days(gyms, today, today)
+        return GymDailyMetrics.objects.filter(gym_id__in=gym_ids, date=today)
+
+    @staticmethod
+    def get_trend(gym, days=30):
+        """Daily rollup rows for the last `days` days, oldest first."""
+        since = timezone.localdate() - timedelta(days=days - 1)
+        return GymDailyMetrics.objects.filter(gym=gym, date__gte=since).order_by('date')
@@ -0,0 +1,20 @@
+"""
+Gyms Celery tasks.
+"""
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+
+@shared_task
+def refresh_gym_metrics(days=1):
+    """Refresh every active gym's GymDailyMetrics rows for the last `days` days up to today (Celery beat)."""
+    from apps.gyms.services import GymMetricsService
+
+    today = timezone.localdate()
+    return sum(
+        GymMetricsService.refresh_day(today - timedelta(days=offset))
+        for offset in range(max(days, 1) - 1, -1, -1)
+    )
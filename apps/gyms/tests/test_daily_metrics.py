@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+
+from apps.communications.services import OutboundQueueService
+from apps.gyms.models import Gym, GymDailyMetrics
+from apps.gyms.services import GymMetricsService
+from apps.members.models import Member
+from apps.fitness.models import Attendance
+
+
+class GymDailyMetricsTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Metrics Gym", email="metrics@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.today = timezone.localdate()
+        self.member = Member.objects.create(
+            gym=self.gym, name="Active One", phone="9200000001", join_date=self.today,
+            membership_start=self.today, membership_expiry=self.today + timedelta(days=30),
+            amount_paid=1500, churn_risk_score=75,
+        )
+        Member.objects.create(
+            gym=self.gym, name="Expired One", phone="9200000002", status='expired',
+            join_date=self.today - timedelta(days=60), membership_start=self.today - timedelta(days=60),
+            membership_expiry=self.today - timedelta(days=30),
+        )
+        Attendance.objects.create(gym=self.gym, member=self.member, check_in=timezone.now())
+        # Send the welcome messages queued by the post_save signal
+        OutboundQueueService.drain(workers=1)
+
+    def test_refresh_today(self):
+        GymMetricsService.refresh_day()
+        row = GymDailyMetrics.objects.get(gym=self.gym, date=self.today)
+
+        self.assertEqual(row.total_members, 2)
+        self.assertEqual(row.active_members, 1)
+        self.assertEqual(row.expired_members, 1)
+        self.assertEqual(row.churn_risk_high, 1)
+        self.assertEqual(row.new_members, 1)
+        self.assertEqual(row.revenue, 1500)
+        self.assertEqual(row.check_ins, 1)
+        # Welcome message from the post_save signal (simulation mode)
+        self.assertEqual(row.whatsapp_sent, 2)
+
+    def test_refresh_is_idempotent(self):
+        GymMetricsService.refresh_day()
+        GymMetricsService.refresh_day()
+        self.assertEqual(GymDailyMetrics.objects.filter(gym=self.gym).count(), 1)
+
+    def test_backfill_keeps_snapshot(self):
+        yesterday = self.today - timedelta(days=1)
+        GymDailyMetrics.objects.create(gym=self.gym, date=yesterday, active_members=42)
+
+        out = StringIO()
+        call_command('refresh_gym_metrics', days=2, stdout=out)
+
+        self.assertEqual(GymDailyMetrics.objects.get(gym=self.gym, date=yesterday).active_members, 42)
+        self.assertEqual(GymDailyMetrics.objects.get(gym=self.gym, date=self.today).active_members, 1)
+
+    def test_get_today_refreshes_missing(self):
+        rows = GymMetricsService.get_today(Gym.objects.filter(pk=self.gym.pk))
+        self.assertEqual(rows.get().total_members, 2)
+
+    def test_scheduled_refresh_updates_stale_rows(self):
+        from apps.gyms.tasks import refresh_gym_metrics
+
+        GymMetricsService.refresh_day()
+        Member.objects.create(
+            gym=self.gym, name="Late Joiner", phone="9200000003", join_date=self.today,
+            membership_start=self.today, membership_expiry=self.today + timedelta(days=30), amount_paid=500,
+        )
+
+        self.assertEqual(refresh_gym_metrics(days=2), 2)
+        row = GymDailyMetrics.objects.get(gym=self.gym, date=self.today)
+        self.assertEqual((row.total_members, row.new_members, row.revenue), (3, 2, 2000))
+        self.assertTrue(GymDailyMetrics.objects.filter(gym=self.gym, date=self.today - timedelta(days=1)).exists())
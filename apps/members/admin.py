@@ -7,7 +7,7 @@ from django.utils.html import format_html
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
-from apps.members.models import Member, MembershipPlan
+from apps.members.models import ImportJob, Member, MembershipPlan
 
 
 # ── MembershipPlan ────────────────────────────────────────────
@@ -68,7 +68,7 @@ class MemberAdmin(ImportExportModelAdmin):
     )
     list_filter = (
         'status', 'goal', 'experience_level', 'gender',
-        'dietary_preference', 'gym',
+        'dietary_preference', 'whatsapp_opt_out', 'gym',
     )
     search_fields = ('name', 'phone', 'email', 'gym__name', 'gym__gym_code')
     readonly_fields = (
@@ -99,6 +99,7 @@ class MemberAdmin(ImportExportModelAdmin):
             'fields': (
                 'assigned_trainer', 'attendance_streak',
                 'last_check_in', 'churn_risk_score', 'emergency_contact',
+                'whatsapp_opt_out',
             ),
         }),
         ('Timestamps', {
@@ -135,3 +136,20 @@ class MemberAdmin(ImportExportModelAdmin):
             '<span style="color:{}; font-weight:600;">{}%</span>',
             color, score,
         )
+
+
+# ── ImportJob ─────────────────────────────────────────────────
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'original_filename', 'gym', 'status', 'processed_rows',
+        'total_rows', 'success_count', 'error_count', 'created_at',
+    )
+    list_filter = ('status', 'gym')
+    search_fields = ('original_filename', 'gym__name', 'gym__gym_code')
+    readonly_fields = (
+        'id', 'created_at', 'updated_at', 'started_at', 'finished_at',
+        'processed_rows', 'success_count', 'error_count', 'errors', 'last_error',
+    )
+    list_per_page = 50
@@ -0,0 +1,150 @@
+"""
+Members Churn - batch scoring of Member.churn_risk_score.
+
+Per gym, two queries pull every member's features (the member rows, and
+their attendance counts for the last 60 days); pandas/NumPy score them all
+at once and only changed scores are written back with bulk_update. No
+per-member queries and no LLM calls, so 100k members score in seconds.
+
+Recency and days-to-expiry move with the calendar, so run a full pass
+nightly; `changed_only` passes rescore just the members updated since their
+last score (e.g. after check-ins or renewals).
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.fitness.models import Attendance
+from apps.members.models import Member
+
+logger = logging.getLogger('apps.members.churn')
+
+# Each factor is a 0..1 risk; the score is their weighted sum scaled to 0..100.
+CHURN_WEIGHTS = {
+    'recency': 0.30,    # days since the last visit
+    'frequency': 0.20,  # visits in the last 30 days
+    'trend': 0.10,      # drop against the 30 days before
+    'expiry': 0.20,     # membership ending soon, or already ended
+    'tenure': 0.10,     # new members churn more
+    'payment': 0.10,    # share of the plan price still unpaid
+}
+ABSENCE_DAYS = 21           # gone this long = maximum recency risk
+TARGET_VISITS = 12          # visits per 30 days that count as fully engaged
+EXPIRY_HORIZON_DAYS = 30    # expiry risk starts rising this many days out
+SETTLED_TENURE_DAYS = 180   # tenure risk is gone after this long
+SCORE_BATCH_SIZE = 1000
+
+MEMBER_FEATURES = [
+    'id', 'last_check_in', 'membership_start', 'membership_expiry',
+    'join_date', 'amount_paid', 'membership_plan__price', 'churn_risk_score',
+]
+
+
+def load_features(members, gym, now):
+    """
+    DataFrame of scoring inputs for the `members` queryset (all in `gym`):
+    the MEMBER_FEATURES columns plus `visits_recent` / `visits_prior`
+    (check-ins in the last 30 days and the 30 before). Attendance is only
+    aggregated for `members`, so an incremental run reads just their visits.
+    """
+    df = pd.DataFrame.from_records(list(members.values_list(*MEMBER_FEATURES)), columns=MEMBER_FEATURES)
+    if df.empty:
+        return df
+
+    month_ago = now - timedelta(days=30)
+    visits = pd.DataFrame.from_records(
+        list(Attendance.objects.filter(
+            gym=gym, member_id__in=members.values('id'), is_deleted=False,
+            check_in__gte=now - timedelta(days=60), check_in__lte=now,
+        ).order_by().values('member_id').annotate(
+            visits_recent=Count('id', filter=Q(check_in__gte=month_ago)),
+            visits_prior=Count('id', filter=Q(check_in__lt=month_ago)),
+        ).values_list('member_id', 'visits_recent', 'visits_prior')),
+        columns=['id', 'visits_recent', 'visits_prior'],
+    )
+    df = df.merge(visits, on='id', how='left')
+    df[['visits_recent', 'visits_prior']] = df[['visits_recent', 'visits_prior']].fillna(0)
+    return df
+
+
+def score_features(df, now):
+    """Vectorized churn scores (int array, 0..100) for a load_features() frame."""
+    today = pd.Timestamp(timezone.localdate(now))
+    now = pd.Timestamp(now)
+
+    # Never checked in: count the absence from the start of the membership
+    last_seen = pd.to_datetime(df['last_check_in'], utc=True)
+    started = pd.to_datetime(df['membership_start']).dt.tz_localize(now.tz)
+    recency_days = (now - last_seen.fillna(started)).dt.total_seconds().to_numpy() / 86400
+    days_to_expiry = (pd.to_datetime(df['membership_expiry']) - today).dt.days.to_numpy()
+    tenure_days = (today - pd.to_datetime(df['join_date'])).dt.days.to_numpy()
+    recent = df['visits_recent'].to_numpy(dtype=float)
+    prior = df['visits_prior'].to_numpy(dtype=float)
+    paid = df['amount_paid'].astype(float).to_numpy()
+    price = df['membership_plan__price'].astype(float).fillna(0).to_numpy()
+    paid_ratio = np.where(price > 0, np.clip(paid / np.where(price > 0, price, 1), 0, 1), 1.0)
+
+    w = CHURN_WEIGHTS
+    risk = (
+        w['recency'] * np.clip(recency_days / ABSENCE_DAYS, 0, 1)
+        + w['frequency'] * (1 - np.clip(recent / TARGET_VISITS, 0, 1))
+        + w['trend'] * np.clip((prior - recent) / np.maximum(prior, 1), 0, 1)
+        + w['expiry'] * np.clip(1 - days_to_expiry / EXPIRY_HORIZON_DAYS, 0, 1)
+        + w['tenure'] * (1 - np.clip(tenure_days / SETTLED_TENURE_DAYS, 0, 1))
+        + w['payment'] * (1 - paid_ratio)
+    )
+    return np.clip(np.rint(risk * 100), 0, 100).astype(int)
+
+
+class ChurnScoringService:
+    """Computes Member.churn_risk_score in bulk."""
+
+    @staticmethod
+    def score_gym(gym, changed_only=False, now=None):
+        """
+        Score `gym`'s members (only those updated since their last score when
+        `changed_only`) and stamp churn_scored_at. Returns a Counter of
+        members 'scored' and scores 'updated'.
+        """
+        now = now or timezone.now()
+        members = Member.objects.filter(gym=gym, is_deleted=False)
+        if changed_only:
+            members = members.filter(Q(churn_scored_at__isnull=True) | Q(updated_at__gt=F('churn_scored_at')))
+
+        df = load_features(members, gym, now)
+        if df.empty:
+            return Counter()
+        df['score'] = score_features(df, now)
+
+        changed = df.loc[df['score'] != df['churn_risk_score'], ['id', 'score']]
+        Member.objects.bulk_update(
+            [Member(id=pk, churn_risk_score=score) for pk, score in changed.itertuples(index=False)],
+            ['churn_risk_score'],
+            batch_size=SCORE_BATCH_SIZE,
+        )
+        # Rows saved after `now` keep updated_at > churn_scored_at and are picked up next time.
+        # Chunked so no statement carries more ids than the backend allows.
+        ids = df['id'].tolist()
+        for i in range(0, len(ids), SCORE_BATCH_SIZE):
+            members.filter(id__in=ids[i:i + SCORE_BATCH_SIZE]).update(churn_scored_at=now)
+        return Counter(scored=len(df), updated=len(changed))
+
+    @staticmethod
+    def score_all(gyms=None, changed_only=False):
+        """Score every active gym (or `gyms`). Returns the summed Counter."""
+        from apps.gyms.models import Gym
+
+        if gyms is None:
+            gyms = Gym.objects.filter(is_active=True, is_deleted=False)
+        totals = Counter()
+        now = timezone.now()
+        for gym in gyms.only('id'):
+            totals += ChurnScoringService.score_gym(gym, changed_only=changed_only, now=now)
+        logger.info(f"Churn scoring: {totals['scored']} members scored, {totals['updated']} scores changed")
+        return totals
@@ -3,8 +3,10 @@ Members Filters - Django Filter for Member queryset.
 """
 
 import django_filters
+from rest_framework.filters import SearchFilter
 
 from apps.members.models import Member
+from apps.members.search import MemberSearchService
 
 
 class MemberFilter(django_filters.FilterSet):
@@ -68,3 +70,16 @@ class MemberFilter(django_filters.FilterSet):
             'status', 'goal', 'gender', 'experience_level',
             'dietary_preference', 'assigned_trainer', 'membership_plan',
         ]
+
+
+class MemberSearchFilter(SearchFilter):
+    """
+    ?search= through MemberSearchService (indexed phone suffix, trigram
+    name / email on PostgreSQL) instead of icontains across search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return MemberSearchService.filter(queryset, ' '.join(terms))
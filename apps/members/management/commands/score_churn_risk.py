@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gyms.models import Gym
+from apps.members.churn import ChurnScoringService
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Member.churn_risk_score for every active gym'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--changed',
+            action='store_true',
+            help='Only rescore members updated since they were last scored.',
+        )
+        parser.add_argument(
+            '--gym',
+            help='Only score a single gym (gym code).',
+        )
+
+    def handle(self, *args, **options):
+        gyms = Gym.objects.filter(is_active=True, is_deleted=False)
+        if options['gym']:
+            gyms = gyms.filter(gym_code=options['gym'].upper())
+            if not gyms.exists():
+                raise CommandError(f"No active gym with code {options['gym']}.")
+
+        totals = ChurnScoringService.score_all(gyms=gyms, changed_only=options['changed'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {totals['scored']} members ({totals['updated']} scores changed)"
+        ))
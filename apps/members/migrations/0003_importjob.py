@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:53
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID v4)', primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created', verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated', verbose_name='Updated At')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag. If True, the record is considered deleted.', verbose_name='Is Deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when the record was soft-deleted', null=True, verbose_name='Deleted At')),
+                ('file', models.FileField(upload_to='member_imports/', verbose_name='Upload File')),
+                ('original_filename', models.CharField(max_length=255, verbose_name='Original Filename')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('total_rows', models.IntegerField(blank=True, null=True, verbose_name='Total Rows')),
+                ('processed_rows', models.IntegerField(default=0, help_text='Rows already committed; a resumed job skips these', verbose_name='Processed Rows')),
+                ('success_count', models.IntegerField(default=0, verbose_name='Imported')),
+                ('error_count', models.IntegerField(default=0, verbose_name='Errors')),
+                ('errors', models.JSONField(blank=True, default=list, help_text='First row errors (capped); error_count has the full total', verbose_name='Row Errors')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Failure Reason')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='gyms.gym', verbose_name='Gym')),
+            ],
+            options={
+                'verbose_name': 'Import Job',
+                'verbose_name_plural': 'Import Jobs',
+                'db_table': 'members_importjob',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['gym', 'status'], name='idx_importjob_gym_status')],
+            },
+        ),
+    ]
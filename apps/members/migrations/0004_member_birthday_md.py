@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:07
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def backfill_birthday_md(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    Member.objects.filter(date_of_birth__isnull=False).update(
+        birthday_md=ExtractMonth('date_of_birth') * 100 + ExtractDay('date_of_birth'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0003_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='birthday_md',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='month * 100 + day of date_of_birth, kept in sync on save for indexed birthday lookups', null=True, verbose_name='Birthday (MMDD)'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['gym', 'birthday_md'], name='idx_member_gym_bday'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['gym', 'last_check_in'], name='idx_member_gym_checkin'),
+        ),
+        migrations.RunPython(backfill_birthday_md, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_member_birthday_md'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='whatsapp_opt_out',
+            field=models.BooleanField(default=False, help_text='Member asked not to receive promotional WhatsApp messages (e.g. daily quotes)', verbose_name='WhatsApp Opt-out'),
+        ),
+    ]
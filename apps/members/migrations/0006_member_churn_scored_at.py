@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_member_whatsapp_opt_out'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='churn_scored_at',
+            field=models.DateTimeField(blank=True, help_text='When churn_risk_score was last computed; members updated since are rescored incrementally', null=True, verbose_name='Churn Scored At'),
+        ),
+    ]
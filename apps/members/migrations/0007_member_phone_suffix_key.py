@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_phone_suffix_key(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    batch = []
+    for member in Member.objects.only('id', 'phone').iterator(chunk_size=2000):
+        member.phone_suffix_key = ''.join(ch for ch in member.phone or '' if ch.isdigit())[-10:][::-1]
+        batch.append(member)
+        if len(batch) == 2000:
+            Member.objects.bulk_update(batch, ['phone_suffix_key'])
+            batch = []
+    Member.objects.bulk_update(batch, ['phone_suffix_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0006_gymdailymetrics_hierarchy'),
+        ('members', '0006_member_churn_scored_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='phone_suffix_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Last 10 digits of phone, reversed and kept in sync on save: a phone suffix search is an indexed prefix range', max_length=10, verbose_name='Phone Search Key'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['gym', 'phone_suffix_key'], name='idx_member_gym_phone_key'),
+        ),
+        migrations.RunPython(backfill_phone_suffix_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+"""
+pg_trgm GIN indexes for member search on PostgreSQL. They match the SQL
+Django emits for the lookups in apps.members.search: UPPER(col::text) for
+name/email __icontains and col::text for phone __contains. Other databases
+(SQLite in development) skip this migration's SQL and search by scanning.
+"""
+
+from django.db import migrations
+
+TRIGRAM_INDEXES = {
+    'idx_member_name_trgm': '(UPPER("name"::text) gin_trgm_ops)',
+    'idx_member_email_trgm': '(UPPER("email"::text) gin_trgm_ops)',
+    'idx_member_phone_trgm': '("phone"::text gin_trgm_ops)',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON members_member USING gin {expression}'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('members', '0007_member_phone_suffix_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
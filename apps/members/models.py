@@ -3,7 +3,11 @@ Members App - Member & MembershipPlan Models
 Gym members and the membership plans gyms sell.
 """
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from apps.core.models import BaseModel, ActiveManager
 
@@ -93,6 +97,14 @@ class Member(BaseModel):
         max_length=20,
         verbose_name="Phone Number",
     )
+    phone_suffix_key = models.CharField(
+        max_length=10,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Phone Search Key",
+        help_text="Last 10 digits of phone, reversed and kept in sync on save: a phone suffix search is an indexed prefix range",
+    )
     email = models.EmailField(
         null=True,
         blank=True,
@@ -116,6 +128,13 @@ class Member(BaseModel):
         blank=True,
         verbose_name="Date of Birth",
     )
+    birthday_md = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Birthday (MMDD)",
+        help_text="month * 100 + day of date_of_birth, kept in sync on save for indexed birthday lookups",
+    )
     profile_photo = models.ImageField(
         upload_to='member_photos/',
         null=True,
@@ -221,6 +240,12 @@ class Member(BaseModel):
         verbose_name="Churn Risk Score",
         help_text="AI-predicted score: 0 (safe) to 100 (high risk)",
     )
+    churn_scored_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Churn Scored At",
+        help_text="When churn_risk_score was last computed; members updated since are rescored incrementally",
+    )
 
     # ── Status ────────────────────────────────────────────────
     class Status(models.TextChoices):
@@ -241,6 +266,11 @@ class Member(BaseModel):
         blank=True,
         verbose_name="Emergency Contact",
     )
+    whatsapp_opt_out = models.BooleanField(
+        default=False,
+        verbose_name="WhatsApp Opt-out",
+        help_text="Member asked not to receive promotional WhatsApp messages (e.g. daily quotes)",
+    )
 
     objects = models.Manager()
     active_objects = ActiveManager()
@@ -256,7 +286,142 @@ class Member(BaseModel):
             models.Index(fields=['gym', 'membership_expiry'], name='idx_member_gym_expiry'),
             models.Index(fields=['gym', 'churn_risk_score'], name='idx_member_gym_churn'),
             models.Index(fields=['gym', 'phone'], name='idx_member_gym_phone'),
+            models.Index(fields=['gym', 'birthday_md'], name='idx_member_gym_bday'),
+            models.Index(fields=['gym', 'last_check_in'], name='idx_member_gym_checkin'),
+            models.Index(fields=['gym', 'phone_suffix_key'], name='idx_member_gym_phone_key'),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.phone})"
+
+    @staticmethod
+    def birthday_key(day):
+        """The birthday_md value for a date (e.g. 14 Mar -> 314)."""
+        return day.month * 100 + day.day
+
+    @staticmethod
+    def phone_key(phone):
+        """The phone_suffix_key value for a phone number (e.g. '+91 98765 43210' -> '0123456789')."""
+        digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+        return digits[-10:][::-1]
+
+    def save(self, *args, **kwargs):
+        self.birthday_md = self.birthday_key(self.date_of_birth) if self.date_of_birth else None
+        self.phone_suffix_key = self.phone_key(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'date_of_birth': 'birthday_md', 'phone': 'phone_suffix_key'}
+            kwargs['update_fields'] = {*update_fields, *(derived[f] for f in update_fields if f in derived)}
+        super().save(*args, **kwargs)
+
+
+class ImportJob(BaseModel):
+    """
+    A background bulk member import. Rows are committed in chunks together
+    with `processed_rows`, so a failed job can resume where it stopped.
+    """
+
+    gym = models.ForeignKey(
+        'gyms.Gym',
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name="Gym",
+    )
+    created_by = models.ForeignKey(
+        'users.GymUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='import_jobs',
+        verbose_name="Created By",
+    )
+    file = models.FileField(
+        upload_to='member_imports/',
+        verbose_name="Upload File",
+    )
+    original_filename = models.CharField(
+        max_length=255,
+        verbose_name="Original Filename",
+    )
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Status",
+    )
+
+    # ── Progress ──────────────────────────────────────────────
+    total_rows = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Total Rows",
+    )
+    processed_rows = models.IntegerField(
+        default=0,
+        verbose_name="Processed Rows",
+        help_text="Rows already committed; a resumed job skips these",
+    )
+    success_count = models.IntegerField(default=0, verbose_name="Imported")
+    error_count = models.IntegerField(default=0, verbose_name="Errors")
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Row Errors",
+        help_text="First row errors (capped); error_count has the full total",
+    )
+    last_error = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name="Failure Reason",
+    )
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Started At")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
+    class Meta:
+        db_table = 'members_importjob'
+        verbose_name = 'Import Job'
+        verbose_name_plural = 'Import Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['gym', 'status'], name='idx_importjob_gym_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
+
+    @property
+    def is_stalled(self):
+        """Running, but no chunk committed for MEMBER_IMPORT_STALL_MINUTES: the worker died."""
+        stall = timedelta(minutes=getattr(settings, 'MEMBER_IMPORT_STALL_MINUTES', 10))
+        return self.status == self.Status.RUNNING and self.updated_at < timezone.now() - stall
+
+    @property
+    def can_resume(self):
+        return self.status == self.Status.FAILED or self.is_stalled
+
+    @property
+    def progress_pct(self):
+        if not self.total_rows:
+            return 100 if self.status == self.Status.COMPLETED else 0
+        return min(100, int(self.processed_rows * 100 / self.total_rows))
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at or not self.processed_rows:
+            return 0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return int(self.processed_rows / elapsed) if elapsed > 0 else self.processed_rows
@@ -0,0 +1,61 @@
+"""
+Members Search - indexed member lookup shared by the member list page, the
+API's ?search= and the front-desk autocomplete.
+
+- Phone: the query's digits match the end of a member's number through
+  Member.phone_suffix_key (reversed digits, so a suffix is a prefix and a
+  btree range scan): "last four digits" and full numbers in any format.
+  Digits from the start or middle of a number still match the raw phone.
+- Name / email: case-insensitive substring match.
+
+On PostgreSQL the pg_trgm GIN indexes of migration 0008 serve the substring
+lookups; on SQLite (development) they scan the gym's members.
+"""
+
+from django.db.models import Q
+
+from apps.members.models import Member
+
+MIN_QUERY_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_FIELDS = ('id', 'name', 'phone', 'email', 'status', 'membership_expiry', 'last_check_in')
+
+
+def _prefix_range(field, prefix):
+    """Q for `field` values starting with `prefix`, as a range any btree index can serve."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+class MemberSearchService:
+    """Member search and autocomplete over a (gym-scoped) Member queryset."""
+
+    @staticmethod
+    def filter(queryset, query):
+        """Filter `queryset` by a free-text search box value."""
+        query = ' '.join(str(query or '').split())
+        if not query:
+            return queryset
+
+        if any(ch.isalpha() for ch in query) or '@' in query:
+            return queryset.filter(Q(name__icontains=query) | Q(email__icontains=query))
+
+        digits = ''.join(ch for ch in query if ch.isdigit())
+        if not digits:
+            return queryset.filter(name__icontains=query)
+        return queryset.filter(
+            _prefix_range('phone_suffix_key', Member.phone_key(digits)) | Q(phone__contains=digits)
+        )
+
+    @staticmethod
+    def autocomplete(queryset, query, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Up to `limit` matches for a partially typed name, email or phone as
+        plain dicts (AUTOCOMPLETE_FIELDS), alphabetically. Queries shorter
+        than MIN_QUERY_LENGTH return nothing rather than half the gym.
+        """
+        query = ' '.join(str(query or '').split())
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        matches = MemberSearchService.filter(queryset, query)
+        return list(matches.order_by('name', 'id').values(*AUTOCOMPLETE_FIELDS)[:limit])
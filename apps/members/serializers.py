@@ -100,7 +100,7 @@ class MemberSerializer(serializers.ModelSerializer):
             # Engagement
             'assigned_trainer', 'assigned_trainer_name',
             'attendance_streak', 'last_check_in', 'churn_risk_score',
-            'emergency_contact',
+            'emergency_contact', 'whatsapp_opt_out',
             # Timestamps
             'created_at', 'updated_at',
         ]
@@ -1,19 +1,170 @@
 import base64
 import json
 import logging
+from datetime import timedelta
 from io import BytesIO
+from itertools import islice
 
+import openpyxl
 import pandas as pd
 import requests
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 
-from apps.members.models import Member, MembershipPlan
+from apps.communications.services import WhatsAppService
+from apps.core.background import run_in_background
+from apps.core.transport import get_transport
+from apps.members.models import ImportJob, Member, MembershipPlan
+from apps.members.tasks import process_import_job
 from apps.users.models import GymUser
 
 logger = logging.getLogger('apps.members.services')
 
+HIGH_CHURN_RISK_THRESHOLD = 70
+RENEWAL_FORECAST_HORIZONS = (7, 14, 30)
+IMPORT_BATCH_SIZE = 1000
+IMPORT_JOB_MAX_STORED_ERRORS = 200
+
+
+class ImportFileError(ValueError):
+    """An uploaded import file that cannot be read (format or header problem)."""
+
+
+def _cell_text(value):
+    """Spreadsheet cell as import text; whole-number floats lose their '.0'."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+class GymStatsService:
+    """
+    Single-pass member statistics shared by the dashboard, business health
+    page and the members stats API.
+    """
+
+    @staticmethod
+    def get_member_stats(gym=None, queryset=None):
+        """
+        Compute status counts, revenue, renewal and risk buckets in ONE query
+        using conditional aggregation.
+        Pass `queryset` to aggregate over a pre-scoped set (e.g. trainer view).
+        """
+        if queryset is None:
+            queryset = Member.objects.filter(gym=gym, is_deleted=False)
+
+        now = timezone.now()
+        today = now.date()
+        current_month_start = today.replace(day=1)
+        last_month_end = current_month_start - timedelta(days=1)
+        last_month_start = last_month_end.replace(day=1)
+
+        active = Q(status=Member.Status.ACTIVE)
+        expiring_7_days = active & Q(
+            membership_expiry__gte=today,
+            membership_expiry__lte=today + timedelta(days=7),
+        )
+
+        stats = queryset.order_by().aggregate(
+            total_members=Count('id'),
+            active=Count('id', filter=active),
+            expired=Count('id', filter=Q(status=Member.Status.EXPIRED)),
+            frozen=Count('id', filter=Q(status=Member.Status.FROZEN)),
+            cancelled=Count('id', filter=Q(status=Member.Status.CANCELLED)),
+            high_churn_risk=Count('id', filter=Q(churn_risk_score__gte=HIGH_CHURN_RISK_THRESHOLD)),
+            revenue_mtd=Sum('amount_paid', filter=Q(join_date__gte=current_month_start)),
+            revenue_last_month=Sum('amount_paid', filter=Q(
+                join_date__gte=last_month_start,
+                join_date__lte=last_month_end,
+            )),
+            expiring_3_days=Count('id', filter=active & Q(
+                membership_expiry__gte=today,
+                membership_expiry__lte=today + timedelta(days=3),
+            )),
+            expiring_7_days=Count('id', filter=expiring_7_days),
+            expiring_7_days_amount=Sum('membership_plan__price', filter=expiring_7_days),
+            inactive_7_days=Count('id', filter=active & Q(last_check_in__lt=now - timedelta(days=7))),
+            inactive_10_days=Count('id', filter=active & Q(last_check_in__lt=now - timedelta(days=10))),
+            payment_pending=Count('id', filter=Q(
+                status=Member.Status.EXPIRED,
+                membership_expiry__gte=today - timedelta(days=30),
+                membership_expiry__lte=today,
+            )),
+        )
+
+        stats['revenue_mtd'] = stats['revenue_mtd'] or 0
+        stats['revenue_last_month'] = stats['revenue_last_month'] or 0
+        stats['expiring_7_days_amount'] = stats['expiring_7_days_amount'] or 0
+        stats['revenue_growth'] = GymStatsService.growth_pct(
+            stats['revenue_mtd'], stats['revenue_last_month'],
+        )
+        return stats
+
+    @staticmethod
+    def get_renewal_forecast(gym=None, queryset=None, horizons=RENEWAL_FORECAST_HORIZONS):
+        """
+        Renewal revenue expected from active members expiring within each horizon
+        (days from today), summed over the plan price on the database side.
+        One grouped query yields both the per-plan breakdown and the totals.
+        """
+        if queryset is None:
+            queryset = Member.objects.filter(gym=gym, is_deleted=False)
+
+        horizons = sorted(set(horizons))
+        today = timezone.now().date()
+
+        annotations = {}
+        for days in horizons:
+            due = Q(membership_expiry__lte=today + timedelta(days=days))
+            annotations[f'count_{days}'] = Count('id', filter=due)
+            annotations[f'amount_{days}'] = Sum('membership_plan__price', filter=due)
+
+        rows = (
+            queryset.filter(
+                status=Member.Status.ACTIVE,
+                membership_expiry__gte=today,
+                membership_expiry__lte=today + timedelta(days=horizons[-1]),
+            )
+            .order_by()
+            .values('membership_plan_id', 'membership_plan__name')
+            .annotate(**annotations)
+        )
+
+        totals = {days: {'days': days, 'count': 0, 'amount': 0} for days in horizons}
+        by_plan = []
+        for row in rows:
+            plan_horizons = []
+            for days in horizons:
+                count = row[f'count_{days}']
+                amount = row[f'amount_{days}'] or 0
+                totals[days]['count'] += count
+                totals[days]['amount'] += amount
+                plan_horizons.append({'days': days, 'count': count, 'amount': amount})
+            by_plan.append({
+                'plan_id': row['membership_plan_id'],
+                'plan_name': row['membership_plan__name'] or 'No Plan',
+                'horizons': plan_horizons,
+            })
+
+        by_plan.sort(key=lambda p: p['horizons'][-1]['amount'], reverse=True)
+        return {
+            'as_of': today,
+            'horizons': list(totals.values()),
+            'by_plan': by_plan,
+        }
+
+    @staticmethod
+    def growth_pct(current, previous):
+        """Month-over-month growth as an int percentage (100 if starting from zero)."""
+        if previous > 0:
+            return int(((current - previous) / previous) * 100)
+        return 100 if current > 0 else 0
+
 
 class BulkImportService:
     """Service to handle bulk import of members from CSV/Excel."""
@@ -25,82 +176,290 @@ class BulkImportService:
         Returns: (success_count, errors_list)
         """
         try:
-            # Read file
-            if file_obj.name.endswith('.csv'):
-                df = pd.read_csv(file_obj)
-            elif file_obj.name.endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(file_obj)
-            else:
-                return 0, ['Invalid file format. Please upload CSV or Excel.']
+            lookups = BulkImportService.load_lookups(gym)
+            success_count, errors = 0, []
+
+            with transaction.atomic():
+                for row_offset, df in BulkImportService.iter_frames(file_obj, file_obj.name):
+                    members, chunk_errors = BulkImportService.build_members(df, gym, lookups, row_offset)
+                    BulkImportService.insert_members(members)
+                    # bulk_create skips post_save, so send welcomes once committed
+                    transaction.on_commit(
+                        lambda members=members: WhatsAppService().send_welcome_messages(members)
+                    )
+                    success_count += len(members)
+                    errors.extend(chunk_errors)
 
-            # Normalize headers
-            df.columns = [c.lower().strip().replace(' ', '_') for c in df.columns]
+            return success_count, errors
 
-            required_cols = ['name', 'phone']
-            missing = [c for c in required_cols if c not in df.columns]
+        except ImportFileError as e:
+            return 0, [str(e)]
+        except Exception as e:
+            logger.error(f"Bulk import failed: {e}")
+            return 0, [f"File processing failed: {str(e)}"]
+
+    @staticmethod
+    def iter_frames(file_obj, filename, skip_rows=0, chunksize=None):
+        """
+        Stream an uploaded CSV/Excel file as DataFrames of at most `chunksize`
+        rows with normalized headers, so peak memory follows the chunk size
+        rather than the file size. The first `skip_rows` data rows are skipped
+        (resuming a job).
+        Yields: (row_offset, dataframe). Raises ImportFileError for an
+        unsupported format or missing required columns.
+        """
+        chunksize = chunksize or IMPORT_BATCH_SIZE
+        # Every column is read as text so phones keep their digits
+        if filename.endswith('.csv'):
+            frames = pd.read_csv(file_obj, dtype=str, chunksize=chunksize)
+        elif filename.endswith('.xlsx'):
+            frames = BulkImportService._iter_xlsx(file_obj, chunksize)
+        elif filename.endswith('.xls'):
+            # Legacy binary workbooks have no streaming reader: load, then slice
+            df = pd.read_excel(file_obj, dtype=str)
+            frames = (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+        else:
+            raise ImportFileError('Invalid file format. Please upload CSV or Excel.')
+
+        consumed = 0
+        for df in frames:
+            # Normalize headers
+            df.columns = [str(c).lower().strip().replace(' ', '_') for c in df.columns]
+            missing = [c for c in ('name', 'phone') if c not in df.columns]
             if missing:
-                return 0, [f'Missing required columns: {", ".join(missing)}']
+                raise ImportFileError(f'Missing required columns: {", ".join(missing)}')
 
-            success_count = 0
-            errors = []
+            if consumed + len(df) <= skip_rows:
+                consumed += len(df)
+                continue
+            if consumed < skip_rows:
+                df = df.iloc[skip_rows - consumed:]
+                consumed = skip_rows
 
-            # Default plan (if not specified or not found) - try finding a 'Monthly' plan or first active plan
-            default_plan = MembershipPlan.objects.filter(gym=gym, is_active=True).first()
+            yield consumed, df
+            consumed += len(df)
+
+    @staticmethod
+    def _iter_xlsx(file_obj, chunksize):
+        """Row-streaming .xlsx reader (openpyxl read-only mode), one DataFrame per chunk."""
+        workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = ['' if cell is None else str(cell) for cell in header]
+            width = len(header)
+            # Skip fully blank rows, as read_csv does
+            rows = (row for row in rows if any(cell not in (None, '') for cell in row))
+            while True:
+                batch = list(islice(rows, chunksize))
+                if not batch:
+                    break
+                yield pd.DataFrame(
+                    [[_cell_text(cell) for cell in (row + (None,) * width)[:width]] for row in batch],
+                    columns=header,
+                )
+        finally:
+            workbook.close()
 
-            for index, row in df.iterrows():
+    @staticmethod
+    def estimate_rows(file_obj, filename):
+        """
+        Cheap data-row estimate for progress reporting, without parsing:
+        newline count for CSV, sheet dimensions for .xlsx. Rewinds the file.
+        """
+        try:
+            if filename.endswith('.csv'):
+                lines, last = 0, b''
+                for block in iter(lambda: file_obj.read(1024 * 1024), b''):
+                    lines += block.count(b'\n')
+                    last = block[-1:]
+                if last and last != b'\n':
+                    lines += 1
+                return max(lines - 1, 0)
+            if filename.endswith('.xlsx'):
+                workbook = openpyxl.load_workbook(file_obj, read_only=True)
                 try:
-                    name = str(row.get('name', '')).strip()
-                    phone = str(row.get('phone', '')).strip()
-                    email = str(row.get('email', '')).strip() if pd.notna(row.get('email')) else ''
-                    
-                    # Basic validation
-                    if not name or not phone:
-                        errors.append(f"Row {index+2}: Name and Phone are required.")
-                        continue
-
-                    # Check for duplicates (phone) within gym
-                    if Member.objects.filter(gym=gym, phone=phone).exists():
-                        errors.append(f"Row {index+2}: Member with phone {phone} already exists.")
-                        continue
-                    
-                    # Create member
-                    member = Member(
-                        gym=gym,
-                        name=name,
-                        phone=phone,
-                        email=email,
-                        status='active',
-                        membership_start=timezone.now().date(),
-                    )
+                    return max((workbook.active.max_row or 1) - 1, 0)
+                finally:
+                    workbook.close()
+            return None
+        finally:
+            file_obj.seek(0)
 
-                    # Assign plan if specified
-                    plan_name = str(row.get('plan', '')).strip() if pd.notna(row.get('plan')) else ''
-                    if plan_name:
-                        plan = MembershipPlan.objects.filter(gym=gym, name__iexact=plan_name).first()
-                        if plan:
-                            member.membership_plan = plan
-                            # Calculate expiry based on plan duration
-                            member.membership_expiry = member.membership_start + timezone.timedelta(days=plan.duration_days)
-                        else:
-                             # Fallback to default if plan name doesn't match
-                            if default_plan:
-                                member.membership_plan = default_plan
-                                member.membership_expiry = member.membership_start + timezone.timedelta(days=default_plan.duration_days)
-                    elif default_plan:
-                        member.membership_plan = default_plan
-                        member.membership_expiry = member.membership_start + timezone.timedelta(days=default_plan.duration_days)
-
-                    member.save()
-                    success_count += 1
-
-                except Exception as e:
-                    errors.append(f"Row {index+2}: {str(e)}")
+    @staticmethod
+    def load_lookups(gym):
+        """
+        Pre-load everything row validation needs in two queries: every phone
+        already used in the gym (soft-deleted rows still hold the unique key)
+        and the gym's plans keyed by lower-cased name.
+        """
+        plans = list(MembershipPlan.objects.filter(gym=gym).order_by('created_at'))
+        return {
+            'phones': set(Member.objects.filter(gym=gym).values_list('phone', flat=True)),
+            'plans': {plan.name.strip().lower(): plan for plan in plans},
+            # Default plan (if not specified or not found) - first active plan
+            'default_plan': next((plan for plan in plans if plan.is_active), None),
+        }
 
-            return success_count, errors
+    @staticmethod
+    def build_members(df, gym, lookups, row_offset=0):
+        """
+        Validate a DataFrame of rows with column operations and build unsaved
+        Member objects for the valid ones. `lookups['phones']` is updated with
+        the accepted phones so later chunks see them as duplicates.
+        Returns: (members, errors_list)
+        """
+        df = df.fillna('')
+        for col in ('name', 'phone', 'email', 'plan'):
+            df[col] = df[col].astype(str).str.strip() if col in df.columns else ''
+        rows = pd.Series(range(len(df)), index=df.index) + row_offset + 2  # header + 1-based
+
+        blank = (df['name'] == '') | (df['phone'] == '')
+        existing = ~blank & df['phone'].isin(lookups['phones'])
+        repeated = ~blank & ~existing & df['phone'].duplicated(keep='first')
+
+        # Unknown or blank plan names fall back to the default plan
+        plans, default_plan = lookups['plans'], lookups['default_plan']
+        plan = df['plan'].str.lower().map(lambda key: plans.get(key, default_plan))
+        no_plan = ~(blank | existing | repeated) & plan.isna()
+
+        errors = []
+        for mask, message in (
+            (blank, "Row {row}: Name and Phone are required."),
+            (existing, "Row {row}: Member with phone {phone} already exists."),
+            (repeated, "Row {row}: Duplicate phone {phone} in file."),
+            (no_plan, "Row {row}: No membership plan found."),
+        ):
+            errors.extend(
+                (row, message.format(row=row, phone=phone))
+                for row, phone in zip(rows[mask], df.loc[mask, 'phone'])
+            )
+        errors = [message for _, message in sorted(errors)]
+
+        valid = ~(blank | existing | repeated | no_plan)
+        today = timezone.now().date()
+        members = []
+        for name, phone, email, member_plan in zip(
+            df.loc[valid, 'name'], df.loc[valid, 'phone'], df.loc[valid, 'email'], plan[valid],
+        ):
+            members.append(Member(
+                gym=gym,
+                name=name,
+                phone=phone,
+                phone_suffix_key=Member.phone_key(phone),
+                email=email or None,
+                status=Member.Status.ACTIVE,
+                membership_plan=member_plan,
+                join_date=today,
+                membership_start=today,
+                # Calculate expiry based on plan duration
+                membership_expiry=today + timedelta(days=member_plan.duration_months * 30),
+            ))
+
+        lookups['phones'].update(member.phone for member in members)
+        return members, errors
+
+    @staticmethod
+    def insert_members(members):
+        """Insert members in chunks of IMPORT_BATCH_SIZE rows per statement."""
+        for start in range(0, len(members), IMPORT_BATCH_SIZE):
+            Member.objects.bulk_create(members[start:start + IMPORT_BATCH_SIZE])
+
+
+class ImportJobService:
+    """Runs bulk imports as background ImportJobs (Celery, or an in-process thread)."""
 
+    @staticmethod
+    def create_job(file_obj, gym, user=None):
+        """Store the upload, create a pending ImportJob and queue it."""
+        job = ImportJob(gym=gym, created_by=user, original_filename=file_obj.name)
+        job.file.save(file_obj.name, file_obj, save=False)
+        job.save()
+        ImportJobService.enqueue(job)
+        return job
+
+    @staticmethod
+    def resume(job):
+        """
+        Re-queue a failed or stalled (worker killed mid-run) job; it continues
+        after the last committed chunk. The status change is conditional on
+        the row being unchanged, so concurrent resumes queue it only once.
+        """
+        if not job.can_resume:
+            return False
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(
+            id=job.id, status=job.status, updated_at=job.updated_at,
+        ).update(status=ImportJob.Status.PENDING, last_error=None, finished_at=None, updated_at=now)
+        if not claimed:
+            return False
+        job.status, job.last_error, job.finished_at, job.updated_at = ImportJob.Status.PENDING, None, None, now
+        ImportJobService.enqueue(job)
+        return True
+
+    @staticmethod
+    def enqueue(job):
+        """Dispatch once the job row is committed so the worker can see it."""
+        transaction.on_commit(lambda: run_in_background(process_import_job, str(job.id)))
+
+    @staticmethod
+    def run(job_id):
+        """
+        Process a job in IMPORT_BATCH_SIZE chunks. Each chunk's inserts and the
+        job's progress counters commit in the same transaction, so a crash
+        never loses or double-counts rows and a resumed job skips exactly the
+        rows already committed.
+        """
+        job = ImportJob.objects.select_related('gym').get(id=job_id)
+        if job.status == ImportJob.Status.COMPLETED:
+            return job
+
+        job.status = ImportJob.Status.RUNNING
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+        progress_fields = ['processed_rows', 'success_count', 'error_count', 'errors', 'updated_at']
+
+        try:
+            with job.file.open('rb') as file_obj:
+                if job.total_rows is None:
+                    job.total_rows = BulkImportService.estimate_rows(file_obj, job.original_filename)
+                    job.save(update_fields=['total_rows', 'updated_at'])
+
+                lookups = BulkImportService.load_lookups(job.gym)
+                for start, chunk in BulkImportService.iter_frames(
+                    file_obj, job.original_filename, skip_rows=job.processed_rows,
+                ):
+                    members, errors = BulkImportService.build_members(chunk, job.gym, lookups, row_offset=start)
+                    with transaction.atomic():
+                        BulkImportService.insert_members(members)
+                        job.processed_rows = start + len(chunk)
+                        job.success_count += len(members)
+                        job.error_count += len(errors)
+                        job.errors = (job.errors + errors)[:IMPORT_JOB_MAX_STORED_ERRORS]
+                        job.save(update_fields=progress_fields)
+                        transaction.on_commit(
+                            lambda members=members: WhatsAppService().send_welcome_messages(members)
+                        )
+
+            # The estimate may count blank or multi-line rows; settle on the real total
+            job.total_rows = job.processed_rows
+            job.status = ImportJob.Status.COMPLETED
         except Exception as e:
-            logger.error(f"Bulk import failed: {e}")
-            return 0, [f"File processing failed: {str(e)}"]
+            logger.exception(f"Import job {job_id} failed: {e}")
+            # Counters may hold a rolled-back chunk; keep the committed values
+            job.refresh_from_db(fields=progress_fields)
+            job.status = ImportJob.Status.FAILED
+            job.last_error = str(e)
+
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'total_rows', 'last_error', 'finished_at', 'updated_at'])
+        logger.info(
+            f"Import job {job_id} {job.status}: {job.success_count} imported, "
+            f"{job.error_count} errors, {job.rows_per_second} rows/s"
+        )
+        return job
 
 
 class AIScanService:
@@ -169,7 +528,7 @@ class AIScanService:
                 "response_format": {"type": "json_object"} 
             }
 
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+            response = get_transport('openai', timeout=settings.OPENAI_REQUEST_TIMEOUT).post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
             response.raise_for_status()
 
             result = response.json()
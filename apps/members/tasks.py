@@ -0,0 +1,17 @@
+"""
+Members Celery tasks.
+"""
+
+from celery import shared_task
+
+
+@shared_task
+def process_import_job(job_id):
+    from apps.members.services import ImportJobService
+    ImportJobService.run(job_id)
+
+
+@shared_task
+def score_churn_risk(changed_only=False):
+    from apps.members.churn import ChurnScoringService
+    ChurnScoringService.score_all(changed_only=changed_only)
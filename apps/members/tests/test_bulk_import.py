@@ -0,0 +1,218 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+import openpyxl
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+
+from apps.communications.models import OutboundMessage
+from apps.gyms.models import Gym
+from apps.members.models import ImportJob, Member, MembershipPlan
+from apps.members.services import BulkImportService, ImportJobService
+from apps.users.models import GymUser
+
+
+class BulkImportServiceTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Import Gym", email="import@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.monthly = MembershipPlan.objects.create(
+            gym=self.gym, name="Monthly", duration_months=1, price=1000
+        )
+        self.quarterly = MembershipPlan.objects.create(
+            gym=self.gym, name="Quarterly", duration_months=3, price=2500
+        )
+        self.today = timezone.now().date()
+        Member.objects.create(
+            gym=self.gym, name="Existing", phone="9100000000", join_date=self.today,
+            membership_start=self.today, membership_expiry=self.today + timedelta(days=30),
+        )
+        self.existing_messages = OutboundMessage.objects.count()
+        # Queued welcomes would otherwise start a drain thread on commit
+        patcher = patch('apps.communications.services.run_in_background')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, content, name="members.csv"):
+        return SimpleUploadedFile(name, content.encode())
+
+    def test_imports_valid_rows_and_reports_errors(self):
+        csv = (
+            "Name,Phone,Email,Plan\n"
+            "Asha,9100000001,asha@example.com,quarterly\n"
+            "Ravi,9100000002,,Unknown Plan\n"
+            ",9100000003,,\n"
+            "Old,9100000000,,\n"
+            "Twice,9100000002,,\n"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            count, errors = BulkImportService.process_file(self.upload(csv), self.gym)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(errors, [
+            "Row 4: Name and Phone are required.",
+            "Row 5: Member with phone 9100000000 already exists.",
+            "Row 6: Duplicate phone 9100000002 in file.",
+        ])
+
+        asha = Member.objects.get(gym=self.gym, phone="9100000001")
+        self.assertEqual(asha.membership_plan, self.quarterly)
+        self.assertEqual(asha.join_date, self.today)
+        self.assertEqual(asha.membership_expiry, self.today + timedelta(days=90))
+        # Unknown plan names fall back to the first active plan
+        ravi = Member.objects.get(gym=self.gym, phone="9100000002")
+        self.assertEqual(ravi.membership_plan, self.monthly)
+
+        welcomes = OutboundMessage.objects.count() - self.existing_messages
+        self.assertEqual(welcomes, 2)
+
+    def test_no_per_row_queries(self):
+        rows = "".join(f"Member {i},98{i:08d}\n" for i in range(200))
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                count, errors = BulkImportService.process_file(
+                    self.upload("name,phone\n" + rows), self.gym
+                )
+        self.assertEqual((count, errors), (200, []))
+
+        # Only the two lookup queries read; everything else is batched inserts
+        selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 2)
+        self.assertEqual(Member.objects.filter(gym=self.gym).count(), 201)
+
+    def test_streams_xlsx_in_chunks(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Name", "Phone", "Plan"])
+        for i in range(5):
+            sheet.append([f"Member {i}", 9300000000 + i, "Quarterly"])
+        buffer = BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        chunks = list(BulkImportService.iter_frames(buffer, "members.xlsx", chunksize=2))
+        self.assertEqual([(offset, len(df)) for offset, df in chunks], [(0, 2), (2, 2), (4, 1)])
+        # Numeric phone cells come through as plain digits
+        self.assertEqual(chunks[0][1]['phone'].tolist(), ["9300000000", "9300000001"])
+
+        buffer.seek(0)
+        upload = SimpleUploadedFile("members.xlsx", buffer.read())
+        count, errors = BulkImportService.process_file(upload, self.gym)
+        self.assertEqual((count, errors), (5, []))
+
+    @patch('apps.members.services.IMPORT_BATCH_SIZE', 2)
+    def test_duplicates_detected_across_chunks(self):
+        csv = "name,phone\nA,9100000001\nB,9100000002\nC,9100000003\nD,9100000001\n"
+        count, errors = BulkImportService.process_file(self.upload(csv), self.gym)
+        self.assertEqual(count, 3)
+        self.assertEqual(errors, ["Row 5: Member with phone 9100000001 already exists."])
+
+    def test_missing_columns(self):
+        count, errors = BulkImportService.process_file(self.upload("name\nAsha\n"), self.gym)
+        self.assertEqual(count, 0)
+        self.assertEqual(errors, ["Missing required columns: phone"])
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.gym = Gym.objects.create(
+            name="Job Gym", email="job@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        MembershipPlan.objects.create(gym=self.gym, name="Monthly", duration_months=1, price=1000)
+        rows = "".join(f"Member {i},97{i:08d}\n" for i in range(5))
+        self.upload = SimpleUploadedFile("members.csv", ("name,phone\n" + rows).encode())
+
+    def create_job(self):
+        with patch.object(ImportJobService, 'enqueue'):
+            return ImportJobService.create_job(self.upload, self.gym)
+
+    def test_run_completes_job(self):
+        job = self.create_job()
+        self.assertEqual(job.status, ImportJob.Status.PENDING)
+
+        job = ImportJobService.run(job.id)
+
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.total_rows, job.processed_rows, job.success_count), (5, 5, 5))
+        self.assertEqual(job.progress_pct, 100)
+        self.assertEqual(Member.objects.filter(gym=self.gym).count(), 5)
+
+    @patch('apps.members.services.IMPORT_BATCH_SIZE', 2)
+    def test_failed_job_resumes_after_last_committed_chunk(self):
+        job = self.create_job()
+        real_insert = BulkImportService.insert_members
+        calls = []
+
+        def flaky_insert(members):
+            calls.append(len(members))
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            real_insert(members)
+
+        with patch.object(BulkImportService, 'insert_members', side_effect=flaky_insert):
+            job = ImportJobService.run(job.id)
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertEqual((job.processed_rows, job.success_count), (2, 2))
+        self.assertEqual(Member.objects.filter(gym=self.gym).count(), 2)
+
+        with patch.object(ImportJobService, 'enqueue'):
+            self.assertTrue(ImportJobService.resume(job))
+        job = ImportJobService.run(job.id)
+
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.processed_rows, job.success_count, job.error_count), (5, 5, 0))
+        self.assertEqual(Member.objects.filter(gym=self.gym).count(), 5)
+
+    @patch('apps.members.services.IMPORT_BATCH_SIZE', 2)
+    @override_settings(MEMBER_IMPORT_STALL_MINUTES=10)
+    def test_stalled_running_job_can_be_resumed(self):
+        job = self.create_job()
+        real_insert = BulkImportService.insert_members
+
+        def insert_once(members):
+            if Member.objects.filter(gym=self.gym).exists():
+                raise RuntimeError("worker killed")
+            real_insert(members)
+
+        with patch.object(BulkImportService, 'insert_members', side_effect=insert_once):
+            ImportJobService.run(job.id)
+        # The worker died mid-run: the job never left RUNNING
+        ImportJob.objects.filter(id=job.id).update(status=ImportJob.Status.RUNNING, last_error=None)
+        job.refresh_from_db()
+
+        self.assertFalse(job.is_stalled)
+        with patch.object(ImportJobService, 'enqueue'):
+            self.assertFalse(ImportJobService.resume(job))
+
+        ImportJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(minutes=11))
+        job.refresh_from_db()
+        owner = GymUser.objects.create_user("owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw')
+        self.client.force_login(owner)
+        response = self.client.get(reverse('frontend:member-import-status', args=[job.id]))
+        self.assertContains(response, reverse('frontend:member-import-resume', args=[job.id]))
+
+        stale_copy = ImportJob.objects.get(id=job.id)
+        with patch.object(ImportJobService, 'enqueue') as enqueue:
+            self.assertTrue(ImportJobService.resume(job))
+            self.assertFalse(ImportJobService.resume(stale_copy))
+        enqueue.assert_called_once()
+
+        job = ImportJobService.run(job.id)
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.processed_rows, job.success_count), (5, 5))
+        self.assertEqual(Member.objects.filter(gym=self.gym).count(), 5)
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.fitness.models import Attendance
+from apps.gyms.models import Gym
+from apps.members.churn import ChurnScoringService
+from apps.members.models import Member, MembershipPlan
+
+
+class ChurnScoringTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Churn Gym", email="churn@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.mplan = MembershipPlan.objects.create(
+            gym=self.gym, name="Monthly", duration_months=1, price=1000
+        )
+        self.now = timezone.now()
+        self.today = timezone.localdate()
+
+        def make(phone, **kwargs):
+            defaults = dict(
+                gym=self.gym, name=f"Member {phone}", phone=phone, membership_plan=self.mplan,
+                join_date=self.today - timedelta(days=365), membership_start=self.today - timedelta(days=20),
+                membership_expiry=self.today + timedelta(days=90), amount_paid=1000,
+            )
+            defaults.update(kwargs)
+            return Member.objects.create(**defaults)
+
+        self.regular = make("9100000001", last_check_in=self.now - timedelta(hours=20))
+        self.lapsed = make(
+            "9100000002", last_check_in=self.now - timedelta(days=40), amount_paid=0,
+            membership_expiry=self.today + timedelta(days=3),
+        )
+        self.newbie = make("9100000003", join_date=self.today, membership_start=self.today)
+        Attendance.objects.bulk_create(
+            [Attendance(gym=self.gym, member=self.regular, check_in=self.now - timedelta(days=d, hours=1))
+             for d in range(0, 28, 2)]
+            + [Attendance(gym=self.gym, member=self.lapsed, check_in=self.now - timedelta(days=d))
+               for d in range(40, 55, 3)]
+        )
+
+    def scores(self):
+        return dict(Member.objects.values_list('phone', 'churn_risk_score'))
+
+    def test_scores_reflect_engagement(self):
+        totals = ChurnScoringService.score_gym(self.gym, now=self.now)
+
+        self.assertEqual(totals, {'scored': 3, 'updated': 3})
+        scores = self.scores()
+        self.assertLess(scores["9100000001"], 15)
+        self.assertGreater(scores["9100000002"], 85)
+        self.assertLess(scores["9100000001"], scores["9100000003"])
+        self.assertTrue(all(0 <= s <= 100 for s in scores.values()))
+        self.assertFalse(Member.objects.filter(churn_scored_at__isnull=True).exists())
+
+    def test_constant_queries_and_no_rewrite_of_unchanged_scores(self):
+        with self.assertNumQueries(4):
+            ChurnScoringService.score_gym(self.gym, now=self.now)
+        updated_at = dict(Member.objects.values_list('id', 'updated_at'))
+
+        # Same inputs, same scores: nothing to bulk_update
+        with self.assertNumQueries(3):
+            totals = ChurnScoringService.score_gym(self.gym, now=self.now)
+        self.assertEqual(totals['updated'], 0)
+        self.assertEqual(dict(Member.objects.values_list('id', 'updated_at')), updated_at)
+
+    def test_incremental_run_only_rescores_changed_members(self):
+        ChurnScoringService.score_gym(self.gym)
+        self.assertEqual(ChurnScoringService.score_gym(self.gym, changed_only=True), {})
+
+        before = self.scores()["9100000002"]
+        self.lapsed.refresh_from_db()
+        self.lapsed.last_check_in = timezone.now()
+        self.lapsed.save()
+
+        totals = ChurnScoringService.score_gym(self.gym, changed_only=True)
+        self.assertEqual(totals['scored'], 1)
+        self.assertLess(self.scores()["9100000002"], before)
+
+    def test_incremental_run_reads_only_changed_members_visits(self):
+        ChurnScoringService.score_gym(self.gym)
+        changed = Member.objects.get(phone="9100000002")
+        Member.objects.filter(id=changed.id).update(updated_at=timezone.now() + timedelta(minutes=1))
+
+        with mock.patch('apps.members.churn.Attendance.objects.filter', wraps=Attendance.objects.filter) as visits:
+            totals = ChurnScoringService.score_gym(self.gym, changed_only=True)
+
+        self.assertEqual(totals['scored'], 1)
+        self.assertEqual([row['id'] for row in visits.call_args.kwargs['member_id__in']], [changed.id])
+
+    @mock.patch('apps.members.churn.SCORE_BATCH_SIZE', 2)
+    def test_scored_at_is_stamped_in_batches(self):
+        totals = ChurnScoringService.score_gym(self.gym, now=self.now)
+
+        self.assertEqual(totals['scored'], 3)
+        self.assertEqual(Member.objects.filter(gym=self.gym, churn_scored_at=self.now).count(), 3)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('score_churn_risk', gym=self.gym.gym_code, stdout=out)
+        self.assertIn("Scored 3 members", out.getvalue())
@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+
+from apps.gyms.models import Gym
+from apps.members.models import Member, MembershipPlan
+from apps.members.services import GymStatsService
+
+
+class GymStatsServiceTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Stats Gym", email="stats@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        self.other_gym = Gym.objects.create(
+            name="Other Gym", email="other@gym.com", owner_name="Owner", owner_phone="9000000001"
+        )
+        self.mplan = MembershipPlan.objects.create(
+            gym=self.gym, name="Monthly", duration_months=1, price=1000
+        )
+        self.today = timezone.now().date()
+
+        def make(phone, gym=None, **kwargs):
+            defaults = dict(
+                gym=gym or self.gym, name=f"Member {phone}", phone=phone,
+                membership_plan=self.mplan, join_date=self.today,
+                membership_start=self.today,
+                membership_expiry=self.today + timedelta(days=30),
+            )
+            defaults.update(kwargs)
+            return Member.objects.create(**defaults)
+
+        make("9100000001", amount_paid=1000)
+        make("9100000002", amount_paid=500, membership_expiry=self.today + timedelta(days=2))
+        make("9100000003", status='expired', membership_expiry=self.today - timedelta(days=5))
+        make("9100000004", status='frozen', churn_risk_score=80)
+        make("9100000005", last_check_in=timezone.now() - timedelta(days=12))
+        make("9100000006", is_deleted=True)
+        make("9100000007", gym=self.other_gym, amount_paid=9999)
+
+    def test_counts_and_revenue(self):
+        stats = GymStatsService.get_member_stats(gym=self.gym)
+
+        self.assertEqual(stats['total_members'], 5)
+        self.assertEqual(stats['active'], 3)
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual(stats['frozen'], 1)
+        self.assertEqual(stats['high_churn_risk'], 1)
+        self.assertEqual(stats['revenue_mtd'], 1500)
+        self.assertEqual(stats['expiring_3_days'], 1)
+        self.assertEqual(stats['expiring_7_days'], 1)
+        self.assertEqual(stats['inactive_7_days'], 1)
+        self.assertEqual(stats['inactive_10_days'], 1)
+        self.assertEqual(stats['payment_pending'], 1)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            GymStatsService.get_member_stats(gym=self.gym)
+
+    def test_growth_pct(self):
+        self.assertEqual(GymStatsService.growth_pct(150, 100), 50)
+        self.assertEqual(GymStatsService.growth_pct(10, 0), 100)
+        self.assertEqual(GymStatsService.growth_pct(0, 0), 0)
+
+    def test_pending_renewals_amount(self):
+        stats = GymStatsService.get_member_stats(gym=self.gym)
+        self.assertEqual(stats['expiring_7_days_amount'], 1000)
+
+    def test_renewal_forecast(self):
+        with self.assertNumQueries(1):
+            forecast = GymStatsService.get_renewal_forecast(gym=self.gym)
+
+        totals = {h['days']: h for h in forecast['horizons']}
+        self.assertEqual(totals[7]['count'], 1)
+        self.assertEqual(totals[7]['amount'], 1000)
+        self.assertEqual(totals[14]['count'], 1)
+        self.assertEqual(totals[30]['count'], 3)
+        self.assertEqual(totals[30]['amount'], 3000)
+
+        self.assertEqual(len(forecast['by_plan']), 1)
+        self.assertEqual(forecast['by_plan'][0]['plan_name'], "Monthly")
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.gyms.models import Gym
+from apps.members.models import Member
+from apps.members.search import MemberSearchService
+from apps.users.models import GymUser
+
+
+class MemberSearchTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Search Gym", email="search@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        other_gym = Gym.objects.create(
+            name="Other Gym", email="other@gym.com", owner_name="Owner", owner_phone="9000000001"
+        )
+        today = timezone.localdate()
+
+        def make(name, phone, gym=None, **kwargs):
+            return Member.objects.create(
+                gym=gym or self.gym, name=name, phone=phone, join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30), **kwargs
+            )
+
+        self.rahul = make("Rahul Sharma", "+91 98765-43210", email="rahul@example.com")
+        self.priya = make("Priya Nair", "9123443210")
+        self.amit = make("Amit Shah", "9000011111")
+        make("Rahul Stranger", "9876543210", gym=other_gym)
+        self.members = Member.objects.filter(gym=self.gym, is_deleted=False)
+
+    def names(self, query):
+        return sorted(MemberSearchService.filter(self.members, query).values_list('name', flat=True))
+
+    def test_phone_key_tracks_phone(self):
+        self.assertEqual(self.rahul.phone_suffix_key, "0123456789")
+        self.priya.phone = "9123400000"
+        self.priya.save(update_fields=['phone'])
+        self.assertEqual(Member.objects.get(id=self.priya.id).phone_suffix_key, "0000043219")
+
+    def test_phone_searches(self):
+        # Last digits, a full number in another format, and the start of a number
+        self.assertEqual(self.names("3210"), ["Priya Nair", "Rahul Sharma"])
+        self.assertEqual(self.names("98765 43210"), ["Rahul Sharma"])
+        self.assertEqual(self.names("+91 9876543210"), ["Rahul Sharma"])
+        self.assertEqual(self.names("90000"), ["Amit Shah"])
+
+    def test_name_and_email_searches(self):
+        self.assertEqual(self.names("sha"), ["Amit Shah", "Rahul Sharma"])
+        self.assertEqual(self.names("RAHUL  sharma"), ["Rahul Sharma"])
+        self.assertEqual(self.names("rahul@"), ["Rahul Sharma"])
+        self.assertEqual(self.names(""), ["Amit Shah", "Priya Nair", "Rahul Sharma"])
+
+
+class MemberSearchApiTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(
+            name="Api Gym", email="api@gym.com", owner_name="Owner", owner_phone="9000000000"
+        )
+        today = timezone.localdate()
+        for i in range(15):
+            Member.objects.create(
+                gym=self.gym, name=f"Kiran {i:02d}", phone=f"98000000{i:02d}", join_date=today,
+                membership_start=today, membership_expiry=today + timedelta(days=30),
+            )
+        owner = GymUser.objects.create_user("owner", "9000000001", "Owner", gym=self.gym, role='owner', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def test_list_search_uses_the_index_lookups(self):
+        response = self.client.get('/api/v1/members/', {'search': '0007'})
+        self.assertEqual([m['name'] for m in response.data['results']], ["Kiran 07"])
+
+    def test_autocomplete(self):
+        response = self.client.get('/api/v1/members/autocomplete/', {'q': 'kiran'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(response.data[0]['name'], "Kiran 00")
+        self.assertEqual(set(response.data[0]), {
+            'id', 'name', 'phone', 'email', 'status', 'membership_expiry', 'last_check_in',
+        })
+
+        self.assertEqual(len(self.client.get('/api/v1/members/autocomplete/', {'q': 'kiran', 'limit': 3}).data), 3)
+        self.assertEqual(self.client.get('/api/v1/members/autocomplete/', {'q': 'k'}).data, [])
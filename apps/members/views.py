@@ -2,11 +2,13 @@
 Members Views - Member and MembershipPlan CRUD ViewSets.
 """
 
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 
 from apps.members.models import Member, MembershipPlan
 from apps.members.serializers import (
@@ -14,7 +16,9 @@ from apps.members.serializers import (
     MemberListSerializer,
     MembershipPlanSerializer,
 )
-from apps.members.filters import MemberFilter
+from apps.members.filters import MemberFilter, MemberSearchFilter
+from apps.members.search import AUTOCOMPLETE_LIMIT, MemberSearchService
+from apps.members.services import GymStatsService, RENEWAL_FORECAST_HORIZONS
 from apps.core.permissions import (
     IsGymStaff,
     CanManageMembers,
@@ -57,7 +61,7 @@ class MemberViewSet(GymScopedMixin, viewsets.ModelViewSet):
 
     - **Owner/Manager**: sees all members in their gym
     - **Trainer**: sees only members assigned to them
-    - **Search**: name, phone, email
+    - **Search**: name, email, phone (any format, or its last digits)
     - **Filters**: status, goal, gender, experience, diet, expiry range, churn risk
     - **Ordering**: name, join_date, membership_expiry, churn_risk_score, created_at
     """
@@ -66,6 +70,7 @@ class MemberViewSet(GymScopedMixin, viewsets.ModelViewSet):
         'gym', 'membership_plan', 'assigned_trainer',
     ).filter(is_deleted=False)
     permission_classes = [IsAuthenticated, IsGymStaff, CanManageMembers]
+    filter_backends = [DjangoFilterBackend, MemberSearchFilter, OrderingFilter]
     filterset_class = MemberFilter
     search_fields = ['name', 'phone', 'email']
     ordering_fields = [
@@ -95,21 +100,70 @@ class MemberViewSet(GymScopedMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """GET /api/v1/members/stats/ — Aggregate member stats."""
-        qs = self.get_queryset()
-        total = qs.count()
-        active = qs.filter(status='active').count()
-        expired = qs.filter(status='expired').count()
-        high_churn = qs.filter(churn_risk_score__gte=70).count()
+        stats = GymStatsService.get_member_stats(queryset=self.get_queryset())
 
         return Response({
-            'total_members': total,
-            'active': active,
-            'expired': expired,
-            'frozen': qs.filter(status='frozen').count(),
-            'cancelled': qs.filter(status='cancelled').count(),
-            'high_churn_risk': high_churn,
+            'total_members': stats['total_members'],
+            'active': stats['active'],
+            'expired': stats['expired'],
+            'frozen': stats['frozen'],
+            'cancelled': stats['cancelled'],
+            'high_churn_risk': stats['high_churn_risk'],
         })
 
+    @extend_schema(
+        tags=['Members'],
+        summary="Get Renewal Revenue Forecast",
+        description=(
+            "Expected renewal revenue from active members expiring in the next "
+            "7/14/30 days, with a per-plan breakdown. Override horizons with "
+            "`?horizons=7,14,30`."
+        ),
+    )
+    @action(detail=False, methods=['get'], url_path='renewal-forecast')
+    def renewal_forecast(self, request):
+        """GET /api/v1/members/renewal-forecast/ — Renewal revenue forecast."""
+        horizons = RENEWAL_FORECAST_HORIZONS
+        raw = request.query_params.get('horizons')
+        if raw:
+            try:
+                horizons = [int(h) for h in raw.split(',') if h.strip()]
+            except ValueError:
+                horizons = []
+            if not horizons or any(h < 1 or h > 365 for h in horizons):
+                return Response(
+                    {'error': 'horizons must be comma-separated day counts between 1 and 365.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        forecast = GymStatsService.get_renewal_forecast(
+            queryset=self.get_queryset(), horizons=horizons,
+        )
+        return Response(forecast)
+
+    @extend_schema(
+        tags=['Members'],
+        summary="Autocomplete Members",
+        description=(
+            "Front-desk lookup: up to `limit` (default 10, max 25) members whose name or "
+            "email contains `q`, or whose phone contains or ends with its digits."
+        ),
+        parameters=[
+            OpenApiParameter('q', str, description="Partial name, email or phone (at least 2 characters)"),
+            OpenApiParameter('limit', int, description="Maximum results (1-25)"),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """GET /api/v1/members/autocomplete/?q= — Quick member lookup."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)), 1), 25)
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        return Response(MemberSearchService.autocomplete(
+            self.get_queryset(), request.query_params.get('q', ''), limit=limit,
+        ))
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -0,0 +1,14 @@
+"""
+Celery application for background jobs (bulk imports, etc.).
+Configured from Django settings under the CELERY_ namespace.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
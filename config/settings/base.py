@@ -185,6 +185,7 @@ IMPORT_EXPORT_USE_TRANSACTIONS = True
 # OpenAI
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 OPENAI_DEFAULT_MODEL = 'gpt-4o-mini'
+OPENAI_REQUEST_TIMEOUT = config('OPENAI_REQUEST_TIMEOUT', default=60, cast=int)
 
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
 GEMINI_DEFAULT_MODEL = 'gemini-2.0-flash'
@@ -194,6 +195,54 @@ META_WHATSAPP_API_URL = config('META_WHATSAPP_API_URL', default='https://graph.f
 META_WHATSAPP_ACCESS_TOKEN = config('META_WHATSAPP_ACCESS_TOKEN', default='')
 META_WHATSAPP_PHONE_NUMBER_ID = config('META_WHATSAPP_PHONE_NUMBER_ID', default='')
 WHATSAPP_SIMULATION_MODE = config('WHATSAPP_SIMULATION_MODE', default=True, cast=bool)
+# Delivery-status webhook: GET verification token and POST signature secret
+# (POSTs are rejected without the secret, unless DEBUG and simulation mode are on)
+META_WHATSAPP_WEBHOOK_VERIFY_TOKEN = config('META_WHATSAPP_WEBHOOK_VERIFY_TOKEN', default='')
+META_WHATSAPP_APP_SECRET = config('META_WHATSAPP_APP_SECRET', default='')
+# Outbound throughput: Cloud API numbers start at ~80 msg/s, stay well below it
+WHATSAPP_RATE_LIMIT_PER_SECOND = config('WHATSAPP_RATE_LIMIT_PER_SECOND', default=20, cast=float)
+WHATSAPP_AUTOMATION_WORKERS = config('WHATSAPP_AUTOMATION_WORKERS', default=8, cast=int)
+WHATSAPP_AUTOMATION_WORKERS_PER_GYM = config('WHATSAPP_AUTOMATION_WORKERS_PER_GYM', default=2, cast=int)
+# Pooled HTTP transport to the Cloud API (keep pool >= concurrent senders)
+WHATSAPP_HTTP_POOL_SIZE = config('WHATSAPP_HTTP_POOL_SIZE', default=20, cast=int)
+WHATSAPP_HTTP_MAX_RETRIES = config('WHATSAPP_HTTP_MAX_RETRIES', default=3, cast=int)
+WHATSAPP_HTTP_BACKOFF = config('WHATSAPP_HTTP_BACKOFF', default=0.5, cast=float)
+# Bulk runs buffer message logs: flush every N rows or after T milliseconds
+WHATSAPP_LOG_BATCH_SIZE = config('WHATSAPP_LOG_BATCH_SIZE', default=100, cast=int)
+WHATSAPP_LOG_FLUSH_MS = config('WHATSAPP_LOG_FLUSH_MS', default=1000, cast=int)
+# Months of message logs older than this are moved to gzip JSONL under MEDIA_ROOT (archive_whatsapp_logs)
+WHATSAPP_LOG_RETENTION_DAYS = config('WHATSAPP_LOG_RETENTION_DAYS', default=180, cast=int)
+WHATSAPP_LOG_ARCHIVE_CHUNK_SIZE = config('WHATSAPP_LOG_ARCHIVE_CHUNK_SIZE', default=2000, cast=int)
+# Outbound queue: every send is enqueued, then claimed by a worker in batches.
+# Failures retry after base * 2^(attempt-1) seconds (capped) until dead-lettered.
+WHATSAPP_QUEUE_BATCH_SIZE = config('WHATSAPP_QUEUE_BATCH_SIZE', default=100, cast=int)
+WHATSAPP_QUEUE_MAX_ATTEMPTS = config('WHATSAPP_QUEUE_MAX_ATTEMPTS', default=5, cast=int)
+WHATSAPP_QUEUE_RETRY_BASE_SECONDS = config('WHATSAPP_QUEUE_RETRY_BASE_SECONDS', default=30, cast=int)
+WHATSAPP_QUEUE_RETRY_MAX_SECONDS = config('WHATSAPP_QUEUE_RETRY_MAX_SECONDS', default=3600, cast=int)
+WHATSAPP_QUEUE_LEASE_SECONDS = config('WHATSAPP_QUEUE_LEASE_SECONDS', default=300, cast=int)
+# Drain the queue in the background as soon as new messages are committed
+WHATSAPP_QUEUE_AUTO_DRAIN = config('WHATSAPP_QUEUE_AUTO_DRAIN', default=True, cast=bool)
+# Staged delivery-status events applied per batch (one CASE UPDATE each)
+WHATSAPP_STATUS_BATCH_SIZE = config('WHATSAPP_STATUS_BATCH_SIZE', default=500, cast=int)
+
+# Check-ins: repeat scans within N minutes are duplicates; max scans per batch request
+ATTENDANCE_DEDUPE_MINUTES = config('ATTENDANCE_DEDUPE_MINUTES', default=10, cast=int)
+ATTENDANCE_BATCH_MAX = config('ATTENDANCE_BATCH_MAX', default=500, cast=int)
+# Occupancy rollups: length assumed for a visit that has no check-out yet
+ATTENDANCE_ASSUMED_VISIT_MINUTES = config('ATTENDANCE_ASSUMED_VISIT_MINUTES', default=60, cast=int)
+# Live occupancy: visits without a check-out stop counting after N minutes; warn at N% of member_capacity
+ATTENDANCE_MAX_VISIT_MINUTES = config('ATTENDANCE_MAX_VISIT_MINUTES', default=240, cast=int)
+ATTENDANCE_CAPACITY_WARN_PERCENT = config('ATTENDANCE_CAPACITY_WARN_PERCENT', default=90, cast=int)
+# reconcile_occupancy (Celery beat) closes overdue visits and recounts every gym's counter this often
+ATTENDANCE_RECONCILE_MINUTES = config('ATTENDANCE_RECONCILE_MINUTES', default=5, cast=int)
+
+# ── Background Tasks ───────────────────────────────────────────────────
+# When False (or the broker is unreachable) jobs run on an in-process thread.
+BACKGROUND_TASKS_USE_CELERY = config('BACKGROUND_TASKS_USE_CELERY', default=False, cast=bool)
+# A running member import with no progress for N minutes lost its worker and can be resumed
+MEMBER_IMPORT_STALL_MINUTES = config('MEMBER_IMPORT_STALL_MINUTES', default=10, cast=int)
+# refresh_gym_metrics (Celery beat) rebuilds today's GymDailyMetrics rows this often
+GYM_METRICS_REFRESH_MINUTES = config('GYM_METRICS_REFRESH_MINUTES', default=15, cast=int)
 
 # Razorpay
 RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='')
@@ -2,6 +2,8 @@
 Gym AI SaaS - Production Settings
 """
 
+from celery.schedules import crontab
+
 from .base import *  # noqa: F401, F403
 
 DEBUG = False
@@ -32,16 +34,9 @@ DATABASES = {
     }
 }
 
-# Cache - Redis
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': config('REDIS_URL', default='redis://localhost:6379/0'),
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-#         },
-#     }
-# }
+# Cache - Redis when REDIS_CACHE_URL is set (shared counters such as live
+# occupancy need it with several workers), else local memory below
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
 
 # Session - Redis backed
 # SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
@@ -53,6 +48,16 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
 
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
@@ -102,6 +107,28 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Kolkata'
+BACKGROUND_TASKS_USE_CELERY = config('BACKGROUND_TASKS_USE_CELERY', default=True, cast=bool)
+# Periodic jobs, run by `celery -A config beat`
+CELERY_BEAT_SCHEDULE = {
+    # Visits with no check-out stop counting towards live occupancy
+    'reconcile-occupancy': {
+        'task': 'apps.fitness.tasks.reconcile_occupancy',
+        'schedule': ATTENDANCE_RECONCILE_MINUTES * 60,
+        'options': {'expires': ATTENDANCE_RECONCILE_MINUTES * 60},
+    },
+    # Dashboards and enterprise rollups read GymDailyMetrics, not live tables
+    'refresh-gym-metrics': {
+        'task': 'apps.gyms.tasks.refresh_gym_metrics',
+        'schedule': GYM_METRICS_REFRESH_MINUTES * 60,
+        'options': {'expires': GYM_METRICS_REFRESH_MINUTES * 60},
+    },
+    # Settle yesterday's activity counts with what landed after the last daytime run
+    'close-gym-metrics-day': {
+        'task': 'apps.gyms.tasks.refresh_gym_metrics',
+        'schedule': crontab(hour=0, minute=10),
+        'kwargs': {'days': 2},
+    },
+}
 
 
 #
@@ -24,6 +24,7 @@ api_v1_urlpatterns = [
     path('members/', include('apps.members.urls')),
     path('membership-plans/', include('apps.members.urls_plans')),
     path('enterprises/', include('apps.enterprises.urls')),
+    path('attendance/', include('apps.fitness.urls')),
     path('', include('apps.leads.api.urls')),
 ]
 
@@ -40,6 +41,9 @@ urlpatterns = [
     # API v1
     path('api/v1/', include((api_v1_urlpatterns, 'api-v1'))),
 
+    # Provider webhooks
+    path('webhooks/', include('apps.communications.urls')),
+
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),